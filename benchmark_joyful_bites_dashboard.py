@@ -0,0 +1,328 @@
+"""
+JOYFUL BITES DASHBOARD BENCHMARK
+Headless benchmarks of the dashboard's page functions at several dataset sizes.
+
+The dashboard is imported against a stand-in `streamlit` module: elements are
+no-ops, widgets return their default option, `st.cache_data` memoizes like
+Streamlit (hashing every argument not starting with an underscore, returning
+a copy on each hit), and every figure passed to `st.plotly_chart` is
+recorded. Datasets are synthesized with generate_joyful_bites_dataset.py and
+kept in `.joyful_bites_cache/benchmark/`.
+
+For each dataset size, `load_data()` and each page function are measured:
+
+- cold: all caches cleared (Streamlit caches, figure and filter caches, and
+  the shared store, which also holds the cube and trendline refresh state)
+- warm: the same call again, as on a rerun
+  (both the fastest of --repeat runs, to keep noise out of comparisons)
+- peak memory: a second cold run under tracemalloc. This covers NumPy and
+  pandas allocations, but not memory Arrow allocates itself
+- payload: bytes of the JSON of every figure the page rendered
+
+Results are written as JSON. Given a baseline (an earlier results file),
+measurements that got worse by more than the tolerance are reported, and the
+exit status is 1.
+
+Usage:
+    python benchmark_joyful_bites_dashboard.py --sizes 10000 100000 1000000 --output bench.json
+    python benchmark_joyful_bites_dashboard.py --baseline bench.json
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import os
+import pickle
+import platform
+import sys
+import time
+import tracemalloc
+import types
+from datetime import datetime
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_REPEAT = 3
+
+BENCHMARK_DIR = os.path.join('.joyful_bites_cache', 'benchmark')
+
+# Differences below these are noise, whatever the relative change
+MIN_SECONDS_CHANGE = 0.01
+MIN_BYTES_CHANGE = 64 * 1024
+
+METRICS = ['cold_seconds', 'warm_seconds', 'peak_memory_bytes', 'payload_bytes']
+
+PAGES = [
+    ('create_segment_overview', ()),
+    ('create_segment_comparison', ()),
+    ('create_persona_deep_dive', ('Busy Brenda',)),
+    ('create_persona_deep_dive', ('Hungry Hiro',)),
+    ('create_persona_deep_dive', ('Urban Uro',)),
+    ('create_behavioral_insights', ()),
+    ('create_cohort_analysis', ()),
+    ('create_customer_explorer', ()),
+]
+
+
+class StopRun(Exception):
+    """Raised by the stand-in st.stop()"""
+
+
+class _Element:
+    """Stand-in for any Streamlit element or container: usable as a context manager, every method a no-op"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(_stub, name)
+
+
+def _noop(*args, **kwargs):
+    return _Element()
+
+
+def _memoize(copy_hits, func=None, **options):
+    """Stand-in for st.cache_data/st.cache_resource (callable with or without options)"""
+    if func is None:
+        return lambda f: _memoize(copy_hits, f)
+    params = list(inspect.signature(func).parameters)
+    memo = {}
+
+    @functools.wraps(func)
+    def cached(*args, **kwargs):
+        bound = dict(zip(params, args)) | kwargs
+        key = tuple((name, value) for name, value in bound.items() if not name.startswith('_'))
+        if key not in memo:
+            memo[key] = func(*args, **kwargs)
+        # st.cache_data hands out an unpickled copy on every call
+        return pickle.loads(pickle.dumps(memo[key])) if copy_hits else memo[key]
+
+    cached.clear = memo.clear
+    _stub.caches.append(cached)
+    return cached
+
+
+def _choose(label, options, index=0, *args, **kwargs):
+    return list(options)[index]
+
+
+def _value(label, *args, value=None, **kwargs):
+    return value
+
+
+def _columns(spec, *args, **kwargs):
+    return [_Element() for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+
+def _plotly_chart(fig, *args, **kwargs):
+    _stub.figures.append(fig)
+    return _Element()
+
+
+def _stop():
+    raise StopRun()
+
+
+def _make_stub():
+    """The stand-in `streamlit` module"""
+    stub = types.ModuleType('streamlit')
+    stub.__getattr__ = lambda name: _noop
+    stub.caches = []
+    stub.figures = []
+    stub.cache_data = functools.partial(_memoize, True)
+    stub.cache_resource = functools.partial(_memoize, False)
+    stub.fragment = lambda func=None, **options: func if func is not None else (lambda f: f)
+    stub.columns = _columns
+    stub.selectbox = _choose
+    stub.radio = _choose
+    stub.text_input = _value
+    stub.number_input = _value
+    stub.toggle = _value
+    stub.plotly_chart = _plotly_chart
+    stub.stop = _stop
+    stub.sidebar = _Element()
+    stub.column_config = _Element()
+    stub.session_state = {}
+    return stub
+
+
+_stub = _make_stub()
+
+
+def import_dashboard():
+    """The dashboard module, imported against the stand-in streamlit"""
+    sys.modules['streamlit'] = _stub
+    import joyful_bites_dashboard
+    return joyful_bites_dashboard
+
+
+def dataset_path(rows, seed):
+    """Synthetic export of `rows` customers, generated on first use"""
+    from generate_joyful_bites_dataset import generate_chunks, write_csv
+
+    path = os.path.join(BENCHMARK_DIR, f"customers_{rows}_seed{seed}.csv")
+    if not os.path.exists(path):
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        write_csv(generate_chunks(rows, seed), tmp_path)
+        os.replace(tmp_path, path)
+    return path
+
+
+def reset_caches():
+    """Clear every cache a cold start begins without"""
+    from joyful_bites_figure_cache import clear_figure_cache
+    from joyful_bites_filters import clear_filter_cache
+    from joyful_bites_store import clear_store
+
+    for cache in _stub.caches:
+        cache.clear()
+    clear_figure_cache()
+    clear_filter_cache()
+    clear_store()
+
+
+def _timed(call):
+    """(seconds, result) of one call"""
+    started = time.perf_counter()
+    result = call()
+    return time.perf_counter() - started, result
+
+
+def _peak_memory(call):
+    """Peak traced allocation of one call, in bytes"""
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(call, prepare, repeat=DEFAULT_REPEAT):
+    """
+    Cold/warm seconds (best of `repeat`), peak memory and figure payload of
+    `call`; `prepare()` returns it to a cold state.
+    """
+    cold, warm = [], []
+    for _ in range(repeat):
+        prepare()
+        del _stub.figures[:]
+        cold.append(_timed(call)[0])
+        figures = list(_stub.figures)
+        warm.append(_timed(call)[0])
+    prepare()
+    peak = _peak_memory(call)
+    return {
+        'cold_seconds': min(cold),
+        'warm_seconds': min(warm),
+        'peak_memory_bytes': peak,
+        'payload_bytes': sum(len(fig.to_json()) for fig in figures),
+        'figures': len(figures),
+    }
+
+
+def benchmark(sizes, seed, backend=None, repeat=DEFAULT_REPEAT, pages=PAGES):
+    """Measurements for load_data() and every page at each dataset size"""
+    dashboard = import_dashboard()
+    if backend:
+        dashboard.DATA_BACKEND = backend
+
+    results = []
+    for rows in sizes:
+        dashboard.DATA_FILE = dataset_path(rows, seed)
+        dashboard.load_data()  # Builds the on-disk snapshot/conversion, like any earlier run would have
+
+        result = measure(dashboard.load_data, reset_caches, repeat)
+        results.append(dict(rows=rows, function='load_data', **result))
+        print(f"{rows:>12,}  {'load_data':<42} {result['cold_seconds']:8.3f}s cold", file=sys.stderr)
+
+        df = dashboard.load_data()
+        for name, args in pages:
+            page = getattr(dashboard, name)
+            label = f"{name}({', '.join(args)})" if args else name
+            result = measure(lambda: page(df, *args), reset_caches, repeat)
+            results.append(dict(rows=rows, function=label, **result))
+            print(
+                f"{rows:>12,}  {label:<42} {result['cold_seconds']:8.3f}s cold {result['warm_seconds']:8.3f}s warm"
+                f" {result['peak_memory_bytes'] / 1024 ** 2:8.1f} MB peak {result['payload_bytes'] / 1024:8.1f} KB payload",
+                file=sys.stderr,
+            )
+    return results
+
+
+def environment():
+    """Versions and machine details recorded with the results"""
+    import numpy
+    import pandas
+    import plotly
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'plotly': plotly.__version__,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Measurements more than `tolerance` (relative) worse than the baseline's, as readable lines"""
+    previous = {(r['rows'], r['function']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        base = previous.get((result['rows'], result['function']))
+        if base is None:
+            continue
+        for metric in METRICS:
+            old, new = base[metric], result[metric]
+            min_change = MIN_SECONDS_CHANGE if metric.endswith('seconds') else MIN_BYTES_CHANGE
+            if new > old * (1 + tolerance) and new - old > min_change:
+                value = '{:,.3f}' if metric.endswith('seconds') else '{:,}'
+                regressions.append(
+                    f"{result['rows']:,} rows {result['function']}: {metric} "
+                    f"{value.format(old)} -> {value.format(new)} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard page functions headlessly")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="dataset sizes (customers)")
+    parser.add_argument('--seed', type=int, default=42, help="seed of the synthetic datasets")
+    parser.add_argument('--backend', choices=['pandas', 'mapped', 'duckdb', 'streaming'], help="force a data backend")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="runs per measurement; the fastest is kept")
+    parser.add_argument('--output', help="write results JSON here (default: stdout)")
+    parser.add_argument('--baseline', help="earlier results JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    results = benchmark(args.sizes, args.seed, args.backend, args.repeat)
+    report = {'environment': environment(), 'seed': args.seed, 'backend': args.backend, 'repeat': args.repeat, 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+JOYFUL BITES DATASET GENERATOR
+Synthetic customer exports of any size, with the schema of the bundled sample.
+
+Every generated customer is modelled on a customer of the same segment drawn
+from the template export (the bundled 5,399-row CSV by default), so the
+per-segment mix of cities, occupations, channels, order times, payment
+methods, promo/loyalty flags and `top_menu_items` lists follows the real
+data, including the correlations between them. Numeric fields are jittered
+around the template customer's values within the segment's observed range,
+and derived fields are recomputed so each row stays consistent:
+
+- registration date and tenure are drawn together, counted back from the export date
+- total orders = visit frequency x tenure
+- total spent = orders x average order value
+- last order date is never before registration
+
+Names, emails, phone numbers and customer ids are generated fresh, so ids
+are unique at any size. Rows are generated with vectorized NumPy in chunks
+(memory stays flat up to tens of millions of rows), each chunk from its own
+generator seeded by (seed, first row of the chunk), so the same arguments
+(including --chunk-rows) always produce the same data. Output is a CSV
+export (optionally .gz/.zst compressed), a Parquet file, or a month x segment
+partitioned directory (joyful_bites_dataset).
+
+Usage:
+    python generate_joyful_bites_dataset.py --rows 1000000 --output customers_1m.csv
+    python generate_joyful_bites_dataset.py --rows 10000000 --output customers_10m.csv.zst
+    python generate_joyful_bites_dataset.py --rows 1000000 --output customers_1m.parquet
+    python generate_joyful_bites_dataset.py --rows 1000000 --output customers_1m --format partitioned
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from joyful_bites_dataset import write_partitioned
+from joyful_bites_schema import CUSTOMER_SCHEMA, SEGMENTS, apply_schema, read_customers
+
+TEMPLATE_FILE = 'joyful_bites_customers_5000.csv'
+
+DEFAULT_ROWS = 100_000
+DEFAULT_SEED = 42
+CHUNK_ROWS = 1_000_000
+
+# The sample's export date: tenure is counted back from here, and last orders
+# fall in the two months before it
+EXPORT_DATE = np.datetime64('2026-01-31', 'D')
+LAST_ORDER_WINDOW_DAYS = 61
+DAYS_PER_MONTH = 30.44
+
+FIRST_CUSTOMER_NUMBER = 1000
+SEGMENT_CODES = {'Busy Brenda': 'BB', 'Hungry Hiro': 'HH', 'Urban Uro': 'UU'}
+EMAIL_DOMAINS = ['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com']
+
+# Multiplicative (lognormal sigma) or additive (normal sd) jitter applied to
+# the template customer's value
+JITTER = {
+    'visit_frequency_month': 0.15,
+    'avg_order_value': 0.08,
+    'lifetime_value': 0.10,
+    'party_size_avg': 0.2,
+    'promo_engagement_rate': 0.05,
+}
+
+CLIPPED_COLUMNS = ['age', 'tenure_months', 'visit_frequency_month', 'avg_order_value', 'lifetime_value', 'party_size_avg']
+
+
+def load_template(path=TEMPLATE_FILE):
+    """Template customers, their segment mix and each segment's observed value ranges"""
+    df = read_customers(path)
+    codes = np.asarray(df['segment'].cat.codes)
+    counts = np.bincount(codes, minlength=len(SEGMENTS))
+    grouped = df.groupby('segment', observed=False)[CLIPPED_COLUMNS]
+    return {
+        'frame': df,
+        'shares': counts / counts.sum(),
+        'rows': [np.flatnonzero(codes == code) for code in range(len(SEGMENTS))],
+        'low': grouped.min().to_numpy(dtype=np.float64),
+        'high': grouped.max().to_numpy(dtype=np.float64),
+    }
+
+
+def _column_bounds(template, column, segment_codes):
+    """Per-row (low, high) bounds of a column for each row's segment"""
+    i = CLIPPED_COLUMNS.index(column)
+    return template['low'][segment_codes, i], template['high'][segment_codes, i]
+
+
+def _clip(template, column, values, segment_codes):
+    """Clip values into their segment's observed range"""
+    return np.clip(values, *_column_bounds(template, column, segment_codes))
+
+
+def _padded(numbers, width):
+    """Zero-padded decimal strings of non-negative integers"""
+    return pc.utf8_lpad(pc.cast(pa.array(numbers), pa.string()), width, padding='0')
+
+
+def _names(rng, names, rows):
+    """Names drawn from a template name column as (categorical, lowercased Arrow strings for emails)"""
+    codes = np.asarray(names.cat.codes)[rng.integers(0, len(names), size=rows)]
+    categories = names.cat.categories
+    lowered = pa.array(categories.str.lower().str.replace(' ', '', regex=False).to_numpy(dtype=object))
+    return pd.Categorical.from_codes(codes, categories=categories), pc.take(lowered, pa.array(codes))
+
+
+def _phones(rng, phones, rows):
+    """Mobile numbers in the sample's format: '09', a network prefix drawn from the sample's numbers, then 7 random digits"""
+    prefixes = phones[phones.str.fullmatch(r'09\d{9}', na=False)].str.slice(0, 4).to_numpy(dtype=object)
+    drawn = pa.array(prefixes[rng.integers(0, len(prefixes), size=rows)], pa.string())
+    return pc.binary_join_element_wise(drawn, _padded(rng.integers(0, 10 ** 7, size=rows), 7), '').to_pandas()
+
+
+def _emails(rng, first, last):
+    """Emails in the sample's four patterns: first.last, firstlast42, flast, firstl"""
+    rows = len(first)
+    local = pc.choose(
+        pa.array(rng.integers(0, 4, size=rows).astype(np.int8)),
+        pc.binary_join_element_wise(first, '.', last, ''),
+        pc.binary_join_element_wise(first, last, _padded(rng.integers(10, 100, size=rows), 2), ''),
+        pc.binary_join_element_wise(pc.utf8_slice_codeunits(first, 0, 1), last, ''),
+        pc.binary_join_element_wise(first, pc.utf8_slice_codeunits(last, 0, 1), ''),
+    )
+    domains = pc.take(pa.array(EMAIL_DOMAINS), pa.array(rng.integers(0, len(EMAIL_DOMAINS), size=rows)))
+    return pc.binary_join_element_wise(local, '@', domains, '').to_pandas()
+
+
+def generate_chunk(template, start, rows, total_rows, seed=DEFAULT_SEED):
+    """Customers `start` .. `start + rows - 1` of a `total_rows`-row dataset"""
+    rng = np.random.default_rng([seed, start])
+    t = template['frame']
+
+    # Each customer copies the categorical profile of a template customer of its segment
+    segment_codes = rng.choice(len(SEGMENTS), size=rows, p=template['shares'])
+    source = np.empty(rows, dtype=np.int64)
+    for code, candidates in enumerate(template['rows']):
+        in_segment = segment_codes == code
+        source[in_segment] = candidates[rng.integers(0, len(candidates), size=in_segment.sum())]
+
+    def base(column):
+        return t[column].to_numpy(dtype=np.float64)[source]
+
+    def take(column):
+        return t[column].take(source).reset_index(drop=True)
+
+    age = _clip(template, 'age', base('age') + rng.integers(-2, 3, size=rows), segment_codes)
+    visits = _clip(template, 'visit_frequency_month', np.round(
+        base('visit_frequency_month') * rng.lognormal(0, JITTER['visit_frequency_month'], size=rows), 1
+    ), segment_codes)
+
+    # Registration date and tenure drawn together, counting back from the export date
+    tenure = _clip(template, 'tenure_months', base('tenure_months') + rng.integers(-2, 3, size=rows), segment_codes)
+    days_registered = np.maximum(np.floor((tenure - rng.random(rows)) * DAYS_PER_MONTH), 1).astype(np.int64)
+    registration_date = EXPORT_DATE - days_registered
+    tenure = np.maximum(np.ceil(days_registered / DAYS_PER_MONTH), 1)
+    last_order_date = np.maximum(
+        EXPORT_DATE - rng.integers(1, LAST_ORDER_WINDOW_DAYS + 1, size=rows),
+        registration_date,
+    )
+
+    total_orders = np.clip(np.round(visits * tenure), 1, np.iinfo(np.int16).max)
+    avg_order_value = _clip(template, 'avg_order_value', np.round(
+        base('avg_order_value') * rng.lognormal(0, JITTER['avg_order_value'], size=rows), 2
+    ), segment_codes)
+    total_spent = np.round(avg_order_value * total_orders, 2)
+    lifetime_value = _clip(template, 'lifetime_value', np.round(
+        base('lifetime_value') * rng.lognormal(0, JITTER['lifetime_value'], size=rows), 2
+    ), segment_codes)
+    party_size = _clip(template, 'party_size_avg', np.round(
+        base('party_size_avg') + rng.normal(0, JITTER['party_size_avg'], size=rows), 1
+    ), segment_codes)
+    promo_rate = np.clip(np.round(
+        base('promo_engagement_rate') + rng.normal(0, JITTER['promo_engagement_rate'], size=rows), 2
+    ), 0, 0.95)
+
+    # Identity fields are generated fresh; names come from the sample's name pool
+    first_name, first_lowered = _names(rng, t['first_name'], rows)
+    last_name, last_lowered = _names(rng, t['last_name'], rows)
+    id_width = max(6, len(str(FIRST_CUSTOMER_NUMBER + total_rows - 1)))
+    prefixes = pc.take(pa.array([f"JB-{SEGMENT_CODES[s]}-" for s in SEGMENTS]), pa.array(segment_codes))
+    numbers = _padded(np.arange(start, start + rows) + FIRST_CUSTOMER_NUMBER, id_width)
+
+    df = pd.DataFrame({
+        'customer_id': pc.binary_join_element_wise(prefixes, numbers, '').to_pandas(),
+        'segment': pd.Categorical.from_codes(segment_codes, categories=SEGMENTS),
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': _emails(rng, first_lowered, last_lowered),
+        'phone': _phones(rng, t['phone'], rows),
+        'age': age,
+        'city': take('city'),
+        'occupation': take('occupation'),
+        'num_children': take('num_children'),
+        'registration_date': registration_date.astype('datetime64[ns]'),
+        'last_order_date': last_order_date.astype('datetime64[ns]'),
+        'tenure_months': tenure,
+        'total_orders': total_orders,
+        'total_spent': total_spent,
+        'avg_order_value': np.round(total_spent / total_orders, 2),
+        'visit_frequency_month': visits,
+        'lifetime_value': lifetime_value,
+        'party_size_avg': party_size,
+        'preferred_channel': take('preferred_channel'),
+        'primary_order_time': take('primary_order_time'),
+        'top_menu_items': take('top_menu_items'),
+        'uses_promos': take('uses_promos'),
+        'loyalty_enrolled': take('loyalty_enrolled'),
+        'loyalty_active': take('loyalty_active'),
+        'preferred_payment': take('preferred_payment'),
+        'promo_engagement_rate': promo_rate,
+    })
+    return apply_schema(df)[list(CUSTOMER_SCHEMA)]
+
+
+def generate_chunks(rows, seed=DEFAULT_SEED, chunk_rows=CHUNK_ROWS, template=None):
+    """Typed customer frames of at most `chunk_rows` rows making up a `rows`-row dataset"""
+    template = template or load_template()
+    for start in range(0, rows, chunk_rows):
+        yield generate_chunk(template, start, min(chunk_rows, rows - start), rows, seed)
+
+
+def _csv_table(df):
+    """Arrow table of a chunk laid out like the sample CSV (dates as YYYY-MM-DD, flags as True/False)"""
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == bool:
+            values = pa.DictionaryArray.from_arrays(pa.array(values.to_numpy(dtype=np.int8)), ['False', 'True'])
+        elif values.dtype.kind == 'M':
+            values = pa.array(values.to_numpy().astype('datetime64[D]'))
+        elif values.dtype == np.float32:
+            # Widened float32 prints as 2.700000047683716; rounding to float32's precision gives back 2.7
+            values = pa.array(np.round(values.to_numpy(dtype=np.float64), 6))
+        columns[col] = values
+    return pa.table(columns)
+
+
+def _compression(path):
+    """Arrow stream compression for an output path, from its extension"""
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def write_csv(chunks, path):
+    """Write chunks to one CSV export (gzip/zstd compressed for .gz/.zst paths); returns rows written"""
+    rows = 0
+    with pa.CompressedOutputStream(path, _compression(path)) if _compression(path) else pa.OSFile(path, 'wb') as sink:
+        writer = None
+        for df in chunks:
+            table = _csv_table(df)
+            if writer is None:
+                writer = pa_csv.CSVWriter(sink, table.schema)
+            writer.write_table(table)
+            rows += len(df)
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_parquet(chunks, path):
+    """Write chunks to one Parquet file, one row group per chunk; returns rows written"""
+    rows = 0
+    writer = None
+    try:
+        for df in chunks:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_partitioned_chunks(chunks, root, file_format='parquet'):
+    """Write chunks as a month x segment partitioned dataset, one file per chunk per partition; returns rows written"""
+    rows = 0
+    for i, df in enumerate(chunks):
+        write_partitioned(df, root, file_format, part_number=i)
+        rows += len(df)
+    return rows
+
+
+def output_format(path):
+    """'csv', 'parquet' or 'partitioned' from an output path"""
+    if path.endswith('.parquet'):
+        return 'parquet'
+    if path.endswith(('.csv', '.csv.gz', '.csv.zst')):
+        return 'csv'
+    return 'partitioned'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Joyful Bites customer export")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help="number of customers")
+    parser.add_argument('--output', default=f"joyful_bites_customers_{DEFAULT_ROWS}.csv",
+                        help="output .csv/.csv.gz/.csv.zst or .parquet file, or a directory for --format partitioned")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'partitioned'], help="defaults to the output path's extension")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--template', default=TEMPLATE_FILE, help="export whose customers the synthetic ones are modelled on")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    chunks = generate_chunks(args.rows, args.seed, args.chunk_rows, load_template(args.template))
+    file_format = args.format or output_format(args.output)
+    if file_format == 'csv':
+        rows = write_csv(chunks, args.output)
+    elif file_format == 'parquet':
+        rows = write_parquet(chunks, args.output)
+    else:
+        rows = write_partitioned_chunks(chunks, args.output)
+
+    print(f"Wrote {rows:,} customers to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+JOYFUL BITES BITMAP INDEX
+Compressed (roaring-style) row bitmaps over categorical and boolean attributes.
+
+A bitmap marks a set of customer rows. Rows are split into chunks of 65,536
+by their high bits, and each non-empty chunk stores its low bits in whichever
+container is smallest:
+
+- array: sorted 16-bit row offsets (up to 4,096 rows)
+- bitmap: 1,024 64-bit words (dense chunks)
+- run: (start, length - 1) pairs, for contiguous rows (e.g. a segment of the
+  segment-sorted frame, which is a handful of runs however many rows it has)
+
+Empty chunks take no space. A bitmap index holds one bitmap per value of each
+indexed column, built once per data version. Counts under any combination
+of predicates are popcounts of ANDed bitmaps (values ORed within a column,
+columns ANDed together), touching only the chunks every operand has.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_WORDS = CHUNK_SIZE // 64
+ARRAY_MAX = 4096
+
+# Set bits in each byte value, for popcounts
+BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# keys: ascending chunk numbers; containers: (kind, data) for each, kind 'array', 'bitmap' or 'run'
+Bitmap = namedtuple('Bitmap', ['size', 'keys', 'containers'])
+
+# size: number of rows; bitmaps: {column: {value: Bitmap}} (values in column order)
+BitmapIndex = namedtuple('BitmapIndex', ['size', 'bitmaps'])
+
+
+def _container(low):
+    """Smallest container for the sorted, distinct 16-bit offsets `low`"""
+    n = len(low)
+    breaks = np.flatnonzero(np.diff(low.astype(np.int32)) != 1) + 1
+    if 4 * (len(breaks) + 1) < min(2 * n, 8 * CHUNK_WORDS):
+        starts = low[np.r_[0, breaks]]
+        ends = low[np.r_[breaks - 1, n - 1]]
+        return ('run', np.stack([starts, ends - starts]).astype(np.uint16))
+    if n <= ARRAY_MAX:
+        return ('array', low.astype(np.uint16))
+    return ('bitmap', _words_from_values(low))
+
+
+def _words_from_values(low):
+    mask = np.zeros(CHUNK_SIZE, dtype=bool)
+    mask[low] = True
+    return np.packbits(mask, bitorder='little').view(np.uint64)
+
+
+def _words(container):
+    """A container as 1,024 64-bit words"""
+    kind, data = container
+    if kind == 'bitmap':
+        return data
+    if kind == 'array':
+        return _words_from_values(data)
+    starts, lengths = data.astype(np.int64)
+    edges = np.zeros(CHUNK_SIZE + 1, dtype=np.int32)
+    np.add.at(edges, starts, 1)
+    np.add.at(edges, starts + lengths + 1, -1)
+    return np.packbits(np.cumsum(edges[:-1]) > 0, bitorder='little').view(np.uint64)
+
+
+def _values(container):
+    """A container's sorted 16-bit offsets"""
+    kind, data = container
+    if kind == 'array':
+        return data
+    return np.flatnonzero(np.unpackbits(_words(container).view(np.uint8), bitorder='little')).astype(np.uint16)
+
+
+def _popcount(words):
+    """Number of set bits in a word array"""
+    return int(BYTE_BITS[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def _cardinality(container):
+    kind, data = container
+    if kind == 'array':
+        return len(data)
+    if kind == 'run':
+        return int(data[1].sum(dtype=np.int64)) + data.shape[1]
+    return _popcount(data)
+
+
+def _from_words(words):
+    """Array or bitmap container for a word array (None when empty)"""
+    n = _popcount(words)
+    if n == 0:
+        return None
+    if n <= ARRAY_MAX:
+        return ('array', _values(('bitmap', words)))
+    return ('bitmap', words)
+
+
+def _and(a, b):
+    if a[0] == 'array' and b[0] == 'array':
+        low = np.intersect1d(a[1], b[1], assume_unique=True)
+        return ('array', low) if len(low) else None
+    if a[0] == 'array' or b[0] == 'array':
+        (_, low), other = (a, b) if a[0] == 'array' else (b, a)
+        words = _words(other)
+        low = low[((words[low >> 6] >> (low & 63).astype(np.uint64)) & 1).astype(bool)]
+        return ('array', low) if len(low) else None
+    return _from_words(_words(a) & _words(b))
+
+
+def _or(containers):
+    if len(containers) == 1:
+        return containers[0]
+    if all(kind == 'array' for kind, _ in containers) and sum(len(d) for _, d in containers) <= ARRAY_MAX:
+        return ('array', np.unique(np.concatenate([d for _, d in containers])))
+    words = _words(containers[0]).copy()
+    for container in containers[1:]:
+        words |= _words(container)
+    return _from_words(words)
+
+
+def from_rows(rows, size):
+    """Bitmap of ascending, distinct row positions"""
+    rows = np.asarray(rows, dtype=np.int64)
+    highs = rows >> CHUNK_BITS
+    bounds = np.r_[0, np.flatnonzero(np.diff(highs)) + 1, len(rows)]
+    keys = highs[bounds[:-1]]
+    containers = [_container((rows[start:stop] & (CHUNK_SIZE - 1)).astype(np.uint16))
+                  for start, stop in zip(bounds[:-1], bounds[1:])]
+    return Bitmap(size, keys, containers)
+
+
+def to_rows(bitmap):
+    """Ascending row positions in a bitmap"""
+    if not bitmap.containers:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate([
+        (int(key) << CHUNK_BITS) + _values(container).astype(np.int64)
+        for key, container in zip(bitmap.keys, bitmap.containers)
+    ])
+
+
+def cardinality(bitmap):
+    """Number of rows in a bitmap (a popcount over its containers)"""
+    return sum(_cardinality(container) for container in bitmap.containers)
+
+
+def bitmap_and(first, *others):
+    """Rows in every bitmap"""
+    result = first
+    for other in others:
+        _, left, right = np.intersect1d(result.keys, other.keys, assume_unique=True, return_indices=True)
+        keys, containers = [], []
+        for i, j in zip(left, right):
+            container = _and(result.containers[i], other.containers[j])
+            if container is not None:
+                keys.append(result.keys[i])
+                containers.append(container)
+        result = Bitmap(first.size, np.array(keys, dtype=np.int64), containers)
+    return result
+
+
+def bitmap_or(first, *others):
+    """Rows in any bitmap"""
+    chunks = {}
+    for bitmap in (first,) + others:
+        for key, container in zip(bitmap.keys, bitmap.containers):
+            chunks.setdefault(int(key), []).append(container)
+    keys = sorted(chunks)
+    return Bitmap(first.size, np.array(keys, dtype=np.int64), [_or(chunks[key]) for key in keys])
+
+
+def column_bitmaps(values):
+    """{value: Bitmap} for every value of a column that some row has, in category (or sorted) order"""
+    values = pd.Categorical(values)
+    codes = np.asarray(values.codes).astype(np.int64)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(values.categories) + 1))
+    return {
+        value: from_rows(order[bounds[code]:bounds[code + 1]], len(codes))
+        for code, value in enumerate(values.categories)
+        if bounds[code + 1] > bounds[code]
+    }
+
+
+def build_bitmap_index(columns):
+    """Bitmap index over a {column: values} mapping of equal-length columns"""
+    size = len(next(iter(columns.values())))
+    return BitmapIndex(size, {column: column_bitmaps(values) for column, values in columns.items()})
+
+
+def select(index, where):
+    """
+    Bitmap of the rows matching `where`, or None for every row.
+
+    `where` maps column -> value or list of values (or is a sequence of such
+    pairs): values are ORed within a column and columns are ANDed together.
+    """
+    items = where.items() if isinstance(where, dict) else where
+    selected = None
+    for column, values in items or ():
+        values = [values] if isinstance(values, (str, bool)) else list(values)
+        bitmaps = [index.bitmaps[column][v] for v in values if v in index.bitmaps[column]]
+        matched = bitmap_or(*bitmaps) if bitmaps else Bitmap(index.size, np.zeros(0, dtype=np.int64), [])
+        selected = matched if selected is None else bitmap_and(selected, matched)
+    return selected
+
+
+def value_counts(index, column, where=None):
+    """Rows matching `where` per value of `column` (values with no rows included), as a Series"""
+    selected = select(index, where)
+    return pd.Series({
+        value: cardinality(bitmap if selected is None else bitmap_and(bitmap, selected))
+        for value, bitmap in index.bitmaps[column].items()
+    }, dtype=np.int64)
+
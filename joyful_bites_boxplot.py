@@ -0,0 +1,93 @@
+"""
+JOYFUL BITES BOX PLOT STATISTICS
+Server-side box plot statistics, so box plots don't ship raw values.
+
+A `go.Box` given raw `y` values serializes every value into the page and
+computes the quartiles in the browser. Instead the statistics plotly would
+compute are computed here (same 'linear' quartile method, whiskers at the
+most extreme values inside the 1.5 x IQR fences, population sd) and passed
+as precomputed box inputs; outliers are drawn from a capped, evenly spaced
+sample that always includes the extremes. Without customer rows (streaming
+mode) the same statistics are approximated from a quantile sketch.
+"""
+
+import numpy as np
+import pandas as pd
+
+from joyful_bites_sketch import count, mean, quantile
+
+MAX_OUTLIERS = 200
+
+BOX_STAT_COLUMNS = ['n', 'q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean', 'sd']
+
+
+def box_stats(values, max_outliers=MAX_OUTLIERS):
+    """Box statistics of one sample (missing values skipped) plus a capped outlier sample"""
+    values = np.asarray(values, dtype=np.float64)
+    values = np.sort(values[~np.isnan(values)])
+    if not len(values):
+        return dict.fromkeys(BOX_STAT_COLUMNS, np.nan) | {'n': 0, 'outliers': np.array([])}
+
+    # plotly.js 'linear' quartiles interpolate at p * n - 0.5 (numpy's 'hazen')
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75], method='hazen')
+    spread = 1.5 * (q3 - q1)
+    inside = values[(values >= q1 - spread) & (values <= q3 + spread)]
+    lowerfence, upperfence = inside[0], inside[-1]
+
+    outliers = values[(values < lowerfence) | (values > upperfence)]
+    if len(outliers) > max_outliers:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype(int)]
+
+    return {
+        'n': len(values),
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': lowerfence,
+        'upperfence': upperfence,
+        'mean': values.mean(),
+        'sd': values.std(),
+        'outliers': outliers,
+    }
+
+
+def segment_box_stats(views, column, max_outliers=MAX_OUTLIERS):
+    """Box statistics of `column` for each per-segment frame in `views`"""
+    return pd.DataFrame.from_dict(
+        {segment: box_stats(view[column].to_numpy(), max_outliers) for segment, view in views.items()},
+        orient='index',
+    )
+
+
+def digest_box_stats(digest, sd, max_outliers=MAX_OUTLIERS):
+    """
+    Approximate box statistics from a quantile sketch (joyful_bites_sketch).
+
+    Quartiles come from the digest; whiskers and outliers use its centroids,
+    which hold single values in the tails. `sd` is supplied by the caller
+    (e.g. from running moments) since a digest doesn't carry it.
+    """
+    if not len(digest.weights):
+        return dict.fromkeys(BOX_STAT_COLUMNS, np.nan) | {'n': 0, 'outliers': np.array([])}
+
+    q1, median, q3 = quantile(digest, [0.25, 0.5, 0.75])
+    spread = 1.5 * (q3 - q1)
+    points = np.unique(np.concatenate([[digest.min], digest.means, [digest.max]]))
+    inside = points[(points >= q1 - spread) & (points <= q3 + spread)]
+    lowerfence, upperfence = inside.min(), inside.max()
+
+    outliers = points[(points < lowerfence) | (points > upperfence)]
+    if len(outliers) > max_outliers:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype(int)]
+
+    return {
+        'n': count(digest),
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': lowerfence,
+        'upperfence': upperfence,
+        'mean': mean(digest),
+        'sd': sd,
+        'outliers': outliers,
+    }
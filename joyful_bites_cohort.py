@@ -0,0 +1,114 @@
+"""
+JOYFUL BITES COHORTS
+Registration-month cohort retention and revenue matrices.
+
+Customers are grouped into cohorts by registration month. A customer counts
+as active from registration (month offset 0) through the month of their last
+order, capped at their tenure. Their total spend is spread evenly over those
+active months.
+
+Each customer is encoded as one (segment, cohort, last active offset)
+integer. A single `bincount` of those codes, and a second one weighted by
+monthly spend, gives the number of customers and their spend per
+combination. A reverse cumulative sum along the offsets then turns "last
+active at offset k" into "still active at offset k". The work is one pass
+over the customers with no Python loop over rows or cohorts, and the result
+is a small segment x cohort x offset array. The SQL backend runs the same
+grouping as a GROUP BY and passes the group counts to `cohorts_from_groups`.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+COHORT_COLUMNS = ['segment', 'registration_date', 'last_order_date', 'tenure_months', 'total_spent']
+
+# months: cohort labels ('YYYY-MM'); segments: segment names;
+# active/revenue: [segment, cohort, offset] customers still active / their spend in that month;
+# horizon: last observable offset of each cohort (offsets after it are still in the future)
+Cohorts = namedtuple('Cohorts', ['months', 'segments', 'active', 'revenue', 'horizon'])
+
+
+def build_cohorts(df):
+    """Cohort matrices of a frame with COHORT_COLUMNS"""
+    segments = df['segment'].cat
+    registered = np.asarray(df['registration_date'], dtype='datetime64[M]')
+    last_order = np.asarray(df['last_order_date'], dtype='datetime64[M]')
+    valid = ~np.isnat(registered) & (np.asarray(segments.codes) >= 0)
+
+    registered_month = registered.astype(np.int64)[valid]
+    ordered = ~np.isnat(last_order[valid])
+    last_month = np.where(ordered, last_order[valid].astype(np.int64), registered_month)
+
+    tenure = np.asarray(df['tenure_months'], dtype=np.int64)[valid]
+    last_offset = np.clip(last_month - registered_month, 0, None)
+    last_offset = np.minimum(last_offset, np.maximum(tenure, 0))
+
+    monthly_spend = np.asarray(df['total_spent'], dtype=np.float64)[valid] / (last_offset + 1)
+
+    return cohorts_from_groups(
+        list(segments.categories), np.asarray(segments.codes)[valid], registered_month, last_offset,
+        None, monthly_spend, int(last_month.max()) if len(last_month) else None,
+    )
+
+
+def cohorts_from_groups(segments, codes, registered_month, last_offset, customers, spend, last_month):
+    """
+    Cohort matrices from (segment code, registration month, last active offset) groups.
+
+    Months are counted from 1970-01. `customers` is the number of customers in
+    each group (None when every group is one customer) and `spend` their
+    monthly spend; `last_month` is the latest month with an order.
+    """
+    # Cohorts are months since the first registration month (no sort needed); empty ones are dropped at the end
+    first = int(registered_month.min()) if len(registered_month) else 0
+    cohort = registered_month - first
+    n_cohorts = int(cohort.max()) + 1 if len(cohort) else 0
+    as_of = max(last_month, first + n_cohorts - 1) if len(cohort) else first
+    n_offsets = as_of - first + 1
+
+    shape = (len(segments), n_cohorts, n_offsets)
+    code = np.ravel_multi_index((codes, cohort, last_offset), shape)
+    size = int(np.prod(shape))
+    last_active = np.bincount(code, weights=customers, minlength=size).astype(np.int64).reshape(shape)
+    last_spend = np.bincount(code, weights=spend, minlength=size).reshape(shape)
+
+    # Active at offset k = last active at k or later
+    active = np.flip(np.cumsum(np.flip(last_active, axis=2), axis=2), axis=2)
+    revenue = np.flip(np.cumsum(np.flip(last_spend, axis=2), axis=2), axis=2)
+
+    observed = np.flatnonzero(active[:, :, 0].sum(axis=0))
+    months = first + observed
+    labels = [str(month) for month in months.astype('datetime64[M]')]
+    return Cohorts(labels, list(segments), active[:, observed], revenue[:, observed], as_of - months)
+
+
+def _select(cohorts, values, segment):
+    """Values summed over segments (or one segment's), with unobservable cells masked"""
+    if segment is None:
+        values = values.sum(axis=0)
+    else:
+        values = values[cohorts.segments.index(segment)]
+    values = values.astype(np.float64)
+    values[np.arange(values.shape[1])[None, :] > cohorts.horizon[:, None]] = np.nan
+    return values
+
+
+def cohort_sizes(cohorts, segment=None):
+    """Customers registered in each cohort month, as a Series"""
+    active = cohorts.active.sum(axis=0) if segment is None else cohorts.active[cohorts.segments.index(segment)]
+    return pd.Series(active[:, 0], index=cohorts.months)
+
+
+def retention_matrix(cohorts, segment=None):
+    """Share of each cohort still active k months after registration (cohort x k frame; NaN not yet observable)"""
+    active = _select(cohorts, cohorts.active, segment)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        retention = active / active[:, :1]
+    return pd.DataFrame(retention, index=cohorts.months)
+
+
+def revenue_matrix(cohorts, segment=None):
+    """Spend of each cohort's active customers k months after registration (cohort x k frame; NaN not yet observable)"""
+    return pd.DataFrame(_select(cohorts, cohorts.revenue, segment), index=cohorts.months)
@@ -0,0 +1,181 @@
+"""
+JOYFUL BITES SEGMENT CUBE
+Materialized aggregate cube over the customer table.
+
+The cube holds one row per observed combination of the dimension columns
+(segment x channel x order time x city x payment x age band x occupation) with
+the customer count, the sum and sum of squares of every numeric measure, and
+the number of customers with each flag set. Every dashboard aggregate (counts,
+totals, means, standard deviations) is a roll-up of this small table, so page
+renders no longer scan the customer rows.
+
+All cube columns are additive: cubes built from separate chunks or partitions
+can be combined with `combine_cubes()` and a customer's contribution can be
+removed by subtracting it.
+"""
+
+import numpy as np
+import pandas as pd
+
+AGE_BINS = [0, 20, 25, 30, 35, 40, 45, 100]
+AGE_LABELS = ['16-20', '21-25', '26-30', '31-35', '36-40', '41-45', '46+']
+
+CUBE_DIMENSIONS = [
+    'segment',
+    'preferred_channel',
+    'primary_order_time',
+    'city',
+    'preferred_payment',
+    'age_band',
+    'occupation',
+]
+
+CUBE_MEASURES = [
+    'total_spent',
+    'total_orders',
+    'avg_order_value',
+    'visit_frequency_month',
+    'lifetime_value',
+    'party_size_avg',
+    'tenure_months',
+    'promo_engagement_rate',
+]
+
+CUBE_FLAGS = ['uses_promos', 'loyalty_enrolled', 'loyalty_active']
+
+# Customer columns the cube is computed from (age feeds the age_band dimension)
+CUBE_INPUT_COLUMNS = (
+    [dim for dim in CUBE_DIMENSIONS if dim != 'age_band']
+    + ['age']
+    + CUBE_MEASURES
+    + CUBE_FLAGS
+)
+
+CUBE_VALUE_COLUMNS = (
+    ['count']
+    + [f'{m}_sum' for m in CUBE_MEASURES]
+    + [f'{m}_sumsq' for m in CUBE_MEASURES]
+    + [f'{f}_count' for f in CUBE_FLAGS]
+)
+
+
+def age_bands(age):
+    """Bucket ages into the dashboard's age bands (categorical)"""
+    return pd.cut(age, bins=AGE_BINS, labels=AGE_LABELS)
+
+
+def _aggregate(keys, values):
+    """
+    Sum value columns per observed combination of the key columns.
+
+    `keys` maps dimension -> Series; `values` maps value column -> zero-argument
+    callable returning the per-row array, so only one full-length value array is
+    alive at a time. Rows with a missing key (e.g. an age outside every band)
+    are dropped, as groupby would.
+    """
+    dtypes = [keys[dim].astype('category').dtype for dim in CUBE_DIMENSIONS]
+    codes = [np.asarray(keys[dim].astype(dtype).cat.codes, dtype=np.int64)
+             for dim, dtype in zip(CUBE_DIMENSIONS, dtypes)]
+    sizes = [len(dtype.categories) for dtype in dtypes]
+
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+    all_valid = bool(valid.all())
+    if not all_valid:
+        codes = [c[valid] for c in codes]
+
+    # One int64 key per dimension combination, then a bincount per value column
+    key = np.ravel_multi_index(codes, sizes) if codes[0].size else np.zeros(0, dtype=np.int64)
+    inverse, cells = pd.factorize(key, sort=True)
+    n_cells = len(cells)
+
+    columns = {}
+    for dtype, name, cell_codes in zip(dtypes, CUBE_DIMENSIONS, np.unravel_index(cells, sizes)):
+        columns[name] = pd.Categorical.from_codes(cell_codes, dtype=dtype)
+    for col in CUBE_VALUE_COLUMNS:
+        column = values[col]()
+        if not all_valid:
+            column = column[valid]
+        summed = np.bincount(inverse, weights=column, minlength=n_cells)
+        columns[col] = summed.astype(np.int64) if column.dtype.kind in 'iub' else summed
+
+    cube = pd.DataFrame(columns)
+    return cube[cube['count'] != 0].reset_index(drop=True)
+
+
+def _measure(df, col, power=1):
+    """Lazy float64 accessor for a measure column (or its square)"""
+    return lambda: df[col].to_numpy(dtype=np.float64) ** power
+
+
+def build_cube(df):
+    """Build the aggregate cube for a customer frame"""
+    keys = {dim: df[dim] for dim in CUBE_DIMENSIONS if dim != 'age_band'}
+    keys['age_band'] = age_bands(df['age'])
+
+    values = {'count': lambda: np.ones(len(df), dtype=np.int64)}
+    for m in CUBE_MEASURES:
+        values[f'{m}_sum'] = _measure(df, m)
+        values[f'{m}_sumsq'] = _measure(df, m, power=2)
+    for f in CUBE_FLAGS:
+        values[f'{f}_count'] = (lambda f=f: df[f].to_numpy(dtype=np.int64))
+    return _aggregate(keys, values)
+
+
+def combine_cubes(*cubes, sign=None):
+    """
+    Add cubes together cell by cell.
+
+    `sign` optionally gives +1/-1 per cube, so `combine_cubes(cube, old, new,
+    sign=[1, -1, 1])` swaps a set of customers' old contributions for new ones.
+    """
+    if sign is not None:
+        cubes = [
+            cube if s > 0 else cube.assign(**{col: -cube[col] for col in CUBE_VALUE_COLUMNS})
+            for cube, s in zip(cubes, sign)
+        ]
+    cells = pd.concat(cubes, ignore_index=True)
+    return _aggregate(
+        {dim: cells[dim] for dim in CUBE_DIMENSIONS},
+        {col: (lambda col=col: cells[col].to_numpy()) for col in CUBE_VALUE_COLUMNS},
+    )
+
+
+def rollup(cube, by=None, where=None):
+    """
+    Roll the cube up to the `by` dimension(s), optionally filtered first.
+
+    `where` maps dimension -> value or list of values. With no `by`, returns a
+    single Series of grand totals; otherwise a frame indexed by `by` that only
+    contains observed combinations.
+    """
+    cells = cube
+    if where:
+        mask = np.ones(len(cube), dtype=bool)
+        for dim, value in where.items():
+            values = [value] if isinstance(value, str) else list(value)
+            mask &= cube[dim].isin(values).to_numpy()
+        cells = cube[mask]
+
+    values = cells[CUBE_VALUE_COLUMNS]
+    if not by:
+        return values.sum()
+    by = [by] if isinstance(by, str) else list(by)
+    keys = [cells[dim] for dim in by]
+    return values.groupby(keys[0] if len(keys) == 1 else keys, observed=True).sum()
+
+
+def mean(agg, measure):
+    """Mean of a measure from rolled-up sums"""
+    return agg[f'{measure}_sum'] / agg['count']
+
+
+def std(agg, measure):
+    """Sample standard deviation of a measure from rolled-up sums of squares"""
+    n = agg['count']
+    variance = (agg[f'{measure}_sumsq'] - agg[f'{measure}_sum'] ** 2 / n) / (n - 1)
+    return np.sqrt(np.maximum(variance, 0))
+
+
+def share(agg, flag):
+    """Fraction of customers with a flag set"""
+    return agg[f'{flag}_count'] / agg['count']
@@ -12,9 +12,52 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import json
+import os
+import uuid
 from datetime import datetime, timedelta
 
+from joyful_bites_bitmap import value_counts
+from joyful_bites_boxplot import digest_box_stats, segment_box_stats
+from joyful_bites_cohort import COHORT_COLUMNS, build_cohorts, cohort_sizes, retention_matrix, revenue_matrix
+from joyful_bites_cube import AGE_LABELS, CUBE_INPUT_COLUMNS, build_cube, mean, rollup
+from joyful_bites_dataset import (
+    PartitionedDataset, open_dataset, partitioned_cube, partitioned_digests, partitioned_regression_stats,
+    read_partitions,
+)
+from joyful_bites_delta import refresh_state
+from joyful_bites_explorer import (
+    LOOKUP_COLUMNS, PAGE_SIZE, build_lookup_index, lookup, page_count, page_rows, sorted_rows,
+)
+from joyful_bites_figure_cache import cached_figure, figure_cache_stats
+from joyful_bites_filters import (
+    FilteredDataset, build_filter_index, canonical_filters, filter_cache_stats, filter_dataset, filter_values,
+    filtered_columns, filtered_result, row_mask,
+)
+from joyful_bites_mapped import load_mapped, parse_customer_csv
+from joyful_bites_menu_index import build_menu_index, top_items
+from joyful_bites_partition import segment_bounds, segment_views, sort_by_segment
+from joyful_bites_regression import fit_lines, regression_stats, trendline_points
+from joyful_bites_scatter import render_mode, sample_points
+from joyful_bites_schema import PII_COLUMNS, read_customers
+from joyful_bites_sketch import SKETCH_MEASURES, quantile, segment_digests
+from joyful_bites_snapshot import load_snapshot, source_version
+from joyful_bites_sql import (
+    HAS_DUCKDB, SqlDataset, columnar_source, query_box_stats, query_cohort_groups, query_cube, query_digests,
+    query_regression_stats, query_scatter_points, query_top_items,
+)
+from joyful_bites_store import shared, store_stats
+from joyful_bites_streaming import (
+    StreamingDataset, stream_aggregates, streaming_population_sd, streaming_top_items,
+)
+from joyful_bites_timing import (
+    TIMING_ENABLED, cancel_run, finish_run, latency_summary, recent_runs, run_active, span, start_run, timed,
+)
+
+# Every session is handed the same shared DataFrames (joyful_bites_store), so a
+# session's edits must land in its own copy: copy-on-write, the default from pandas 3
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
 # Page configuration
 st.set_page_config(
     page_title="Joyful Bites Customer Intelligence",
@@ -82,19 +125,324 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Data loading function
+# A single CSV export, or a directory partitioned by registration month and segment
+DATA_FILE = os.environ.get('JOYFUL_BITES_DATA', 'joyful_bites_customers_5000.csv')
+
+# 'pandas', 'mapped', 'duckdb', 'streaming', or 'auto' (pandas below SQL_BACKEND_MIN_BYTES,
+# above it DuckDB when installed, otherwise streaming aggregates). 'mapped' is
+# pandas with the frame mapped from an Arrow file shared by every process on
+# the host (joyful_bites_mapped)
+DATA_BACKEND = os.environ.get('JOYFUL_BITES_BACKEND', 'auto')
+SQL_BACKEND_MIN_BYTES = 512 * 1024 * 1024
+
+# (x, y) scatter plots with trendlines; their sums are patched along with the cube when the export changes
+TRENDLINE_PAIRS = [('visit_frequency_month', 'lifetime_value'), ('tenure_months', 'total_spent')]
+
+def _load_dataset(path, data_version):
+    """Load a specific version of the dataset, shared by every session (the version is part of the store key)"""
+    def build():
+        df = load_snapshot(path, parse_customer_csv)
+        df.attrs['data_version'] = data_version
+        refresh_state(path, data_version, df, TRENDLINE_PAIRS, previous=('dataset', path))
+        return df
+    return shared(('dataset', path), data_version, build, pinned=True)
+
+def _load_mapped_dataset(path, data_version):
+    """Load a specific version of the dataset mapped from the Arrow file shared by every process on the host"""
+    def build():
+        df = load_mapped(path)
+        df.attrs['data_version'] = data_version
+        refresh_state(path, data_version, df, TRENDLINE_PAIRS, previous=('mapped_dataset', path))
+        return df
+    return shared(('mapped_dataset', path), data_version, build, pinned=True)
+
+def load_menu_index(_df, data_version):
+    """Customer x menu-item index for the loaded dataset, built once per data version and shared by every session"""
+    return shared(('menu_index', DATA_FILE), data_version, lambda: build_menu_index(_df['top_menu_items']))
+
+def load_filter_index(_df, data_version):
+    """Bitmap index of the categorical and boolean attributes, built once per data version and shared by every session"""
+    return shared(('filter_index', DATA_FILE), data_version, lambda: build_filter_index(_df))
+
+def load_customer_pii(path, data_version):
+    """Names, emails and phones, in the same (segment-sorted) row order as the analytics frame (shared)"""
+    return shared(
+        ('customer_pii', path), data_version,
+        lambda: sort_by_segment(read_customers(path, ['segment'] + PII_COLUMNS))[PII_COLUMNS]
+    )
+
+def load_lookup_index(_df, data_version, column):
+    """Sorted prefix index of customer ids, emails or phones, built on first search (shared)"""
+    def build():
+        values = _df[column] if column in _df else load_customer_pii(DATA_FILE, data_version)[column]
+        return build_lookup_index(column, values)
+    return shared(('lookup_index', DATA_FILE, column), data_version, build)
+
+def load_explorer_order(_df, data_version, column, descending):
+    """Every row ordered by a column, computed once per data version (shared)"""
+    return shared(
+        ('explorer_order', DATA_FILE, column, descending), data_version,
+        lambda: sorted_rows(_df[column], descending=descending)
+    )
+
+def load_refresh_state(_df, data_version):
+    """Cube and trendline sums of the loaded dataset, patched from the previous version when only a few customers changed (shared)"""
+    return refresh_state(DATA_FILE, data_version, _df, TRENDLINE_PAIRS)
+
+def load_cube(_df, data_version):
+    """Segment aggregate cube for the loaded dataset (shared)"""
+    return load_refresh_state(_df, data_version).cube
+
+@st.cache_data
+def load_cohorts(_df, data_version):
+    """Cohort retention and revenue matrices, computed once per data version"""
+    return build_cohorts(_df[COHORT_COLUMNS])
+
+@st.cache_data
+def load_sketches(_df, data_version):
+    """Per-segment quantile sketches of the distribution measures, built once per data version"""
+    return segment_digests(_df)
+
+@st.cache_data
+def load_sql_cube(parquet_path, data_version):
+    """Segment aggregate cube computed by the SQL backend"""
+    return query_cube(parquet_path)
+
+@st.cache_data
+def load_sql_top_items(parquet_path, data_version, segment, n):
+    """Top menu items for a segment computed by the SQL backend"""
+    return query_top_items(parquet_path, segment, n)
+
+@st.cache_data
+def load_sql_sketches(parquet_path, data_version):
+    """Per-segment quantile sketches built by the SQL backend"""
+    return query_digests(parquet_path)
+
+@st.cache_data(max_entries=64)
+def load_sql_box_stats(parquet_path, data_version, column):
+    """Per-segment box plot statistics of a column computed by the SQL backend"""
+    return query_box_stats(parquet_path, column)
+
+@st.cache_data(max_entries=64)
+def load_sql_trendlines(parquet_path, data_version, x, y):
+    """Per-segment least-squares fits of y on x from sums computed by the SQL backend"""
+    return fit_lines(query_regression_stats(parquet_path, x, y))
+
+@st.cache_data(max_entries=64)
+def load_sql_scatter_points(parquet_path, data_version, x, y):
+    """Points to draw for a scatter of y on x, sampled by the SQL backend when there are too many"""
+    return query_scatter_points(parquet_path, x, y)
+
+@st.cache_data
+def load_sql_cohorts(parquet_path, data_version):
+    """Cohort retention and revenue matrices from customer groups counted by the SQL backend"""
+    return query_cohort_groups(parquet_path)
+
+def load_streaming_aggregates(path, data_version):
+    """Aggregates built by streaming the export in bounded batches (shared)"""
+    return shared(
+        ('streaming_aggregates', path), data_version,
+        lambda: stream_aggregates(path, pairs=TRENDLINE_PAIRS), pinned=True
+    )
+
 @st.cache_data
+def load_partitioned_cube(_dataset, data_version):
+    """Segment aggregate cube combined from per-partition cubes"""
+    return partitioned_cube(_dataset)
+
+@st.cache_data
+def load_partitioned_sketches(_dataset, data_version):
+    """Per-segment quantile sketches merged from per-partition sketches"""
+    return partitioned_digests(_dataset)
+
+@st.cache_data
+def load_partitioned_top_items(_dataset, data_version, segment, n):
+    """Top menu items for a segment, reading only that segment's partitions"""
+    rows = read_partitions(_dataset.partitions, segments=[segment], columns=['segment', 'top_menu_items'])
+    return top_items(build_menu_index(rows['top_menu_items']), n=n)
+
+@st.cache_data(max_entries=64)
+def load_partitioned_trendlines(_dataset, data_version, x, y):
+    """Per-segment least-squares fits of y on x from per-partition sums"""
+    return fit_lines(partitioned_regression_stats(_dataset, x, y))
+
+def load_partitioned_columns(_dataset, data_version, columns):
+    """Just the listed columns, read from every partition in parallel (shared)"""
+    return shared(
+        ('partitioned_columns', _dataset.root, columns), data_version,
+        lambda: read_partitions(_dataset.partitions, columns=list(columns))
+    )
+
+@st.cache_data(max_entries=64)
+def load_trendlines(_points, data_version, x, y):
+    """Per-segment least-squares fits of y on x, computed once per data version"""
+    return fit_lines(regression_stats(_points, x, y))
+
+@st.cache_data(max_entries=64)
+def load_scatter_points(_points, data_version, x, y):
+    """Points to draw for a scatter of y on x, downsampled once per data version when there are too many"""
+    return sample_points(_points[['segment', x, y]], x, y)
+
+@st.cache_data(max_entries=64)
+def load_box_stats(_views, data_version, column):
+    """Per-segment box plot statistics of a column, computed once per data version"""
+    return segment_box_stats(_views, column)
+
+@st.cache_data
+def load_data_summary(_cube, data_version):
+    """Whole-base totals for the sidebar, computed once per data version"""
+    return rollup(_cube)
+
+def choose_backend(path):
+    """Which backend serves the export: 'pandas', 'mapped', 'duckdb', 'streaming' or 'partitioned'"""
+    if os.path.isdir(path):
+        return 'partitioned'
+    if DATA_BACKEND != 'auto':
+        return DATA_BACKEND
+    if os.path.getsize(path) < SQL_BACKEND_MIN_BYTES:
+        return 'pandas'
+    return 'duckdb' if HAS_DUCKDB else 'streaming'
+
+# Data loading function
+@timed('load_data')
 def load_data():
-    """Load customer dataset"""
+    """Load customer dataset (a DataFrame, or a SqlDataset/StreamingDataset/PartitionedDataset handle for the other backends)"""
     try:
-        df = pd.read_csv('joyful_bites_customers_5000.csv')
-        # Parse JSON fields
-        df['top_menu_items_list'] = df['top_menu_items'].apply(lambda x: json.loads(x) if pd.notna(x) else [])
-        df['num_menu_items'] = df['top_menu_items_list'].apply(len)
-        return df
+        backend = choose_backend(DATA_FILE)
+        if backend == 'partitioned':
+            return open_dataset(DATA_FILE)
+        version = source_version(DATA_FILE)
+        if backend == 'duckdb':
+            return SqlDataset(columnar_source(DATA_FILE, version), version)
+        if backend == 'streaming':
+            return StreamingDataset(load_streaming_aggregates(DATA_FILE, version), version)
+        if backend == 'mapped':
+            return _load_mapped_dataset(DATA_FILE, version)
+        return _load_dataset(DATA_FILE, version)
     except FileNotFoundError:
-        st.error("Dataset not found. Please ensure 'joyful_bites_customers_5000.csv' is in the same directory.")
+        st.error(f"Dataset not found. Please ensure '{DATA_FILE}' is in the same directory.")
+        return None
+    except ValueError as e:
+        st.error(f"Could not read '{DATA_FILE}': {e}")
+        return None
+
+def data_version(df):
+    """Version of the loaded data, whichever backend loaded it"""
+    return df.attrs['data_version'] if isinstance(df, pd.DataFrame) else df.data_version
+
+@timed('aggregate.cube')
+def get_cube(df):
+    """Aggregate cube from whichever backend loaded the data"""
+    if isinstance(df, SqlDataset):
+        return load_sql_cube(df.path, df.data_version)
+    if isinstance(df, StreamingDataset):
+        return df.aggregates['cube']
+    if isinstance(df, PartitionedDataset):
+        return load_partitioned_cube(df, df.data_version)
+    if isinstance(df, FilteredDataset):
+        return filtered_result(df, 'cube', lambda: build_cube(filtered_columns(df, CUBE_INPUT_COLUMNS)))
+    return load_cube(df, df.attrs['data_version'])
+
+@timed('aggregate.sketches')
+def get_sketches(df):
+    """{measure: {segment: Digest}} quantile sketches from whichever backend loaded the data"""
+    if isinstance(df, SqlDataset):
+        return load_sql_sketches(df.path, df.data_version)
+    if isinstance(df, StreamingDataset):
+        return df.aggregates['sketches']
+    if isinstance(df, PartitionedDataset):
+        return load_partitioned_sketches(df, df.data_version)
+    if isinstance(df, FilteredDataset):
+        return filtered_result(df, 'sketches', lambda: segment_digests(filtered_columns(df, ['segment'] + SKETCH_MEASURES)))
+    return load_sketches(df, df.attrs['data_version'])
+
+@timed('aggregate.box_stats')
+def get_box_stats(df, column):
+    """Per-segment box plot statistics: exact from customer rows, approximated from sketches when streaming"""
+    if isinstance(df, StreamingDataset):
+        sd = streaming_population_sd(df.aggregates, column)
+        return pd.DataFrame.from_dict(
+            {segment: digest_box_stats(d, sd[segment]) for segment, d in get_sketches(df)[column].items()},
+            orient='index',
+        )
+    if isinstance(df, SqlDataset):
+        return load_sql_box_stats(df.path, df.data_version, column)
+    if isinstance(df, FilteredDataset):
+        return filtered_result(
+            df, ('box_stats', column), lambda: segment_box_stats(get_segment_views(df, [column]), column)
+        )
+    return load_box_stats(get_segment_views(df, [column]), data_version(df), column)
+
+@timed('aggregate.top_items')
+def get_top_items(df, segment, n=10):
+    """Most-listed menu items for a segment"""
+    if isinstance(df, SqlDataset):
+        return load_sql_top_items(df.path, df.data_version, segment, n)
+    if isinstance(df, StreamingDataset):
+        return streaming_top_items(df.aggregates, segment, n)
+    if isinstance(df, PartitionedDataset):
+        return load_partitioned_top_items(df, df.data_version, segment, n)
+    if isinstance(df, FilteredDataset):
+        menu_index = load_menu_index(df.frame, data_version(df.frame))
+        return filtered_result(
+            df, ('top_items', segment, n),
+            lambda: top_items(menu_index, rows=row_mask(df, segment_bounds(df.frame, segment)), n=n)
+        )
+    menu_index = load_menu_index(df, df.attrs['data_version'])
+    return top_items(menu_index, rows=segment_bounds(df, segment), n=n)
+
+def has_customer_rows(df):
+    """Whether individual customers can be plotted (streamed aggregates keep no rows)"""
+    return not isinstance(df, StreamingDataset)
+
+@timed('aggregate.cohorts')
+def get_cohorts(df):
+    """Cohort matrices from whichever backend loaded the data (None when streaming, which keeps no customer rows)"""
+    if isinstance(df, StreamingDataset):
         return None
+    if isinstance(df, SqlDataset):
+        return load_sql_cohorts(df.path, df.data_version)
+    if isinstance(df, FilteredDataset):
+        return filtered_result(df, 'cohorts', lambda: build_cohorts(filtered_columns(df, COHORT_COLUMNS)))
+    return load_cohorts(get_columns(df, COHORT_COLUMNS), data_version(df))
+
+@timed('aggregate.scatter_points')
+def get_scatter_points(df, x, y):
+    """Points to draw for a scatter of y on x, and the number of customers they stand for"""
+    if isinstance(df, SqlDataset):
+        return load_sql_scatter_points(df.path, df.data_version, x, y)
+    if isinstance(df, StreamingDataset):
+        return pd.DataFrame({'segment': pd.Series(dtype='category'), x: [], y: []}), df.aggregates['rows']
+    points = get_columns(df, ['segment', x, y])
+    return load_scatter_points(points, data_version(df), x, y), len(points)
+
+@timed('aggregate.trendlines')
+def get_trendlines(df, x, y):
+    """Per-segment least-squares fits of y on x over every customer"""
+    if isinstance(df, SqlDataset):
+        return load_sql_trendlines(df.path, df.data_version, x, y)
+    if isinstance(df, StreamingDataset):
+        return fit_lines(df.aggregates['regressions'][(x, y)])
+    if isinstance(df, PartitionedDataset):
+        return load_partitioned_trendlines(df, df.data_version, x, y)
+    if isinstance(df, pd.DataFrame) and (x, y) in TRENDLINE_PAIRS:
+        return fit_lines(load_refresh_state(df, data_version(df)).regressions[(x, y)])
+    return load_trendlines(get_columns(df, ['segment', x, y]), data_version(df), x, y)
+
+@timed('load.columns')
+def get_columns(df, columns):
+    """Frame holding (at least) the listed columns, which must include segment, for charts that plot individual customers"""
+    if isinstance(df, PartitionedDataset):
+        return load_partitioned_columns(df, df.data_version, tuple(columns))
+    if isinstance(df, FilteredDataset):
+        return filtered_columns(df, columns)
+    return df
+
+def get_segment_views(df, columns):
+    """Per-segment frames holding (at least) the listed columns"""
+    if isinstance(df, (PartitionedDataset, FilteredDataset)):
+        return segment_views(get_columns(df, ['segment'] + list(columns)))
+    return segment_views(df)
 
 # Segment color mapping
 SEGMENT_COLORS = {
@@ -125,6 +473,24 @@ PERSONA_META = {
     }
 }
 
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+SKETCH_LABELS = {
+    'avg_order_value': 'Avg Order Value',
+    'lifetime_value': 'Lifetime Value',
+    'total_spent': 'Total Spent',
+    'promo_engagement_rate': 'Promo Engagement Rate'
+}
+
+def show_figure(chart_id, df, build, **params):
+    """Render a chart from the shared figure cache; `build()` only runs on a miss (None when it had nothing to draw)"""
+    with span(f"chart.{chart_id}"):
+        fig = cached_figure(chart_id, data_version(df), params, build)
+    if fig is not None:
+        with span(f"render.{chart_id}"):
+            st.plotly_chart(fig, use_container_width=True)
+    return fig
+
 def format_currency(value):
     """Format value as Philippine Peso"""
     return f"₱{value:,.2f}"
@@ -133,6 +499,52 @@ def format_number(value):
     """Format number with thousands separator"""
     return f"{value:,.0f}"
 
+def dimension_counts(cube, dimension, where=None):
+    """Customer counts per value of a cube dimension, largest first"""
+    counts = rollup(cube, by=dimension, where=where)['count']
+    return counts.sort_values(ascending=False, kind='stable')
+
+@st.cache_data(max_entries=64)
+def load_segment_stats(_df, data_version):
+    """Per-segment comparison metrics, computed once per data version"""
+    by_segment = rollup(get_cube(_df), by='segment')
+    return pd.DataFrame({
+        'Customer Count': by_segment['count'],
+        'Avg Order Value': mean(by_segment, 'avg_order_value'),
+        'Visit Frequency/Month': mean(by_segment, 'visit_frequency_month'),
+        'Lifetime Value': mean(by_segment, 'lifetime_value'),
+        'Avg Party Size': mean(by_segment, 'party_size_avg'),
+        'Total Orders': by_segment['total_orders_sum'],
+        'Total Revenue': by_segment['total_spent_sum'],
+        'Avg Tenure (Months)': mean(by_segment, 'tenure_months')
+    }).round(2)
+
+@st.cache_data(max_entries=64)
+def load_persona_summary(_df, data_version, persona_name):
+    """A persona's rolled-up totals and the customer count of the whole base, computed once per data version"""
+    cube = get_cube(_df)
+    return rollup(cube, where={'segment': persona_name}), rollup(cube)['count']
+
+@st.cache_data(max_entries=64)
+def load_segment_insights(_df, data_version):
+    """Figures quoted in the Key Insights boxes, computed once per data version"""
+    cube = get_cube(_df)
+    brenda = rollup(cube, where={'segment': 'Busy Brenda'})
+    brenda_times = dimension_counts(cube, 'primary_order_time', where={'segment': 'Busy Brenda'})
+    hiro = rollup(cube, where={'segment': 'Hungry Hiro'})
+    uro = rollup(cube, where={'segment': 'Urban Uro'})
+    return {
+        'brenda_weekend_pct': brenda_times[brenda_times.index.str.contains('Weekend')].sum() / brenda['count'] * 100,
+        'brenda_party_size': mean(brenda, 'party_size_avg'),
+        'hiro_promo_pct': hiro['uses_promos_count'] / hiro['count'] * 100,
+        'hiro_visit_frequency': mean(hiro, 'visit_frequency_month'),
+        'hiro_order_value': mean(hiro, 'avg_order_value'),
+        'uro_delivery_pct': rollup(cube, where={'segment': 'Urban Uro', 'preferred_channel': 'Delivery'})['count'] / uro['count'] * 100,
+        'uro_lifetime_value': mean(uro, 'lifetime_value'),
+        'uro_tenure': mean(uro, 'tenure_months'),
+    }
+
+@timed('page.segment_overview')
 def create_segment_overview(df):
     """Create segment overview visualizations"""
     
@@ -142,10 +554,13 @@ def create_segment_overview(df):
     # Top-level KPIs
     col1, col2, col3, col4 = st.columns(4)
     
-    total_customers = len(df)
-    total_revenue = df['total_spent'].sum()
-    total_orders = df['total_orders'].sum()
-    avg_ltv = df['lifetime_value'].mean()
+    cube = get_cube(df)
+    totals = rollup(cube)
+    
+    total_customers = totals['count']
+    total_revenue = totals['total_spent_sum']
+    total_orders = totals['total_orders_sum']
+    avg_ltv = mean(totals, 'lifetime_value')
     
     with col1:
         st.metric(
@@ -183,78 +598,60 @@ def create_segment_overview(df):
     with col1:
         st.subheader("📊 Segment Distribution")
         
-        segment_counts = df['segment'].value_counts()
-        
-        fig = go.Figure(data=[go.Pie(
-            labels=segment_counts.index,
-            values=segment_counts.values,
-            hole=0.4,
-            marker=dict(colors=[SEGMENT_COLORS[seg] for seg in segment_counts.index]),
-            textposition='inside',
-            textinfo='label+percent',
-            hovertemplate='<b>%{label}</b><br>Customers: %{value}<br>Percentage: %{percent}<extra></extra>'
-        )])
-        
-        fig.update_layout(
-            height=400,
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
-        )
+        def build():
+            segment_counts = dimension_counts(cube, 'segment')
+            
+            fig = go.Figure(data=[go.Pie(
+                labels=segment_counts.index,
+                values=segment_counts.values,
+                hole=0.4,
+                marker=dict(colors=[SEGMENT_COLORS[seg] for seg in segment_counts.index]),
+                textposition='inside',
+                textinfo='label+percent',
+                hovertemplate='<b>%{label}</b><br>Customers: %{value}<br>Percentage: %{percent}<extra></extra>'
+            )])
+            
+            fig.update_layout(
+                height=400,
+                showlegend=True,
+                legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('overview.segment_distribution', df, build)
     
     with col2:
         st.subheader("💰 Revenue Contribution by Segment")
         
-        segment_revenue = df.groupby('segment')['total_spent'].sum().sort_values(ascending=False)
-        
-        fig = go.Figure(data=[go.Bar(
-            x=segment_revenue.values,
-            y=segment_revenue.index,
-            orientation='h',
-            marker=dict(color=[SEGMENT_COLORS[seg] for seg in segment_revenue.index]),
-            text=[format_currency(val) for val in segment_revenue.values],
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>Revenue: ₱%{x:,.2f}<extra></extra>'
-        )])
-        
-        fig.update_layout(
-            height=400,
-            xaxis_title="Total Revenue (PHP)",
-            yaxis_title="",
-            showlegend=False
-        )
+        def build():
+            segment_revenue = rollup(cube, by='segment')['total_spent_sum'].sort_values(ascending=False)
+            
+            fig = go.Figure(data=[go.Bar(
+                x=segment_revenue.values,
+                y=segment_revenue.index,
+                orientation='h',
+                marker=dict(color=[SEGMENT_COLORS[seg] for seg in segment_revenue.index]),
+                text=[format_currency(val) for val in segment_revenue.values],
+                textposition='outside',
+                hovertemplate='<b>%{y}</b><br>Revenue: ₱%{x:,.2f}<extra></extra>'
+            )])
+            
+            fig.update_layout(
+                height=400,
+                xaxis_title="Total Revenue (PHP)",
+                yaxis_title="",
+                showlegend=False
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('overview.segment_revenue', df, build)
 
+@timed('page.segment_comparison')
 def create_segment_comparison(df):
     """Create detailed segment comparison"""
     
     st.subheader("📈 Segment Performance Comparison")
     
-    # Key metrics by segment
-    segment_stats = df.groupby('segment').agg({
-        'customer_id': 'count',
-        'avg_order_value': 'mean',
-        'visit_frequency_month': 'mean',
-        'lifetime_value': 'mean',
-        'party_size_avg': 'mean',
-        'total_orders': 'sum',
-        'total_spent': 'sum',
-        'tenure_months': 'mean'
-    }).round(2)
-    
-    segment_stats.columns = [
-        'Customer Count',
-        'Avg Order Value',
-        'Visit Frequency/Month',
-        'Lifetime Value',
-        'Avg Party Size',
-        'Total Orders',
-        'Total Revenue',
-        'Avg Tenure (Months)'
-    ]
-    
     # Create comparison metrics
     metrics = ['Avg Order Value', 'Visit Frequency/Month', 'Lifetime Value', 'Avg Party Size']
     
@@ -262,115 +659,127 @@ def create_segment_comparison(df):
     
     with col1:
         # Average Order Value comparison
-        fig = go.Figure()
-        
-        for segment in segment_stats.index:
-            fig.add_trace(go.Bar(
-                name=segment,
-                x=[segment],
-                y=[segment_stats.loc[segment, 'Avg Order Value']],
-                marker_color=SEGMENT_COLORS[segment],
-                text=[format_currency(segment_stats.loc[segment, 'Avg Order Value'])],
-                textposition='outside',
-                hovertemplate=f'<b>{segment}</b><br>₱%{{y:,.2f}}<extra></extra>'
-            ))
-        
-        fig.update_layout(
-            title="Average Order Value by Segment",
-            yaxis_title="PHP",
-            showlegend=False,
-            height=400,
-            margin=dict(l=50, r=50, t=80, b=50),
-            yaxis=dict(range=[0, max([segment_stats.loc[s, 'Avg Order Value'] for s in segment_stats.index]) * 1.15])
-        )
+        def build():
+            segment_stats = load_segment_stats(df, data_version(df))
+            fig = go.Figure()
+            
+            for segment in segment_stats.index:
+                fig.add_trace(go.Bar(
+                    name=segment,
+                    x=[segment],
+                    y=[segment_stats.loc[segment, 'Avg Order Value']],
+                    marker_color=SEGMENT_COLORS[segment],
+                    text=[format_currency(segment_stats.loc[segment, 'Avg Order Value'])],
+                    textposition='outside',
+                    hovertemplate=f'<b>{segment}</b><br>₱%{{y:,.2f}}<extra></extra>'
+                ))
+            
+            fig.update_layout(
+                title="Average Order Value by Segment",
+                yaxis_title="PHP",
+                showlegend=False,
+                height=400,
+                margin=dict(l=50, r=50, t=80, b=50),
+                yaxis=dict(range=[0, max([segment_stats.loc[s, 'Avg Order Value'] for s in segment_stats.index]) * 1.15])
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('comparison.avg_order_value', df, build)
     
     with col2:
         # Visit Frequency comparison
-        fig = go.Figure()
-        
-        for segment in segment_stats.index:
-            fig.add_trace(go.Bar(
-                name=segment,
-                x=[segment],
-                y=[segment_stats.loc[segment, 'Visit Frequency/Month']],
-                marker_color=SEGMENT_COLORS[segment],
-                text=[f"{segment_stats.loc[segment, 'Visit Frequency/Month']:.1f}x"],
-                textposition='outside',
-                hovertemplate=f'<b>{segment}</b><br>%{{y:.1f}} visits/month<extra></extra>'
-            ))
-        
-        fig.update_layout(
-            title="Visit Frequency by Segment",
-            yaxis_title="Visits per Month",
-            showlegend=False,
-            height=400,
-            margin=dict(l=50, r=50, t=80, b=50),
-            yaxis=dict(range=[0, max([segment_stats.loc[s, 'Visit Frequency/Month'] for s in segment_stats.index]) * 1.2])
-        )
+        def build():
+            segment_stats = load_segment_stats(df, data_version(df))
+            fig = go.Figure()
+            
+            for segment in segment_stats.index:
+                fig.add_trace(go.Bar(
+                    name=segment,
+                    x=[segment],
+                    y=[segment_stats.loc[segment, 'Visit Frequency/Month']],
+                    marker_color=SEGMENT_COLORS[segment],
+                    text=[f"{segment_stats.loc[segment, 'Visit Frequency/Month']:.1f}x"],
+                    textposition='outside',
+                    hovertemplate=f'<b>{segment}</b><br>%{{y:.1f}} visits/month<extra></extra>'
+                ))
+            
+            fig.update_layout(
+                title="Visit Frequency by Segment",
+                yaxis_title="Visits per Month",
+                showlegend=False,
+                height=400,
+                margin=dict(l=50, r=50, t=80, b=50),
+                yaxis=dict(range=[0, max([segment_stats.loc[s, 'Visit Frequency/Month'] for s in segment_stats.index]) * 1.2])
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('comparison.visit_frequency', df, build)
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Lifetime Value comparison
-        fig = go.Figure()
-        
-        for segment in segment_stats.index:
-            fig.add_trace(go.Bar(
-                name=segment,
-                x=[segment],
-                y=[segment_stats.loc[segment, 'Lifetime Value']],
-                marker_color=SEGMENT_COLORS[segment],
-                text=[format_currency(segment_stats.loc[segment, 'Lifetime Value'])],
-                textposition='outside',
-                hovertemplate=f'<b>{segment}</b><br>₱%{{y:,.2f}}<extra></extra>'
-            ))
-        
-        fig.update_layout(
-            title="Customer Lifetime Value by Segment",
-            yaxis_title="PHP",
-            showlegend=False,
-            height=400,
-            margin=dict(l=50, r=50, t=80, b=50),
-            yaxis=dict(range=[0, max([segment_stats.loc[s, 'Lifetime Value'] for s in segment_stats.index]) * 1.15])
-        )
+        def build():
+            segment_stats = load_segment_stats(df, data_version(df))
+            fig = go.Figure()
+            
+            for segment in segment_stats.index:
+                fig.add_trace(go.Bar(
+                    name=segment,
+                    x=[segment],
+                    y=[segment_stats.loc[segment, 'Lifetime Value']],
+                    marker_color=SEGMENT_COLORS[segment],
+                    text=[format_currency(segment_stats.loc[segment, 'Lifetime Value'])],
+                    textposition='outside',
+                    hovertemplate=f'<b>{segment}</b><br>₱%{{y:,.2f}}<extra></extra>'
+                ))
+            
+            fig.update_layout(
+                title="Customer Lifetime Value by Segment",
+                yaxis_title="PHP",
+                showlegend=False,
+                height=400,
+                margin=dict(l=50, r=50, t=80, b=50),
+                yaxis=dict(range=[0, max([segment_stats.loc[s, 'Lifetime Value'] for s in segment_stats.index]) * 1.15])
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('comparison.lifetime_value', df, build)
     
     with col2:
         # Party Size comparison
-        fig = go.Figure()
-        
-        for segment in segment_stats.index:
-            fig.add_trace(go.Bar(
-                name=segment,
-                x=[segment],
-                y=[segment_stats.loc[segment, 'Avg Party Size']],
-                marker_color=SEGMENT_COLORS[segment],
-                text=[f"{segment_stats.loc[segment, 'Avg Party Size']:.1f}"],
-                textposition='outside',
-                hovertemplate=f'<b>{segment}</b><br>%{{y:.1f}} people<extra></extra>'
-            ))
-        
-        fig.update_layout(
-            title="Average Party Size by Segment",
-            yaxis_title="People",
-            showlegend=False,
-            height=400,
-            margin=dict(l=50, r=50, t=80, b=50),
-            yaxis=dict(range=[0, max([segment_stats.loc[s, 'Avg Party Size'] for s in segment_stats.index]) * 1.2])
-        )
+        def build():
+            segment_stats = load_segment_stats(df, data_version(df))
+            fig = go.Figure()
+            
+            for segment in segment_stats.index:
+                fig.add_trace(go.Bar(
+                    name=segment,
+                    x=[segment],
+                    y=[segment_stats.loc[segment, 'Avg Party Size']],
+                    marker_color=SEGMENT_COLORS[segment],
+                    text=[f"{segment_stats.loc[segment, 'Avg Party Size']:.1f}"],
+                    textposition='outside',
+                    hovertemplate=f'<b>{segment}</b><br>%{{y:.1f}} people<extra></extra>'
+                ))
+            
+            fig.update_layout(
+                title="Average Party Size by Segment",
+                yaxis_title="People",
+                showlegend=False,
+                height=400,
+                margin=dict(l=50, r=50, t=80, b=50),
+                yaxis=dict(range=[0, max([segment_stats.loc[s, 'Avg Party Size'] for s in segment_stats.index]) * 1.2])
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('comparison.party_size', df, build)
     
     # Detailed comparison table
     st.subheader("📋 Detailed Metrics Table")
     
     # Format the table for display
-    display_stats = segment_stats.copy()
+    display_stats = load_segment_stats(df, data_version(df)).copy()
     display_stats['Customer Count'] = display_stats['Customer Count'].apply(lambda x: format_number(x))
     display_stats['Avg Order Value'] = display_stats['Avg Order Value'].apply(lambda x: format_currency(x))
     display_stats['Lifetime Value'] = display_stats['Lifetime Value'].apply(lambda x: format_currency(x))
@@ -379,10 +788,13 @@ def create_segment_comparison(df):
     
     st.dataframe(display_stats, use_container_width=True)
 
+@timed('page.persona_deep_dive')
 def create_persona_deep_dive(df, persona_name):
     """Create detailed persona analysis"""
     
-    persona_df = df[df['segment'] == persona_name]
+    in_persona = {'segment': persona_name}
+    persona, base_count = load_persona_summary(df, data_version(df), persona_name)
+    persona_count = persona['count']
     meta = PERSONA_META[persona_name]
     
     # Persona header
@@ -399,38 +811,42 @@ def create_persona_deep_dive(df, persona_name):
     </div>
     """, unsafe_allow_html=True)
     
+    if not persona_count:
+        st.info(f"No {persona_name} customers match the selected filters.")
+        return
+    
     # Key metrics
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
         st.metric(
             label="Customers",
-            value=format_number(len(persona_df)),
-            delta=f"{len(persona_df)/len(df)*100:.1f}% of base"
+            value=format_number(persona_count),
+            delta=f"{persona_count/base_count*100:.1f}% of base"
         )
     
     with col2:
         st.metric(
             label="Avg Order Value",
-            value=format_currency(persona_df['avg_order_value'].mean())
+            value=format_currency(mean(persona, 'avg_order_value'))
         )
     
     with col3:
         st.metric(
             label="Visit Frequency",
-            value=f"{persona_df['visit_frequency_month'].mean():.1f}x/mo"
+            value=f"{mean(persona, 'visit_frequency_month'):.1f}x/mo"
         )
     
     with col4:
         st.metric(
             label="Lifetime Value",
-            value=format_currency(persona_df['lifetime_value'].mean())
+            value=format_currency(mean(persona, 'lifetime_value'))
         )
     
     with col5:
         st.metric(
             label="Avg Party Size",
-            value=f"{persona_df['party_size_avg'].mean():.1f}"
+            value=f"{mean(persona, 'party_size_avg'):.1f}"
         )
     
     st.markdown("---")
@@ -441,127 +857,136 @@ def create_persona_deep_dive(df, persona_name):
     with col1:
         st.subheader("📱 Preferred Order Channels")
         
-        channel_dist = persona_df['preferred_channel'].value_counts()
-        
-        fig = go.Figure(data=[go.Bar(
-            x=channel_dist.index,
-            y=channel_dist.values,
-            marker_color=SEGMENT_COLORS[persona_name],
-            text=channel_dist.values,
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>Customers: %{y}<extra></extra>'
-        )])
-        
-        fig.update_layout(
-            yaxis_title="Number of Customers",
-            xaxis_title="",
-            height=350,
-            showlegend=False,
-            margin=dict(l=50, r=50, t=60, b=50),
-            yaxis=dict(range=[0, max(channel_dist.values) * 1.2])
-        )
+        def build():
+            cube = get_cube(df)
+            channel_dist = dimension_counts(cube, 'preferred_channel', where=in_persona)
+            
+            fig = go.Figure(data=[go.Bar(
+                x=channel_dist.index,
+                y=channel_dist.values,
+                marker_color=SEGMENT_COLORS[persona_name],
+                text=channel_dist.values,
+                textposition='outside',
+                hovertemplate='<b>%{x}</b><br>Customers: %{y}<extra></extra>'
+            )])
+            
+            fig.update_layout(
+                yaxis_title="Number of Customers",
+                xaxis_title="",
+                height=350,
+                showlegend=False,
+                margin=dict(l=50, r=50, t=60, b=50),
+                yaxis=dict(range=[0, max(channel_dist.values) * 1.2])
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('persona.channels', df, build, persona=persona_name)
     
     with col2:
         st.subheader("🕐 Primary Order Times")
         
-        time_dist = persona_df['primary_order_time'].value_counts()
-        
-        fig = go.Figure(data=[go.Bar(
-            x=time_dist.values,
-            y=time_dist.index,
-            orientation='h',
-            marker_color=SEGMENT_COLORS[persona_name],
-            text=time_dist.values,
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>Customers: %{x}<extra></extra>'
-        )])
-        
-        fig.update_layout(
-            xaxis_title="Number of Customers",
-            yaxis_title="",
-            height=350,
-            showlegend=False,
-            margin=dict(l=20, r=100, t=30, b=50),
-            xaxis=dict(range=[0, max(time_dist.values) * 1.15])
-        )
+        def build():
+            cube = get_cube(df)
+            time_dist = dimension_counts(cube, 'primary_order_time', where=in_persona)
+            
+            fig = go.Figure(data=[go.Bar(
+                x=time_dist.values,
+                y=time_dist.index,
+                orientation='h',
+                marker_color=SEGMENT_COLORS[persona_name],
+                text=time_dist.values,
+                textposition='outside',
+                hovertemplate='<b>%{y}</b><br>Customers: %{x}<extra></extra>'
+            )])
+            
+            fig.update_layout(
+                xaxis_title="Number of Customers",
+                yaxis_title="",
+                height=350,
+                showlegend=False,
+                margin=dict(l=20, r=100, t=30, b=50),
+                xaxis=dict(range=[0, max(time_dist.values) * 1.15])
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('persona.order_times', df, build, persona=persona_name)
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("💳 Payment Methods")
         
-        payment_dist = persona_df['preferred_payment'].value_counts()
-        
-        # Create color palette based on segment
-        base_color = SEGMENT_COLORS[persona_name]
-        
-        fig = go.Figure(data=[go.Pie(
-            labels=payment_dist.index,
-            values=payment_dist.values,
-            hole=0.3,
-            textposition='inside',
-            textinfo='label+percent',
-            marker=dict(
-                colors=['#E57373', '#81C784', '#64B5F6'][:len(payment_dist)]
+        def build():
+            cube = get_cube(df)
+            payment_dist = dimension_counts(cube, 'preferred_payment', where=in_persona)
+            
+            # Create color palette based on segment
+            base_color = SEGMENT_COLORS[persona_name]
+            
+            fig = go.Figure(data=[go.Pie(
+                labels=payment_dist.index,
+                values=payment_dist.values,
+                hole=0.3,
+                textposition='inside',
+                textinfo='label+percent',
+                marker=dict(
+                    colors=['#E57373', '#81C784', '#64B5F6'][:len(payment_dist)]
+                )
+            )])
+            
+            fig.update_layout(
+                height=350,
+                showlegend=True,
+                margin=dict(l=20, r=20, t=30, b=20)
             )
-        )])
-        
-        fig.update_layout(
-            height=350,
-            showlegend=True,
-            margin=dict(l=20, r=20, t=30, b=20)
-        )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('persona.payment_methods', df, build, persona=persona_name)
     
     with col2:
         st.subheader("🎯 Engagement Metrics")
         
-        promo_users = (persona_df['uses_promos'] == True).sum()
-        loyalty_enrolled = (persona_df['loyalty_enrolled'] == True).sum()
-        loyalty_active = (persona_df['loyalty_active'] == True).sum()
-        
-        engagement_data = {
-            'Metric': ['Uses Promos', 'Loyalty Enrolled', 'Loyalty Active'],
-            'Customers': [promo_users, loyalty_enrolled, loyalty_active],
-            'Percentage': [
-                promo_users/len(persona_df)*100,
-                loyalty_enrolled/len(persona_df)*100,
-                loyalty_active/len(persona_df)*100
-            ]
-        }
-        
-        fig = go.Figure(data=[go.Bar(
-            x=engagement_data['Metric'],
-            y=engagement_data['Percentage'],
-            marker_color=SEGMENT_COLORS[persona_name],
-            text=[f"{p:.0f}%" for p in engagement_data['Percentage']],
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>%{y:.1f}%<extra></extra>'
-        )])
-        
-        fig.update_layout(
-            yaxis_title="Percentage (%)",
-            yaxis_range=[0, 100],
-            height=350,
-            showlegend=False
-        )
+        def build():
+            promo_users = persona['uses_promos_count']
+            loyalty_enrolled = persona['loyalty_enrolled_count']
+            loyalty_active = persona['loyalty_active_count']
+            
+            engagement_data = {
+                'Metric': ['Uses Promos', 'Loyalty Enrolled', 'Loyalty Active'],
+                'Customers': [promo_users, loyalty_enrolled, loyalty_active],
+                'Percentage': [
+                    promo_users/persona_count*100,
+                    loyalty_enrolled/persona_count*100,
+                    loyalty_active/persona_count*100
+                ]
+            }
+            
+            fig = go.Figure(data=[go.Bar(
+                x=engagement_data['Metric'],
+                y=engagement_data['Percentage'],
+                marker_color=SEGMENT_COLORS[persona_name],
+                text=[f"{p:.0f}%" for p in engagement_data['Percentage']],
+                textposition='outside',
+                hovertemplate='<b>%{x}</b><br>%{y:.1f}%<extra></extra>'
+            )])
+            
+            fig.update_layout(
+                yaxis_title="Percentage (%)",
+                yaxis_range=[0, 100],
+                height=350,
+                showlegend=False
+            )
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('persona.engagement', df, build, persona=persona_name)
     
     # Top menu items
     st.subheader("🍗 Popular Menu Items")
     
-    all_items = []
-    for items_list in persona_df['top_menu_items_list']:
-        all_items.extend(items_list)
-    
-    if all_items:
-        item_counts = pd.Series(all_items).value_counts().head(10)
+    def build():
+        item_counts = get_top_items(df, persona_name, n=10)
+        if not len(item_counts):
+            return None
         
         fig = go.Figure(data=[go.Bar(
             x=item_counts.values,
@@ -581,9 +1006,9 @@ def create_persona_deep_dive(df, persona_name):
             margin=dict(l=20, r=100, t=30, b=50),
             xaxis=dict(range=[0, max(item_counts.values) * 1.15])
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
-    else:
+        return fig
+    
+    if show_figure('persona.menu_items', df, build, persona=persona_name) is None:
         st.info("No menu item data available for this segment")
     
     # Demographics
@@ -593,82 +1018,135 @@ def create_persona_deep_dive(df, persona_name):
     
     with col1:
         st.markdown("**Age Distribution**")
-        age_bins = [0, 20, 25, 30, 35, 40, 45, 100]
-        age_labels = ['16-20', '21-25', '26-30', '31-35', '36-40', '41-45', '46+']
-        persona_df['age_group'] = pd.cut(persona_df['age'], bins=age_bins, labels=age_labels)
-        age_dist = persona_df['age_group'].value_counts().sort_index()
+        def build():
+            cube = get_cube(df)
+            age_dist = rollup(cube, by='age_band', where=in_persona)['count'].reindex(AGE_LABELS, fill_value=0)
+            
+            fig = go.Figure(data=[go.Bar(
+                x=age_dist.index,
+                y=age_dist.values,
+                marker_color=SEGMENT_COLORS[persona_name],
+                hovertemplate='<b>%{x} years</b><br>Customers: %{y}<extra></extra>'
+            )])
+            
+            fig.update_layout(height=300, showlegend=False, xaxis_title="Age Group", yaxis_title="Customers")
+            return fig
         
-        fig = go.Figure(data=[go.Bar(
-            x=age_dist.index,
-            y=age_dist.values,
-            marker_color=SEGMENT_COLORS[persona_name],
-            hovertemplate='<b>%{x} years</b><br>Customers: %{y}<extra></extra>'
-        )])
-        
-        fig.update_layout(height=300, showlegend=False, xaxis_title="Age Group", yaxis_title="Customers")
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('persona.age_bands', df, build, persona=persona_name)
     
     with col2:
         st.markdown("**City Distribution (Top 10)**")
-        city_dist = persona_df['city'].value_counts().head(10)
+        def build():
+            cube = get_cube(df)
+            city_dist = dimension_counts(cube, 'city', where=in_persona).head(10)
+            
+            fig = go.Figure(data=[go.Bar(
+                x=city_dist.values,
+                y=city_dist.index,
+                orientation='h',
+                marker_color=SEGMENT_COLORS[persona_name],
+                hovertemplate='<b>%{y}</b><br>Customers: %{x}<extra></extra>'
+            )])
+            
+            fig.update_layout(height=300, showlegend=False, xaxis_title="Customers", yaxis_title="")
+            return fig
         
-        fig = go.Figure(data=[go.Bar(
-            x=city_dist.values,
-            y=city_dist.index,
-            orientation='h',
-            marker_color=SEGMENT_COLORS[persona_name],
-            hovertemplate='<b>%{y}</b><br>Customers: %{x}<extra></extra>'
-        )])
-        
-        fig.update_layout(height=300, showlegend=False, xaxis_title="Customers", yaxis_title="")
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('persona.cities', df, build, persona=persona_name)
     
     with col3:
         st.markdown("**Occupation Distribution**")
-        occupation_dist = persona_df['occupation'].value_counts().head(5)
-        
-        fig = go.Figure(data=[go.Pie(
-            labels=occupation_dist.index,
-            values=occupation_dist.values,
-            hole=0.3,
-            marker=dict(
-                colors=['#E57373', '#81C784', '#64B5F6', '#FFB74D', '#BA68C8'][:len(occupation_dist)]
+        def build():
+            cube = get_cube(df)
+            occupation_dist = dimension_counts(cube, 'occupation', where=in_persona).head(5)
+            
+            fig = go.Figure(data=[go.Pie(
+                labels=occupation_dist.index,
+                values=occupation_dist.values,
+                hole=0.3,
+                marker=dict(
+                    colors=['#E57373', '#81C784', '#64B5F6', '#FFB74D', '#BA68C8'][:len(occupation_dist)]
+                )
+            )])
+            
+            fig.update_layout(
+                height=300,
+                showlegend=True,
+                margin=dict(l=20, r=20, t=30, b=20)
             )
-        )])
+            return fig
         
-        fig.update_layout(
-            height=300,
-            showlegend=True,
-            margin=dict(l=20, r=20, t=30, b=20)
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('persona.occupations', df, build, persona=persona_name)
 
-def create_behavioral_insights(df):
-    """Create behavioral insights and patterns"""
-    
-    st.subheader("🔍 Behavioral Insights & Patterns")
+def sample_caption(fig):
+    """Note under a scatter that only plots a sample of the customers"""
+    meta = fig.layout.meta
+    if meta and meta['shown'] < meta['customers']:
+        st.caption(f"Showing {meta['shown']:,} of {meta['customers']:,} customers (outliers kept); trendlines use every customer")
+
+def add_trendlines(fig, lines):
+    """Draw precomputed per-segment fits as two-point line traces (in the legend when the segment has no points)"""
+    plotted = {trace.legendgroup for trace in fig.data}
+    for segment, line in lines.iterrows():
+        xs, ys = trendline_points(line)
+        fig.add_trace(go.Scatter(
+            x=xs,
+            y=ys,
+            mode='lines',
+            name=segment,
+            legendgroup=segment,
+            showlegend=segment not in plotted,
+            line=dict(color=SEGMENT_COLORS[segment]),
+            hovertemplate=(
+                f"<b>OLS trendline</b><br>y = {line['slope']:.4g} * x + {line['intercept']:.4g}"
+                f"<br>R<sup>2</sup>={line['r2']:.4f}<extra>{segment}</extra>"
+            ),
+        ))
+
+def create_distribution_charts(df):
+    """Create the customer-level distribution and correlation charts"""
     
     # Order value distribution
     st.markdown("### Order Value Distribution by Segment")
     
-    fig = go.Figure()
-    
-    for segment in df['segment'].unique():
-        segment_df = df[df['segment'] == segment]
-        fig.add_trace(go.Box(
-            y=segment_df['avg_order_value'],
-            name=segment,
-            marker_color=SEGMENT_COLORS[segment],
-            boxmean='sd'
-        ))
+    def build():
+        fig = go.Figure()
+        
+        for segment, stats in get_box_stats(df, 'avg_order_value').iterrows():
+            fig.add_trace(go.Box(
+                x=[segment],
+                q1=[stats['q1']],
+                median=[stats['median']],
+                q3=[stats['q3']],
+                lowerfence=[stats['lowerfence']],
+                upperfence=[stats['upperfence']],
+                mean=[stats['mean']],
+                sd=[stats['sd']],
+                name=segment,
+                legendgroup=segment,
+                marker_color=SEGMENT_COLORS[segment],
+                boxmean='sd'
+            ))
+            fig.add_trace(go.Scatter(
+                x=[segment] * len(stats['outliers']),
+                y=stats['outliers'],
+                mode='markers',
+                name=segment,
+                legendgroup=segment,
+                showlegend=False,
+                marker=dict(color=SEGMENT_COLORS[segment], size=4),
+            ))
+        
+        fig.update_layout(
+            yaxis_title="Average Order Value (PHP)",
+            height=400,
+            showlegend=True
+        )
+        return fig
     
-    fig.update_layout(
-        yaxis_title="Average Order Value (PHP)",
-        height=400,
-        showlegend=True
-    )
+    show_figure('behavioral.order_value_box', df, build)
     
-    st.plotly_chart(fig, use_container_width=True)
+    if not has_customer_rows(df):
+        st.info("Individual customers are not kept when the export is loaded in streaming mode, so the plots below only show each segment's trendline.")
     
     # Correlation heatmap
     col1, col2 = st.columns(2)
@@ -676,87 +1154,413 @@ def create_behavioral_insights(df):
     with col1:
         st.markdown("### Visit Frequency vs Lifetime Value")
         
-        fig = px.scatter(
-            df,
-            x='visit_frequency_month',
-            y='lifetime_value',
-            color='segment',
-            color_discrete_map=SEGMENT_COLORS,
-            trendline='ols',
-            labels={
-                'visit_frequency_month': 'Visit Frequency (per month)',
-                'lifetime_value': 'Lifetime Value (PHP)',
-                'segment': 'Segment'
-            },
-            height=400
-        )
+        def build():
+            shown, customers = get_scatter_points(df, 'visit_frequency_month', 'lifetime_value')
+            fig = px.scatter(
+                shown,
+                x='visit_frequency_month',
+                y='lifetime_value',
+                color='segment',
+                color_discrete_map=SEGMENT_COLORS,
+                render_mode=render_mode(len(shown)),
+                labels={
+                    'visit_frequency_month': 'Visit Frequency (per month)',
+                    'lifetime_value': 'Lifetime Value (PHP)',
+                    'segment': 'Segment'
+                },
+                height=400
+            )
+            
+            add_trendlines(fig, get_trendlines(df, 'visit_frequency_month', 'lifetime_value'))
+            fig.update_layout(meta={'shown': len(shown), 'customers': customers})
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        fig = show_figure('behavioral.visits_vs_ltv', df, build)
+        sample_caption(fig)
     
     with col2:
         st.markdown("### Tenure vs Total Spent")
         
-        fig = px.scatter(
-            df,
-            x='tenure_months',
-            y='total_spent',
-            color='segment',
-            color_discrete_map=SEGMENT_COLORS,
-            trendline='ols',
-            labels={
-                'tenure_months': 'Tenure (months)',
-                'total_spent': 'Total Spent (PHP)',
-                'segment': 'Segment'
-            },
-            height=400
-        )
+        def build():
+            shown, customers = get_scatter_points(df, 'tenure_months', 'total_spent')
+            fig = px.scatter(
+                shown,
+                x='tenure_months',
+                y='total_spent',
+                color='segment',
+                color_discrete_map=SEGMENT_COLORS,
+                render_mode=render_mode(len(shown)),
+                labels={
+                    'tenure_months': 'Tenure (months)',
+                    'total_spent': 'Total Spent (PHP)',
+                    'segment': 'Segment'
+                },
+                height=400
+            )
+            
+            add_trendlines(fig, get_trendlines(df, 'tenure_months', 'total_spent'))
+            fig.update_layout(meta={'shown': len(shown), 'customers': customers})
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        fig = show_figure('behavioral.tenure_vs_spent', df, build)
+        sample_caption(fig)
+
+@st.fragment
+def create_percentile_table(df):
+    """Per-segment percentiles of a distribution measure, read from the quantile sketches"""
+    
+    st.markdown("### Percentiles by Segment")
+    
+    measure = st.selectbox("Metric", SKETCH_MEASURES, format_func=lambda m: SKETCH_LABELS[m])
+    sketches = get_sketches(df)[measure]
+    
+    table = pd.DataFrame(
+        {f"P{q * 100:g}": [quantile(sketches[s], q) for s in sketches] for q in PERCENTILES},
+        index=list(sketches)
+    )
+    value_format = (lambda v: f"{v:.0%}") if measure == 'promo_engagement_rate' else format_currency
+    
+    st.dataframe(table.map(value_format), use_container_width=True)
+
+@timed('page.cohorts')
+def create_cohort_analysis(df):
+    """Create registration-month cohort retention and revenue heatmaps"""
+    
+    st.subheader("📅 Cohort Retention & Revenue")
+    
+    cohorts = get_cohorts(df)
+    if cohorts is None:
+        st.info("Cohort analysis is not available when the export is loaded in streaming mode.")
+        return
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        segment = st.selectbox("Segment", ["All segments"] + cohorts.segments)
+    with col2:
+        view = st.radio("Show", ["Retention", "Revenue"], horizontal=True)
+    segment = None if segment == "All segments" else segment
+    
+    sizes = cohort_sizes(cohorts, segment)
+    retention = retention_matrix(cohorts, segment)
+    
+    # Month-6 retention across the cohorts old enough to have reached it, weighted by cohort size
+    if retention.shape[1] > 6:
+        reached = retention[6].notna() & (sizes > 0)
+    else:
+        reached = pd.Series(False, index=sizes.index)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cohorts", format_number((sizes > 0).sum()))
+    with col2:
+        st.metric("Customers", format_number(sizes.sum()))
+    with col3:
+        st.metric(
+            "Month-6 Retention",
+            f"{(retention[6][reached] * sizes[reached]).sum() / sizes[reached].sum():.1%}" if reached.any() else "n/a"
+        )
+    
+    def build():
+        if view == "Retention":
+            matrix, colorbar, value_format = retention, "Active", ".1%"
+        else:
+            matrix, colorbar, value_format = revenue_matrix(cohorts, segment), "Revenue (PHP)", ",.0f"
+        matrix = matrix[(sizes > 0).to_numpy()]  # Cohorts with none of the segment's customers
+        fig = go.Figure(go.Heatmap(
+            z=matrix.to_numpy(),
+            x=list(matrix.columns),
+            y=list(matrix.index),
+            colorscale='Reds',
+            zmin=0,
+            zmax=1 if view == "Retention" else None,
+            colorbar=dict(title=colorbar, tickformat=value_format),
+            hovertemplate=f"Cohort %{{y}}<br>Month %{{x}}<br>{colorbar}: %{{z:{value_format}}}<extra></extra>"
+        ))
+        fig.update_layout(
+            xaxis_title="Months since registration",
+            yaxis_title="Registration cohort",
+            yaxis=dict(type='category', autorange='reversed'),
+            height=max(400, 18 * len(matrix) + 120)
+        )
+        return fig
+    
+    show_figure('cohorts.heatmap', df, build, segment=segment, view=view)
+    st.caption(
+        "Customers count as active from registration through the month of their last order (capped at their tenure); "
+        "their total spend is spread evenly over those months. Blank cells are months that haven't happened yet."
+    )
+
+EXPLORER_COLUMNS = {
+    'customer_id': 'Customer ID',
+    'segment': 'Segment',
+    'city': 'City',
+    'age': 'Age',
+    'registration_date': 'Registered',
+    'last_order_date': 'Last Order',
+    'total_orders': 'Orders',
+    'total_spent': 'Total Spent',
+    'lifetime_value': 'Lifetime Value',
+    'preferred_channel': 'Channel',
+    'loyalty_enrolled': 'Loyalty',
+}
+
+LOOKUP_LABELS = {'customer_id': 'Customer ID', 'email': 'Email', 'phone': 'Phone'}
+
+def explorer_matches(frame, df, column, query, sort_by, descending):
+    """Row positions of the customers matching a lookup (and the filters), in display order"""
+    version = data_version(frame)
+    order = load_explorer_order(frame, version, sort_by, descending)
+    selected = None
+    if isinstance(df, FilteredDataset):
+        selected = filtered_result(df, 'row_mask', lambda: row_mask(df))
+    
+    if query.strip():
+        with span('explorer.lookup'):
+            matches = lookup(load_lookup_index(frame, version, column), column, query)
+        if selected is not None:
+            matches = matches[selected[matches]]
+        if len(matches) * 8 < len(frame):
+            return sorted_rows(frame[sort_by], rows=np.sort(matches), descending=descending)
+        match_mask = np.zeros(len(frame), dtype=bool)
+        match_mask[matches] = True
+        return order[match_mask[order]]
+    
+    if selected is None:
+        return order
+    return filtered_result(df, ('explorer_order', sort_by, descending), lambda: order[selected[order]])
+
+@timed('page.customer_explorer')
+def create_customer_explorer(df):
+    """Find customers by id, email or phone and page through them"""
+    
+    st.subheader("🗂️ Customer Explorer")
+    
+    frame = df.frame if isinstance(df, FilteredDataset) else df
+    if not isinstance(frame, pd.DataFrame):
+        st.info("The customer explorer needs the customer rows in memory (pandas or mapped backend).")
+        return
+    
+    col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+    with col1:
+        column = st.selectbox("Search by", LOOKUP_COLUMNS, format_func=LOOKUP_LABELS.get)
+    with col2:
+        query = st.text_input("Starts with", value="", placeholder=f"e.g. {frame['customer_id'].iloc[0]}")
+    with col3:
+        sort_by = st.selectbox("Sort by", list(EXPLORER_COLUMNS), format_func=EXPLORER_COLUMNS.get)
+    with col4:
+        descending = st.toggle("Descending", value=False)
+    
+    matches = explorer_matches(frame, df, column, query, sort_by, descending)
+    if not len(matches):
+        st.warning("No customers match.")
+        return
+    
+    pages = page_count(len(matches))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+    rows = page_rows(matches, page)
+    
+    # Only this page's rows are assembled and sent to the browser
+    pii = load_customer_pii(DATA_FILE, data_version(frame)).iloc[rows].reset_index(drop=True)
+    table = frame[list(EXPLORER_COLUMNS)].iloc[rows].reset_index(drop=True)
+    table.insert(1, 'Name', pii['first_name'].astype(str) + ' ' + pii['last_name'].astype(str))
+    table.insert(2, 'Email', pii['email'])
+    table.insert(3, 'Phone', pii['phone'])
+    
+    st.caption(
+        f"Customers {(page - 1) * PAGE_SIZE + 1:,}-{(page - 1) * PAGE_SIZE + len(rows):,} "
+        f"of {len(matches):,} · page {page:,} of {pages:,}"
+    )
+    st.dataframe(
+        table.rename(columns=EXPLORER_COLUMNS),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'Total Spent': st.column_config.NumberColumn(format="₱%.2f"),
+            'Lifetime Value': st.column_config.NumberColumn(format="₱%.2f"),
+        }
+    )
+
+@timed('page.behavioral_insights')
+def create_behavioral_insights(df):
+    """Create behavioral insights and patterns"""
+    
+    st.subheader("🔍 Behavioral Insights & Patterns")
+    
+    create_distribution_charts(df)
+    create_percentile_table(df)
     
     # Key insights
     st.markdown("### 💡 Key Insights")
     
+    insights = load_segment_insights(df, data_version(df))
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        brenda_df = df[df['segment'] == 'Busy Brenda']
-        brenda_weekend_pct = (brenda_df['primary_order_time'].str.contains('Weekend')).sum() / len(brenda_df) * 100
-        
         st.markdown(f"""
         <div class="insight-box">
             <strong>👨‍👩‍👧‍👦 Busy Brenda Insight</strong><br>
-            {brenda_weekend_pct:.0f}% of Brenda segment orders during weekend lunch, indicating strong family dining tradition.
-            Average party size of {brenda_df['party_size_avg'].mean():.1f} confirms family-focused behavior.
+            {insights['brenda_weekend_pct']:.0f}% of Brenda segment orders during weekend lunch, indicating strong family dining tradition.
+            Average party size of {insights['brenda_party_size']:.1f} confirms family-focused behavior.
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
-        hiro_df = df[df['segment'] == 'Hungry Hiro']
-        hiro_promo_pct = (hiro_df['uses_promos'] == True).sum() / len(hiro_df) * 100
-        
         st.markdown(f"""
         <div class="insight-box">
             <strong>🎓 Hungry Hiro Insight</strong><br>
-            {hiro_promo_pct:.0f}% of Hiro segment uses promos regularly. Highest visit frequency at {hiro_df['visit_frequency_month'].mean():.1f}x/month
-            despite lowest AOV of {format_currency(hiro_df['avg_order_value'].mean())}.
+            {insights['hiro_promo_pct']:.0f}% of Hiro segment uses promos regularly. Highest visit frequency at {insights['hiro_visit_frequency']:.1f}x/month
+            despite lowest AOV of {format_currency(insights['hiro_order_value'])}.
         </div>
         """, unsafe_allow_html=True)
     
     with col3:
-        uro_df = df[df['segment'] == 'Urban Uro']
-        uro_delivery_pct = (uro_df['preferred_channel'] == 'Delivery').sum() / len(uro_df) * 100
-        
         st.markdown(f"""
         <div class="insight-box">
             <strong>💼 Urban Uro Insight</strong><br>
-            {uro_delivery_pct:.0f}% prefer delivery channel. Highest LTV at {format_currency(uro_df['lifetime_value'].mean())} 
-            with longest tenure of {uro_df['tenure_months'].mean():.1f} months - most loyal segment.
+            {insights['uro_delivery_pct']:.0f}% prefer delivery channel. Highest LTV at {format_currency(insights['uro_lifetime_value'])} 
+            with longest tenure of {insights['uro_tenure']:.1f} months - most loyal segment.
         </div>
         """, unsafe_allow_html=True)
 
+def filter_customers(df, container):
+    """Sidebar filter bar; returns the matching customers (the data itself when nothing is filtered)"""
+    with container:
+        st.markdown("### Filters")
+        if not isinstance(df, pd.DataFrame):
+            st.caption("Filters need the customer rows in memory (pandas or mapped backend).")
+            return df
+        
+        index = load_filter_index(df, data_version(df))
+        selections = {
+            'city': st.multiselect("City", filter_values(index, 'city'), placeholder="All cities"),
+            'preferred_channel': st.multiselect("Channel", filter_values(index, 'preferred_channel'), placeholder="All channels"),
+            'loyalty_status': st.multiselect("Loyalty", filter_values(index, 'loyalty_status'), placeholder="Any status"),
+        }
+        months = filter_values(index, 'registration_month')
+        if len(months) > 1:
+            start, end = st.select_slider("Registered", months, value=(months[0], months[-1]))
+            selections['registration_month'] = months[months.index(start):months.index(end) + 1]
+        
+        filters = canonical_filters(index, selections)
+        if filters:
+            # Popcounts of the filter bitmaps ANDed with each segment's, before any rows are read
+            matches = value_counts(index, 'segment', filters)
+            st.caption(
+                f"{matches.sum():,} of {index.size:,} customers match  \n"
+                + " · ".join(f"{segment} {n:,}" for segment, n in matches.items())
+            )
+    return filter_dataset(df, index, filters)
+
+@st.fragment
+def show_selected_page(df, navigation, filter_bar, cache_panel):
+    """Page selector and the selected page; switching pages reruns only this fragment, not the whole app"""
+    
+    with navigation:
+        page = st.radio(
+            "Select View",
+            ["📊 Overview", "📈 Segment Comparison", "👨‍👩‍👧‍👦 Busy Brenda", "🎓 Hungry Hiro", "💼 Urban Uro", "🔍 Behavioral Insights", "📅 Cohorts", "🗂️ Customer Explorer"]
+        )
+    
+    # A full run was started in main(); a fragment rerun starts its own
+    if not run_active():
+        start_run()
+    
+    # Changing a filter reruns only this fragment; every page below reads the filtered customers
+    with span('filters'):
+        df = filter_customers(df, filter_bar)
+    
+    # Route to appropriate page
+    try:
+        if isinstance(df, FilteredDataset) and not len(df.rows):
+            st.warning("No customers match the selected filters.")
+            
+        elif page == "📊 Overview":
+            create_segment_overview(df)
+            
+        elif page == "📈 Segment Comparison":
+            create_segment_comparison(df)
+            
+        elif page == "👨‍👩‍👧‍👦 Busy Brenda":
+            create_persona_deep_dive(df, "Busy Brenda")
+            
+        elif page == "🎓 Hungry Hiro":
+            create_persona_deep_dive(df, "Hungry Hiro")
+            
+        elif page == "💼 Urban Uro":
+            create_persona_deep_dive(df, "Urban Uro")
+            
+        elif page == "🔍 Behavioral Insights":
+            create_behavioral_insights(df)
+            
+        elif page == "📅 Cohorts":
+            create_cohort_analysis(df)
+            
+        elif page == "🗂️ Customer Explorer":
+            create_customer_explorer(df)
+    except BaseException:
+        cancel_run()  # Interrupted (e.g. by a rerun): don't log a partial run
+        raise
+    
+    timing = finish_run(page, timing_session()) if TIMING_ENABLED else None
+    
+    # Figure cache counters, read after the page so they include this run
+    with cache_panel.expander("Figure Cache"):
+        cache = figure_cache_stats()
+        st.markdown(
+            f"**Hits:** {cache['hits']:,} · **Misses:** {cache['misses']:,} ({cache['hit_rate']:.0%} hit rate)  \n"
+            f"**Cached:** {cache['entries']:,} figures, {cache['bytes'] / 1024 ** 2:.1f} MB  \n"
+            f"**Build time saved:** {cache['saved_seconds']:.2f}s"
+        )
+    
+    with cache_panel.expander("Filtered Results"):
+        filtered = filter_cache_stats()
+        st.markdown(
+            f"**Hits:** {filtered['hits']:,} · **Misses:** {filtered['misses']:,} ({filtered['hit_rate']:.0%} hit rate)  \n"
+            f"**Cached:** {filtered['entries']:,} results, {filtered['bytes'] / 1024 ** 2:.1f} MB"
+        )
+    
+    with cache_panel.expander("Shared Data"):
+        store = store_stats()
+        st.markdown(
+            f"**Size:** {store['bytes'] / 1024 ** 2:,.1f} MB of {store['max_bytes'] / 1024 ** 2:,.0f} MB budget  \n"
+            f"**Values:** {store['entries']:,} · **Hits:** {store['hits']:,} · **Builds:** {store['builds']:,} · **Evictions:** {store['evictions']:,}"
+        )
+        for name, size in store['sizes'].items():
+            st.caption(f"{name[0]}: {size / 1024 ** 2:,.1f} MB")
+    
+    if TIMING_ENABLED:
+        show_performance_panel(cache_panel, timing)
+
+def timing_session():
+    """Anonymous id tying a session's timing records together"""
+    if 'timing_session' not in st.session_state:
+        st.session_state['timing_session'] = uuid.uuid4().hex[:12]
+    return st.session_state['timing_session']
+
+def show_performance_panel(container, timing):
+    """This run's slowest steps and p50/p95 page latency over the process's recent runs"""
+    with container.expander("Performance"):
+        if timing is None:
+            return
+        st.markdown(f"**This run:** {timing['total_ms']:,.0f} ms")
+        slowest = sorted(timing['spans'], key=lambda s: -s[1])[:8]
+        st.dataframe(
+            pd.DataFrame(slowest, columns=['Step', 'ms']).round(1),
+            hide_index=True, use_container_width=True
+        )
+        summary = pd.DataFrame.from_dict(latency_summary(recent_runs()), orient='index')
+        st.markdown(f"**Page latency** (last {summary['runs'].sum():,} runs)")
+        st.dataframe(
+            summary[['runs', 'p50_ms', 'p95_ms']].round(0).rename(columns={'runs': 'Runs', 'p50_ms': 'p50 ms', 'p95_ms': 'p95 ms'}),
+            use_container_width=True
+        )
+
 def main():
     """Main application"""
     
+    start_run()
+    
     # Load data
     df = load_data()
     
@@ -767,10 +1571,9 @@ def main():
     st.sidebar.image("https://via.placeholder.com/200x80/D32F2F/FFFFFF?text=JOYFUL+BITES", use_container_width=True)
     st.sidebar.title("Navigation")
     
-    page = st.sidebar.radio(
-        "Select View",
-        ["📊 Overview", "📈 Segment Comparison", "👨‍👩‍👧‍👦 Busy Brenda", "🎓 Hungry Hiro", "💼 Urban Uro", "🔍 Behavioral Insights"]
-    )
+    # Filled by show_selected_page, so the page selector, filters and cache panel rerun with the page
+    navigation = st.sidebar.container()
+    filter_bar = st.sidebar.container()
     
     st.sidebar.markdown("---")
     st.sidebar.markdown("### About")
@@ -780,28 +1583,14 @@ def main():
     )
     
     st.sidebar.markdown("### Data Summary")
-    st.sidebar.metric("Total Customers", format_number(len(df)))
-    st.sidebar.metric("Total Revenue", format_currency(df['total_spent'].sum()))
+    summary = load_data_summary(get_cube(df), data_version(df))
+    st.sidebar.metric("Total Customers", format_number(summary['count']))
+    st.sidebar.metric("Total Revenue", format_currency(summary['total_spent_sum']))
     st.sidebar.metric("Data Last Updated", datetime.now().strftime("%Y-%m-%d"))
     
-    # Route to appropriate page
-    if page == "📊 Overview":
-        create_segment_overview(df)
-        
-    elif page == "📈 Segment Comparison":
-        create_segment_comparison(df)
-        
-    elif page == "👨‍👩‍👧‍👦 Busy Brenda":
-        create_persona_deep_dive(df, "Busy Brenda")
-        
-    elif page == "🎓 Hungry Hiro":
-        create_persona_deep_dive(df, "Hungry Hiro")
-        
-    elif page == "💼 Urban Uro":
-        create_persona_deep_dive(df, "Urban Uro")
-        
-    elif page == "🔍 Behavioral Insights":
-        create_behavioral_insights(df)
+    cache_panel = st.sidebar.container()
+    
+    show_selected_page(df, navigation, filter_bar, cache_panel)
 
 if __name__ == "__main__":
     main()
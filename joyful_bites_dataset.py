@@ -0,0 +1,229 @@
+"""
+JOYFUL BITES PARTITIONED DATASET
+Customer table stored as a directory of files partitioned by month and segment.
+
+Layout (Hive-style directory names, one or more files per partition):
+
+    customers/
+        registration_month=2023-01/segment=Busy Brenda/part-0.parquet
+        registration_month=2023-01/segment=Hungry Hiro/part-0.csv
+        ...
+
+Every file keeps all customer columns, so each one is also a valid standalone
+export. Readers list the partition directories, prune them by the requested
+segments and months before opening any file, and read the surviving files in
+parallel on a thread pool (the CSV and Parquet parsers release the GIL).
+
+Because new history only adds partitions, per-partition results (the segment
+cube, the quantile sketches and the trendline sums) are cached by file size
+and mtime: a new month means reading the new month's files, not the whole
+history.
+"""
+
+import hashlib
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from joyful_bites_cube import CUBE_INPUT_COLUMNS, build_cube, combine_cubes
+from joyful_bites_partition import sort_by_segment
+from joyful_bites_regression import combine_stats, regression_stats
+from joyful_bites_schema import CUSTOMER_SCHEMA, SEGMENTS, apply_schema, read_customers
+from joyful_bites_sketch import SKETCH_MEASURES, merge_segment_digests, segment_digests
+
+PARTITION_COLUMNS = ['registration_month', 'segment']
+
+DATA_EXTENSIONS = ('.csv', '.csv.gz', '.csv.zst', '.parquet')
+
+Partition = namedtuple('Partition', ['path', 'registration_month', 'segment', 'version'])
+
+# What the dashboard passes to its pages when the data is a partitioned directory
+PartitionedDataset = namedtuple('PartitionedDataset', ['root', 'partitions', 'data_version'])
+
+# (path, version) -> cube / quantile sketches of that file, so unchanged
+# partitions are never re-read
+_partition_cubes = {}
+_partition_digests = {}
+
+# (x, y) -> {(path, version) -> trendline sums of that file}
+_partition_regressions = {}
+
+
+def registration_months(df):
+    """'YYYY-MM' partition value of each customer's registration date"""
+    return df['registration_date'].dt.strftime('%Y-%m')
+
+
+def write_partitioned(df, root, file_format='parquet', part_number=0):
+    """
+    Write a customer frame as a partitioned dataset under `root` ('parquet' or
+    'csv' files). Frames written with different `part_number`s add files
+    next to each other, so a large dataset can be written in chunks.
+    """
+    months = registration_months(df)
+    for (month, segment), part in df.groupby([months, df['segment']], observed=True, sort=True):
+        directory = os.path.join(root, f"registration_month={month}", f"segment={segment}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{part_number}.{file_format}")
+        if file_format == 'parquet':
+            part.to_parquet(path, index=False)
+        else:
+            part.to_csv(path, index=False)
+
+
+def _partition_values(relative_dir):
+    """{'registration_month': ..., 'segment': ...} from a partition's directory names"""
+    values = {}
+    for name in relative_dir.split(os.sep):
+        key, sep, value = name.partition('=')
+        if sep:
+            values[key] = value
+    return values
+
+
+def list_partitions(root):
+    """
+    Every data file under `root` with its partition values, ordered by segment
+    then month so that concatenated reads are already laid out by segment.
+    """
+    partitions = []
+    for directory, _, files in os.walk(root):
+        values = _partition_values(os.path.relpath(directory, root))
+        for name in files:
+            if not name.endswith(DATA_EXTENSIONS):
+                continue
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            partitions.append(Partition(
+                path=path,
+                registration_month=values.get('registration_month'),
+                segment=values.get('segment'),
+                version=f"{stat.st_size}-{stat.st_mtime_ns}",
+            ))
+
+    segment_order = {segment: i for i, segment in enumerate(SEGMENTS)}
+    return sorted(partitions, key=lambda p: (
+        segment_order.get(p.segment, len(SEGMENTS)), p.segment or '', p.registration_month or '', p.path,
+    ))
+
+
+def dataset_version(partitions):
+    """Version string for a set of partitions; changes whenever any file is added, removed or rewritten"""
+    digest = hashlib.sha256()
+    for p in partitions:
+        digest.update(f"{p.path}\0{p.version}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def open_dataset(root):
+    """Handle on a partitioned dataset directory"""
+    if not os.path.isdir(root):
+        raise FileNotFoundError(root)
+    partitions = tuple(list_partitions(root))
+    return PartitionedDataset(root, partitions, dataset_version(partitions))
+
+
+def prune(partitions, segments=None, months=None):
+    """
+    Partitions that can hold the requested segments/months.
+
+    `months` is a list of 'YYYY-MM' values, or a (first, last) tuple for an
+    inclusive range. Files outside a partition directory are always kept.
+    """
+    kept = []
+    for p in partitions:
+        if segments is not None and p.segment is not None and p.segment not in segments:
+            continue
+        if months is not None and p.registration_month is not None:
+            if isinstance(months, tuple):
+                first, last = months
+                if not first <= p.registration_month <= last:
+                    continue
+            elif p.registration_month not in months:
+                continue
+        kept.append(p)
+    return kept
+
+
+def read_partition(path, columns=None):
+    """Read one partition file with the declared schema applied"""
+    return read_customers(path, columns)
+
+
+def _parallel_map(fn, items, max_workers=None):
+    """fn over items on a thread pool, results in input order"""
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        return list(pool.map(fn, items))
+
+
+def read_partitions(partitions, segments=None, months=None, columns=None, max_workers=None):
+    """
+    Read only the partitions holding the requested segments/months, in parallel.
+
+    The result is laid out contiguously by segment like the single-file frame
+    (see joyful_bites_partition).
+    """
+    selected = prune(partitions, segments, months)
+    frames = _parallel_map(lambda p: read_partition(p.path, columns), selected, max_workers)
+    if not frames:
+        names = list(columns) if columns is not None else list(CUSTOMER_SCHEMA)
+        return apply_schema(pd.DataFrame({col: pd.Series(dtype=object) for col in names}))
+    # Re-applying the schema unifies per-file categories after the concat
+    df = apply_schema(pd.concat(frames, ignore_index=True))
+
+    if any(p.segment is None for p in selected) and 'segment' in df:
+        # Files outside segment directories may hold any segment
+        if segments is not None:
+            df = df[df['segment'].isin(segments)]
+        df = sort_by_segment(df)
+    return df
+
+
+def _memoized(memo, build):
+    """Per-partition builder memoized on (path, version)"""
+    def partition_result(partition):
+        key = (partition.path, partition.version)
+        if key not in memo:
+            memo[key] = build(partition.path)
+        return memo[key]
+    return partition_result
+
+
+def _drop_stale(memo, dataset):
+    """Forget memoized results for files of `dataset` that changed or disappeared"""
+    current = {(p.path, p.version) for p in dataset.partitions}
+    for key in [key for key in memo if key[0].startswith(dataset.root) and key not in current]:
+        del memo[key]
+
+
+def partitioned_cube(dataset, max_workers=None):
+    """Segment cube of the whole dataset, combined from per-partition cubes"""
+    _drop_stale(_partition_cubes, dataset)
+    build = _memoized(_partition_cubes, lambda path: build_cube(read_partition(path, CUBE_INPUT_COLUMNS)))
+    cubes = _parallel_map(build, dataset.partitions, max_workers)
+    if not cubes:
+        return build_cube(read_partitions((), columns=CUBE_INPUT_COLUMNS))
+    return combine_cubes(*cubes)
+
+
+def partitioned_digests(dataset, max_workers=None):
+    """Per-segment quantile sketches of the whole dataset, merged from per-partition sketches"""
+    _drop_stale(_partition_digests, dataset)
+    build = _memoized(_partition_digests, lambda path: segment_digests(read_partition(path, ['segment'] + SKETCH_MEASURES)))
+    return merge_segment_digests(*_parallel_map(build, dataset.partitions, max_workers))
+
+
+def partitioned_regression_stats(dataset, x, y, max_workers=None):
+    """Per-segment trendline sums of y on x for the whole dataset, combined from per-partition sums"""
+    memo = _partition_regressions.setdefault((x, y), {})
+    _drop_stale(memo, dataset)
+    build = _memoized(memo, lambda path: regression_stats(read_partition(path, ['segment', x, y]), x, y))
+    stats = _parallel_map(build, dataset.partitions, max_workers)
+    if not stats:
+        return regression_stats(read_partitions((), columns=['segment', x, y]), x, y)
+    return combine_stats(*stats)
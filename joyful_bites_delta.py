@@ -0,0 +1,182 @@
+"""
+JOYFUL BITES DELTA INGEST
+Incremental refresh of the additive aggregates when an export changes.
+
+Rows are matched between the previous and the new export on `customer_id` and
+compared by a hash of the columns the aggregates are computed from. Only
+customers that were added, removed or changed are re-aggregated: their old
+contributions are subtracted from the cube and the trendline sums and their
+new ones added, instead of rebuilding them from every row.
+
+The row hashes, cube and trendline sums of each version are kept in the
+shared store (so they count against its budget) next to the frame itself.
+A new version is diffed while it is being loaded, when the frame it replaces
+is still stored, so no separate copy of the previous export is kept. Other
+aggregates (sketches, bitmaps, indexes) are keyed by the data version and
+rebuilt on first use.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from joyful_bites_cube import CUBE_INPUT_COLUMNS, build_cube, combine_cubes
+from joyful_bites_regression import combine_stats, regression_stats
+from joyful_bites_store import peek, shared
+
+# Above this fraction of changed rows a full rebuild is cheaper than patching
+MAX_DELTA_FRACTION = 0.3
+
+Delta = namedtuple('Delta', ['removed', 'added', 'changed', 'old_rows', 'new_rows'])
+
+# hashes: row_hashes() of the frame; cube: its aggregate cube; regressions: {(x, y): regression_stats()}
+RefreshState = namedtuple('RefreshState', ['hashes', 'cube', 'regressions'])
+
+
+def _column_bits(column):
+    """uint64 per row identifying a column's value (categories by their own hash)"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        category_hashes = np.append(pd.util.hash_array(column.cat.categories.to_numpy()), np.uint64(0))
+        return category_hashes[np.asarray(column.cat.codes)]
+    return column.to_numpy(dtype=np.float64, na_value=np.nan).view(np.uint64)
+
+
+def row_hashes(df, columns=CUBE_INPUT_COLUMNS):
+    """uint64 hash of each row's `columns`, in row order"""
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        # Polynomial combine over the columns (order matters), then a splitmix64 finalizer
+        for column in columns:
+            hashes *= np.uint64(0x100000001B3)
+            hashes += _column_bits(df[column])
+        hashes ^= hashes >> np.uint64(30)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(27)
+    return hashes
+
+
+def _positions(ids, other_ids):
+    """
+    Position of each of `ids` in `other_ids` (-1 if absent) and the reverse
+    lookup, or None when either side has duplicate ids.
+
+    Both id columns are factorized together once, so every later step works on
+    integer codes instead of hashing the string keys again.
+    """
+    codes, uniques = pd.factorize(pd.concat([ids, other_ids], ignore_index=True))
+    codes, other_codes = codes[:len(ids)], codes[len(ids):]
+    if (np.bincount(codes, minlength=len(uniques)).max(initial=0) > 1
+            or np.bincount(other_codes, minlength=len(uniques)).max(initial=0) > 1):
+        return None
+
+    lookup = np.full(len(uniques), -1, dtype=np.int64)
+    lookup[other_codes] = np.arange(len(other_codes))
+    in_other = lookup[codes]
+    lookup[:] = -1
+    lookup[codes] = np.arange(len(codes))
+    return in_other, lookup[other_codes]
+
+
+def diff_customers(old_ids, old_hashes, new_ids, new_hashes):
+    """
+    Compare two exports' row hashes by customer_id.
+
+    Returns a Delta with the removed/added/changed customer counts, and the
+    positional rows to retract from the old frame (`old_rows`: removed and
+    changed customers) and to add from the new one (`new_rows`: added and
+    changed customers); None if customer_id is not unique in either export.
+    """
+    if len(old_ids) == len(new_ids) and bool((old_ids.array == new_ids.array).all()):
+        # Same customers in the same order (the usual nightly re-export): compare in place
+        changed = np.flatnonzero(old_hashes != new_hashes)
+        return Delta(removed=0, added=0, changed=len(changed), old_rows=changed, new_rows=changed)
+
+    positions = _positions(old_ids, new_ids)
+    if positions is None:
+        return None
+    old_in_new, new_in_old = positions
+
+    removed = old_in_new < 0
+    added = new_in_old < 0
+    kept = np.flatnonzero(~removed)
+    changed = kept[old_hashes[kept] != new_hashes[old_in_new[kept]]]
+
+    old_rows = np.sort(np.concatenate([np.flatnonzero(removed), changed]))
+    new_rows = np.sort(np.concatenate([np.flatnonzero(added), old_in_new[changed]]))
+
+    return Delta(
+        removed=int(removed.sum()),
+        added=int(added.sum()),
+        changed=len(changed),
+        old_rows=old_rows,
+        new_rows=new_rows,
+    )
+
+
+def patch_cube(cube, old_df, new_df, delta):
+    """Swap the changed customers' old cube contributions for their new ones"""
+    retracted = build_cube(old_df.iloc[delta.old_rows])
+    added = build_cube(new_df.iloc[delta.new_rows])
+    return combine_cubes(cube, retracted, added, sign=[1, -1, 1])
+
+
+def patch_stats(stats, old_df, new_df, delta, x, y):
+    """
+    Swap the changed customers' old trendline sums for their new ones, or
+    None when a retracted customer was at the edge of a segment's x range.
+    """
+    retracted = regression_stats(old_df.iloc[delta.old_rows], x, y)
+    edges = stats.reindex(retracted.index)
+    if ((retracted['x_min'] <= edges['x_min']) | (retracted['x_max'] >= edges['x_max'])).any():
+        return None
+    added = regression_stats(new_df.iloc[delta.new_rows], x, y)
+    return combine_stats(stats, retracted, added, sign=[1, -1, 1])
+
+
+def refresh_aggregates(df, pairs=(), old_df=None, old_state=None):
+    """
+    RefreshState of `df`, patched from the previous export's frame and state when given.
+
+    `pairs` lists the (x, y) columns to keep trendline sums for. Falls back to
+    a full build when customer_ids are not unique or when too much of the
+    table changed for patching to pay off.
+    """
+    columns = CUBE_INPUT_COLUMNS + [c for pair in pairs for c in pair if c not in CUBE_INPUT_COLUMNS]
+    hashes = row_hashes(df, columns)
+    cube, regressions = None, {}
+
+    if old_state is not None and set(pairs) <= set(old_state.regressions):
+        delta = diff_customers(old_df['customer_id'], old_state.hashes, df['customer_id'], hashes)
+        if delta is not None and len(delta.old_rows) + len(delta.new_rows) <= MAX_DELTA_FRACTION * max(len(df), 1):
+            cube = patch_cube(old_state.cube, old_df, df, delta)
+            for x, y in pairs:
+                stats = patch_stats(old_state.regressions[(x, y)], old_df, df, delta, x, y)
+                if stats is not None:
+                    regressions[(x, y)] = stats
+
+    if cube is None:
+        cube = build_cube(df)
+    for x, y in pairs:
+        if (x, y) not in regressions:
+            regressions[(x, y)] = regression_stats(df, x, y)
+    return RefreshState(hashes, cube, regressions)
+
+
+def refresh_state(path, data_version, df, pairs=(), previous=None):
+    """
+    Shared RefreshState of `df`, the `data_version` export of `path`.
+
+    `previous` is the store name of the frame `df` is replacing. Called while
+    that frame is still stored (i.e. from the build of the new one), the
+    state is patched from it instead of being rebuilt from every row.
+    """
+    name = ('refresh_state', path)
+
+    def build():
+        old = peek(previous) if previous is not None else None
+        old_state = peek(name)
+        if old is not None and old_state is not None and old.version == old_state.version != data_version:
+            return refresh_aggregates(df, pairs, old.value, old_state.value)
+        return refresh_aggregates(df, pairs)
+    return shared(name, data_version, build)
@@ -0,0 +1,84 @@
+"""
+JOYFUL BITES CUSTOMER EXPLORER
+Indexed lookup, sorting and pagination of individual customers.
+
+Customers are found by a prefix of their customer id, email or phone. Each
+lookup column has a sorted index built once per data version: the column's
+normalized values (ids uppercased, emails lowercased, phones reduced to
+digits) as fixed-width UTF-8 byte strings in sorted order, with the row
+each one came from. A prefix is two binary searches, so a lookup is
+O(log n) whatever the number of customers.
+
+Sorting is done on row positions and only the requested page of rows is
+assembled, so the browser receives one page however many customers match.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+LOOKUP_COLUMNS = ['customer_id', 'email', 'phone']
+
+PAGE_SIZE = 50
+
+# keys: normalized values as sorted byte strings; rows: the row each key came from
+LookupIndex = namedtuple('LookupIndex', ['keys', 'rows'])
+
+
+def normalize(column, values):
+    """Normalized lookup keys of a Series of ids, emails or phones"""
+    values = values.astype('str').fillna('').str.strip()
+    if column == 'email':
+        return values.str.lower()
+    if column == 'phone':
+        return values.str.replace(r'\D', '', regex=True)
+    return values.str.upper()
+
+
+def build_lookup_index(column, values):
+    """Sorted prefix index over a Series of ids, emails or phones"""
+    keys = np.asarray(normalize(column, values).str.encode('utf-8'), dtype=object).astype(np.bytes_)
+    rows = np.argsort(keys, kind='stable')
+    return LookupIndex(keys[rows], rows)
+
+
+def lookup(index, column, query):
+    """Rows whose value starts with `query` (normalized like the index), in key order"""
+    prefix = normalize(column, pd.Series([query])).iloc[0].encode('utf-8')
+    if not prefix:
+        return index.rows
+    width = index.keys.dtype.itemsize
+    if len(prefix) > width:
+        return index.rows[:0]
+    # Needles as wide as the keys, so NumPy doesn't widen (copy) the whole key array
+    start = np.searchsorted(index.keys, np.bytes_(prefix), side='left')
+    if len(prefix) == width:
+        stop = np.searchsorted(index.keys, np.bytes_(prefix), side='right')
+    else:
+        stop = np.searchsorted(index.keys, np.bytes_(prefix + b'\xff'), side='left')  # 0xff never occurs in UTF-8
+    return index.rows[start:stop]
+
+
+def sorted_rows(values, rows=None, descending=False):
+    """
+    Row positions ordered by `values` (a Series over every row); missing values last.
+
+    `rows` restricts the result to those positions (None for every row).
+    """
+    if rows is not None:
+        values = values.iloc[rows]
+    order = values.reset_index(drop=True).sort_values(
+        ascending=not descending, kind='stable', na_position='last'
+    ).index.to_numpy()
+    return order if rows is None else np.asarray(rows)[order]
+
+
+def page_count(n, page_size=PAGE_SIZE):
+    """Number of pages needed for `n` rows (at least one)"""
+    return max(1, -(-n // page_size))
+
+
+def page_rows(order, page, page_size=PAGE_SIZE):
+    """Row positions shown on a (1-based) page"""
+    return order[(page - 1) * page_size:page * page_size]
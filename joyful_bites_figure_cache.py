@@ -0,0 +1,112 @@
+"""
+JOYFUL BITES FIGURE CACHE
+Process-wide LRU cache of built Plotly figures.
+
+Charts are keyed on (chart id, data version, page parameters), so a rerun
+that doesn't change what a chart shows - switching pages, touching an
+unrelated widget, another viewer opening the same page - reuses the figure
+instead of re-aggregating and rebuilding it. The cache is shared by every
+session in the process and bounded both by entry count and by the size of
+the figures' data arrays.
+
+Cached figures are handed to `st.plotly_chart` as they are, so they must not
+be modified after they are built. A hit saves building the figure, not
+sending it: `st.plotly_chart` still encodes it to JSON on every rerun.
+Hit/miss counters and the build time saved by hits are kept for the sidebar.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+FIGURE_CACHE_MAX_ENTRIES = 512
+FIGURE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Flat allowance for a figure's layout and template, and for each trace's scalar settings
+FIGURE_OVERHEAD_BYTES = 16 * 1024
+TRACE_OVERHEAD_BYTES = 1024
+
+# key -> (figure, approximate bytes, seconds it took to build)
+_figures = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0, 'build_seconds': 0.0, 'saved_seconds': 0.0}
+
+
+def figure_key(chart_id, data_version, params=None):
+    """Cache key; `params` (a dict of filter/page state) is canonicalized so key order doesn't matter"""
+    return (chart_id, data_version, json.dumps(params or {}, sort_keys=True, default=str))
+
+
+def _array_bytes(value):
+    """Bytes held by the arrays in a trace property (nested properties included)"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_array_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return 8 * len(value) + sum(_array_bytes(v) for v in value if isinstance(v, (dict, list, tuple)))
+    return 0
+
+
+def figure_nbytes(figure):
+    """Approximate memory held by a figure, from its traces' data arrays (no JSON encoding)"""
+    return FIGURE_OVERHEAD_BYTES + sum(
+        TRACE_OVERHEAD_BYTES + _array_bytes(trace.to_plotly_json()) for trace in figure.data
+    )
+
+
+def _evict():
+    """Drop least recently used figures until the cache is within its bounds (lock held)"""
+    while _figures and (len(_figures) > FIGURE_CACHE_MAX_ENTRIES or _stats['bytes'] > FIGURE_CACHE_MAX_BYTES):
+        _, (_, size, _) = _figures.popitem(last=False)
+        _stats['bytes'] -= size
+        _stats['evictions'] += 1
+
+
+def cached_figure(chart_id, data_version, params, build):
+    """
+    The figure for this chart and state, calling `build()` only on a cache miss.
+
+    `build()` may return None when there is nothing to draw; that is cached too.
+    """
+    key = figure_key(chart_id, data_version, params)
+    with _lock:
+        entry = _figures.get(key)
+        if entry is not None:
+            _figures.move_to_end(key)
+            _stats['hits'] += 1
+            _stats['saved_seconds'] += entry[2]
+            return entry[0]
+
+    started = time.perf_counter()
+    figure = build()
+    elapsed = time.perf_counter() - started
+    size = figure_nbytes(figure) if figure is not None else 0
+
+    with _lock:
+        _stats['misses'] += 1
+        _stats['build_seconds'] += elapsed
+        if key not in _figures:
+            _figures[key] = (figure, size, elapsed)
+            _stats['bytes'] += size
+            _evict()
+    return figure
+
+
+def figure_cache_stats():
+    """Snapshot of the counters, with the entry count and hit rate"""
+    with _lock:
+        stats = dict(_stats, entries=len(_figures))
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def clear_figure_cache():
+    """Drop every cached figure (counters are kept)"""
+    with _lock:
+        _figures.clear()
+        _stats['bytes'] = 0
@@ -0,0 +1,183 @@
+"""
+JOYFUL BITES GLOBAL FILTERS
+Row bitmaps for the sidebar filters and a bounded cache of filtered results.
+
+Once per data version, a compressed bitmap index (joyful_bites_bitmap) is
+built over every categorical and boolean customer attribute, plus the
+derived age band, registration month and loyalty status. A filter selection
+ORs the bitmaps of the selected values within each attribute and ANDs the
+attributes together, so the number of matching customers (overall or per
+segment) is a popcount, and the matching rows are only materialized once.
+
+Filter selections are canonicalized (values in index order, attributes in a
+fixed order, selections of "everything" dropped), so the same filter set
+always gives the same key whatever order the widgets were touched in. The
+filtered rows and every aggregate computed from them (cube, sketches, column
+projections, top items) are kept in a process-wide LRU keyed on the data
+version and that key, so flipping back to a recent filter set is a lookup.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from joyful_bites_bitmap import build_bitmap_index, select, to_rows
+from joyful_bites_cube import CUBE_DIMENSIONS, CUBE_FLAGS, age_bands
+from joyful_bites_store import nbytes
+
+FILTER_DIMENSIONS = ['city', 'registration_month', 'preferred_channel', 'loyalty_status']
+
+LOYALTY_STATUSES = ['Not enrolled', 'Enrolled, inactive', 'Active']
+
+FILTER_CACHE_MAX_ENTRIES = 256
+FILTER_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# A customer frame restricted to `rows` (ascending positions, so segments stay contiguous)
+FilteredDataset = namedtuple('FilteredDataset', ['frame', 'rows', 'filters', 'data_version'])
+
+# key -> (value, bytes), least recently used first
+_results = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+
+def registration_months(dates):
+    """'YYYY-MM' registration month of each customer (missing dates give a missing month)"""
+    months = np.asarray(dates, dtype='datetime64[M]')
+    observed = np.unique(months[~np.isnat(months)])
+    codes = np.where(np.isnat(months), -1, np.searchsorted(observed, months))
+    return pd.Categorical.from_codes(codes, categories=[str(month) for month in observed])
+
+
+def loyalty_status(enrolled, active):
+    """Loyalty status of each customer, as a categorical of LOYALTY_STATUSES"""
+    codes = np.where(np.asarray(active, dtype=bool), 2, np.asarray(enrolled, dtype=bool).astype(np.int8))
+    return pd.Categorical.from_codes(codes, categories=LOYALTY_STATUSES)
+
+
+def build_filter_index(df):
+    """Bitmap index over the categorical and boolean attributes of a customer frame (filterable ones included)"""
+    columns = {dim: df[dim] for dim in CUBE_DIMENSIONS if dim != 'age_band'}
+    columns['age_band'] = age_bands(df['age'])
+    columns.update({flag: df[flag] for flag in CUBE_FLAGS})
+    columns['registration_month'] = registration_months(df['registration_date'])
+    columns['loyalty_status'] = loyalty_status(df['loyalty_enrolled'], df['loyalty_active'])
+    return build_bitmap_index(columns)
+
+
+def filter_values(index, dimension):
+    """Values of a dimension present in the data, in index order"""
+    return list(index.bitmaps[dimension])
+
+
+def canonical_filters(index, selections):
+    """
+    Canonical, hashable form of a filter selection.
+
+    `selections` maps dimension -> selected values. Empty selections and
+    selections of every value are dropped (they filter nothing), as are
+    values absent from the data. The result is a tuple of
+    (dimension, values) pairs in FILTER_DIMENSIONS order, values in index
+    order; () means no filter.
+    """
+    filters = []
+    for dim in FILTER_DIMENSIONS:
+        selected = set(selections.get(dim) or ())
+        values = tuple(v for v in index.bitmaps[dim] if v in selected)
+        if selected and len(values) < len(index.bitmaps[dim]):
+            filters.append((dim, values))
+    return tuple(filters)
+
+
+def filter_key(filters):
+    """Short stable digest of canonical filters, for data versions and cache keys"""
+    return hashlib.blake2b(repr(filters).encode(), digest_size=8).hexdigest()
+
+
+def select_rows(index, filters):
+    """Ascending positions of the customers matching canonical filters"""
+    selected = select(index, filters)
+    rows = np.arange(index.size) if selected is None else to_rows(selected)
+    rows.flags.writeable = False  # Shared by every session through the result cache
+    return rows
+
+
+def _evict(keep):
+    """Drop least recently used results until the cache is within its bounds (lock held)"""
+    for key in list(_results):
+        if len(_results) <= FILTER_CACHE_MAX_ENTRIES and _stats['bytes'] <= FILTER_CACHE_MAX_BYTES:
+            break
+        if key != keep:
+            _stats['bytes'] -= _results.pop(key)[1]
+            _stats['evictions'] += 1
+
+
+def cached_result(key, build):
+    """The cached value for `key`, calling `build()` only on a miss"""
+    with _lock:
+        entry = _results.get(key)
+        if entry is not None:
+            _results.move_to_end(key)
+            _stats['hits'] += 1
+            return entry[0]
+
+    value = build()
+    size = nbytes(value)
+    with _lock:
+        _stats['misses'] += 1
+        if key not in _results:
+            _results[key] = (value, size)
+            _stats['bytes'] += size
+            _evict(keep=key)
+    return value
+
+
+def filter_dataset(df, index, filters):
+    """`df` restricted to canonical filters (as a FilteredDataset), or `df` itself when nothing is filtered"""
+    if not filters:
+        return df
+    version = df.attrs['data_version']
+    rows = cached_result((version, filters, 'rows'), lambda: select_rows(index, filters))
+    return FilteredDataset(df, rows, filters, f"{version}+{filter_key(filters)}")
+
+
+def filtered_result(dataset, name, build):
+    """A value derived from a filtered dataset (e.g. its cube), from the filtered result cache"""
+    return cached_result((dataset.data_version, name), build)
+
+
+def row_mask(dataset, within=slice(None)):
+    """Boolean mask over the full frame marking the filtered customers (only those inside the `within` row slice)"""
+    start, stop, _ = within.indices(len(dataset.frame))
+    rows = dataset.rows[np.searchsorted(dataset.rows, start):np.searchsorted(dataset.rows, stop)]
+    mask = np.zeros(len(dataset.frame), dtype=bool)
+    mask[rows] = True
+    return mask
+
+
+def filtered_columns(dataset, columns):
+    """The filtered customers' values of just the listed columns (cached)"""
+    columns = tuple(columns)
+    return filtered_result(
+        dataset, ('columns', columns),
+        lambda: dataset.frame[list(columns)].take(dataset.rows).reset_index(drop=True)
+    )
+
+
+def filter_cache_stats():
+    """Snapshot of the counters, with the entry count and hit rate"""
+    with _lock:
+        stats = dict(_stats, entries=len(_results))
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def clear_filter_cache():
+    """Drop every cached result (counters are kept)"""
+    with _lock:
+        _results.clear()
+        _stats['bytes'] = 0
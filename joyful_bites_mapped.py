@@ -0,0 +1,130 @@
+"""
+JOYFUL BITES MAPPED DATASET
+Customer table shared between processes through a memory-mapped Arrow file.
+
+When several Streamlit processes serve the apps on one host, each would
+normally parse the export and hold its own copy of the table. In mapped mode
+the first process to load a version of the export writes the analytics frame
+to an uncompressed Arrow IPC file in `.joyful_bites_cache/`, and every
+process (the dashboard and the persona app alike) maps that file read-only.
+Columns are written as single chunks so they convert to pandas without
+copying: the frame's arrays point into the OS page cache, which holds one
+copy of the data per host, and attaching to an existing file takes
+milliseconds.
+
+A file lock makes concurrent workers wait for one build instead of racing;
+the file is written under a temporary name and renamed into place, so
+readers never see a partial file. Files for older versions of the export are
+removed once a new one is written (processes still mapping them keep their
+mapping).
+"""
+
+import os
+
+from joyful_bites_menu_index import item_lengths
+from joyful_bites_partition import sort_by_segment
+from joyful_bites_schema import ANALYTICS_COLUMNS, read_customers
+from joyful_bites_snapshot import CACHE_DIR_NAME, SNAPSHOT_FORMAT, load_snapshot, source_version
+from joyful_bites_timing import timed
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows: builds aren't serialized, the atomic rename still keeps readers safe
+    HAS_FCNTL = False
+
+
+@timed('load.parse_csv')
+def parse_customer_csv(path):
+    """Parse the raw customer export (without PII columns), laid out contiguously by segment"""
+    df = sort_by_segment(read_customers(path, ANALYTICS_COLUMNS))
+    df['num_menu_items'] = item_lengths(df['top_menu_items'])
+    return df
+
+
+def mapped_path(source_path, version):
+    """Arrow file holding a given version of a source file's analytics frame"""
+    source_path = os.path.abspath(source_path)
+    stem = os.path.basename(source_path)
+    return os.path.join(
+        os.path.dirname(source_path), CACHE_DIR_NAME, f"{stem}.{version}.v{SNAPSHOT_FORMAT}.arrow"
+    )
+
+
+def write_mapped(df, path):
+    """Write a frame as a single-batch Arrow IPC file, atomically"""
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(table), 1))
+    os.replace(tmp_path, path)
+
+
+@timed('load.map_arrow')
+def read_mapped(path, columns=None):
+    """Map an Arrow file and view (some of) its columns as a DataFrame without copying them"""
+    table = pa_ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    return table.to_pandas(split_blocks=True)
+
+
+def _remove_stale(source_path, current):
+    """Delete mapped files of other versions of the same source"""
+    cache_dir = os.path.dirname(current)
+    prefix = os.path.basename(os.path.abspath(source_path)) + '.'
+    for name in os.listdir(cache_dir):
+        # <stem>.<version>.v<format>.arrow, and not the file of another source sharing the prefix
+        rest = name[len(prefix):].split('.') if name.startswith(prefix) else []
+        if len(rest) != 3 or rest[2] != 'arrow' or not rest[1].startswith('v'):
+            continue
+        path = os.path.join(cache_dir, name)
+        if path != current:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Still open on a platform that can't unlink mapped files
+
+
+def load_mapped(source_path, columns=None):
+    """
+    The analytics frame for `source_path` (or just `columns` of it), mapped
+    from the shared Arrow file, building the file first if no process has.
+
+    Falls back to parsing into private memory when pyarrow is missing or the
+    cache directory isn't writable. Raises FileNotFoundError if the source
+    does not exist.
+    """
+    version = source_version(source_path)
+    if not HAS_PYARROW:
+        df = load_snapshot(source_path, parse_customer_csv)
+        return df if columns is None else df[list(columns)]
+
+    path = mapped_path(source_path, version)
+    if not os.path.exists(path):
+        lock_path = f"{path}.lock"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(lock_path, 'w') as lock:
+                if HAS_FCNTL:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                if not os.path.exists(path):  # Another worker may have built it while we waited
+                    write_mapped(load_snapshot(source_path, parse_customer_csv), path)
+                    _remove_stale(source_path, path)
+        except OSError:
+            df = load_snapshot(source_path, parse_customer_csv)
+            return df if columns is None else df[list(columns)]
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass  # Already removed by the worker that waited with us
+
+    return read_mapped(path, columns)
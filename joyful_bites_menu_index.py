@@ -0,0 +1,90 @@
+"""
+JOYFUL BITES MENU ITEM INDEX
+Customer x menu-item sparse index built from the `top_menu_items` JSON column.
+
+Each distinct JSON list is parsed once, then broadcast to customers by category
+code, giving a vocabulary of item names and a CSR matrix with one row per
+customer. "Top items for a set of customers" is then a column sum over those
+rows instead of flattening millions of Python lists.
+"""
+
+import json
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from joyful_bites_timing import timed
+
+MenuItemIndex = namedtuple('MenuItemIndex', ['vocabulary', 'matrix'])
+
+
+def _parse_distinct(menu_json):
+    """Parse each distinct JSON value once; returns (codes, vocabulary, per-value item ids)"""
+    if not isinstance(menu_json.dtype, pd.CategoricalDtype):
+        menu_json = menu_json.astype('category')
+
+    vocabulary = {}
+    value_items = []
+    for raw in menu_json.cat.categories:
+        items = json.loads(raw) if raw else []
+        value_items.append([vocabulary.setdefault(item, len(vocabulary)) for item in items])
+
+    return np.asarray(menu_json.cat.codes), list(vocabulary), value_items
+
+
+@timed('load.menu_index')
+def build_menu_index(menu_json):
+    """Build a MenuItemIndex from a Series of JSON item lists (missing values count as empty)"""
+    codes, vocabulary, value_items = _parse_distinct(menu_json)
+
+    # Per-distinct-value CSR pieces, with an extra empty entry for missing (-1) codes
+    value_lengths = np.array([len(items) for items in value_items] + [0], dtype=np.int64)
+    value_indptr = np.concatenate([[0], np.cumsum(value_lengths)])
+    value_indices = np.array([i for items in value_items for i in items], dtype=np.int32)
+    codes = np.where(codes < 0, len(value_items), codes)
+
+    # Expand to one row per customer: row r holds value_indices[value_indptr[c]:value_indptr[c+1]]
+    row_lengths = value_lengths[codes]
+    indptr = np.concatenate([[0], np.cumsum(row_lengths)])
+    nnz = int(indptr[-1])
+    offsets = np.arange(nnz) - np.repeat(indptr[:-1], row_lengths)
+    indices = value_indices[np.repeat(value_indptr[codes], row_lengths) + offsets]
+
+    matrix = sparse.csr_matrix(
+        (np.ones(nnz, dtype=np.int32), indices, indptr),
+        shape=(len(codes), len(vocabulary)),
+    )
+    return MenuItemIndex(vocabulary, matrix)
+
+
+def item_lengths(menu_json):
+    """Number of items in each customer's list, without building the full index"""
+    codes, _, value_items = _parse_distinct(menu_json)
+    lengths = np.array([len(items) for items in value_items] + [0], dtype=np.int8)
+    return lengths[np.where(codes < 0, len(value_items), codes)]
+
+
+def item_counts(index, rows=None):
+    """
+    Number of customers listing each item, as a Series indexed by item name.
+
+    `rows` selects customers: None for everyone, a slice of contiguous rows, or
+    a boolean mask over rows.
+    """
+    matrix = index.matrix
+    if rows is None:
+        counts = np.asarray(matrix.sum(axis=0)).ravel()
+    elif isinstance(rows, slice):
+        counts = np.asarray(matrix[rows].sum(axis=0)).ravel()
+    else:
+        counts = matrix.T @ np.asarray(rows, dtype=np.int32)
+    return pd.Series(counts, index=index.vocabulary)
+
+
+def top_items(index, rows=None, n=10):
+    """The `n` most-listed items for the selected customers (items with no listings dropped)"""
+    counts = item_counts(index, rows)
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    return counts.head(n)
@@ -9,6 +9,17 @@ import glob
 from PIL import Image
 import io
 
+from joyful_bites_mapped import load_mapped
+from joyful_bites_partition import segment_view, sort_by_segment
+from joyful_bites_schema import read_customers
+from joyful_bites_snapshot import source_version
+
+# Same settings as the dashboard: with JOYFUL_BITES_BACKEND=mapped both apps
+# attach to one memory-mapped copy of the customer table
+DATA_FILE = os.environ.get('JOYFUL_BITES_DATA', 'joyful_bites_customers_5000.csv')
+DATA_BACKEND = os.environ.get('JOYFUL_BITES_BACKEND', 'auto')
+PERSONA_COLUMNS = ['segment', 'avg_order_value', 'visit_frequency_month']
+
 
 # Image compression helper
 def compress_image_if_needed(image_bytes, max_size_mb=4.5):
@@ -186,12 +197,23 @@ st.sidebar.markdown(f"*{persona_info['tagline']}*")
 st.sidebar.markdown(persona_info['description'])
 
 # Load customer data for context
-@st.cache_data
+@st.cache_data(max_entries=2)
+def load_csv_data(path, data_version):
+    """Parse the columns used here from a specific version of the CSV export (the version is part of the cache key)"""
+    return sort_by_segment(read_customers(path, columns=PERSONA_COLUMNS))
+
+@st.cache_resource(max_entries=2)
+def attach_mapped_data(path, data_version):
+    """Columns used here, mapped from the Arrow file shared with the dashboard (one copy per host, not per session)"""
+    return load_mapped(path, columns=PERSONA_COLUMNS)
+
 def load_data():
     """Load customer data"""
     try:
-        df = pd.read_csv('joyful_bites_customers_5000.csv')
-        return df
+        version = source_version(DATA_FILE)
+        if DATA_BACKEND == 'mapped':
+            return attach_mapped_data(DATA_FILE, version)
+        return load_csv_data(DATA_FILE, version)
     except:
         return None
 
@@ -199,7 +221,7 @@ df = load_data()
 
 # Get segment statistics
 if df is not None:
-    segment_df = df[df['segment'] == selected_persona]
+    segment_df = segment_view(df, selected_persona)
     
     st.sidebar.markdown("---")
     st.sidebar.markdown("**Segment Statistics:**")
@@ -0,0 +1,85 @@
+"""
+JOYFUL BITES SEGMENT REGRESSION
+Per-segment least-squares trendlines from sufficient statistics.
+
+A simple linear fit only needs n, Σx, Σy, Σx², Σxy (and Σy² for R²) per
+segment. Those sums are additive, so stats for new rows can be folded into
+existing ones without revisiting old rows, and a fitted line is drawn as a
+two-point trace instead of one fitted value per customer. This replaces
+plotly's `trendline='ols'`, which imports statsmodels and refits on every
+render.
+"""
+
+import numpy as np
+import pandas as pd
+
+STAT_COLUMNS = ['n', 'sx', 'sy', 'sxx', 'sxy', 'syy', 'x_min', 'x_max']
+
+
+def regression_stats(df, x, y):
+    """Sufficient statistics of y ~ x per segment (rows with a missing x or y are skipped)"""
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    valid = ~(np.isnan(xs) | np.isnan(ys))
+    frame = pd.DataFrame({
+        'segment': df['segment'].to_numpy()[valid] if not valid.all() else df['segment'],
+        'n': 1.0,
+        'sx': xs[valid],
+        'sy': ys[valid],
+        'sxx': xs[valid] ** 2,
+        'sxy': xs[valid] * ys[valid],
+        'syy': ys[valid] ** 2,
+        'x_min': xs[valid],
+        'x_max': xs[valid],
+    })
+    grouped = frame.groupby('segment', observed=True, sort=True)
+    stats = grouped[STAT_COLUMNS[:6]].sum()
+    stats['x_min'] = grouped['x_min'].min()
+    stats['x_max'] = grouped['x_max'].max()
+    return stats
+
+
+def combine_stats(*stats, sign=None):
+    """
+    Fold statistics from separate batches of rows into one set.
+
+    `sign` optionally gives +1/-1 per batch, so `combine_stats(stats, old, new,
+    sign=[1, -1, 1])` swaps a set of rows' old values for new ones. Retracted
+    batches only subtract from the sums: the x range is the range of the
+    added batches, so callers must recompute when a retracted row was at its
+    edge. Segments left with no rows are dropped.
+    """
+    if sign is None:
+        sign = [1] * len(stats)
+    stacked = pd.concat([
+        batch if s > 0 else batch.assign(**{col: -batch[col] for col in STAT_COLUMNS[:6]}, x_min=np.nan, x_max=np.nan)
+        for batch, s in zip(stats, sign)
+    ])
+    grouped = stacked.groupby(level=0, observed=True, sort=True)
+    combined = grouped[STAT_COLUMNS[:6]].sum()
+    combined['x_min'] = grouped['x_min'].min()
+    combined['x_max'] = grouped['x_max'].max()
+    return combined[combined['n'] > 0]
+
+
+def fit_lines(stats):
+    """Slope, intercept and R² per segment from the sufficient statistics"""
+    n = stats['n']
+    cov = n * stats['sxy'] - stats['sx'] * stats['sy']
+    var_x = n * stats['sxx'] - stats['sx'] ** 2
+    var_y = n * stats['syy'] - stats['sy'] ** 2
+    slope = cov / var_x.where(var_x > 0)
+    return pd.DataFrame({
+        'n': n.astype(np.int64),
+        'slope': slope,
+        'intercept': (stats['sy'] - slope * stats['sx']) / n,
+        'r2': cov ** 2 / (var_x * var_y).where((var_x > 0) & (var_y > 0)),
+        'x_min': stats['x_min'],
+        'x_max': stats['x_max'],
+    })
+
+
+def trendline_points(line):
+    """([x0, x1], [y0, y1]) endpoints of one fitted line over the observed x range"""
+    xs = np.array([line['x_min'], line['x_max']])
+    return xs, line['intercept'] + line['slope'] * xs
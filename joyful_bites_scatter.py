@@ -0,0 +1,78 @@
+"""
+JOYFUL BITES SCATTER SAMPLING
+Bounded-size point sets for customer-level scatter plots.
+
+Every plotted point is serialized into the page, so the browser payload grows
+with the customer count. Scatters are therefore drawn with WebGL once they
+pass SCATTER_WEBGL_MIN_POINTS, and past SCATTER_MAX_POINTS the points are
+downsampled per segment:
+
+- each segment keeps a share of the budget proportional to its size, so the
+  relative density of the segments is preserved
+- customers outside a segment's Tukey fences on either axis (the points that
+  catch the eye) are kept first
+- the rest of the budget is a uniform random sample of the remaining rows,
+  seeded so reruns draw the same points
+
+Fitted trendlines are computed from all rows (joyful_bites_regression), not
+from the sample.
+"""
+
+import numpy as np
+
+SCATTER_WEBGL_MIN_POINTS = 1000
+SCATTER_MAX_POINTS = 10_000
+
+SAMPLE_SEED = 0
+
+
+def render_mode(n_points):
+    """Plotly render mode for a scatter of `n_points`: SVG for small plots, WebGL otherwise"""
+    return 'webgl' if n_points >= SCATTER_WEBGL_MIN_POINTS else 'svg'
+
+
+def _outliers(values):
+    """Mask of values outside the 1.5 x IQR fences"""
+    q1, q3 = np.nanquantile(values, [0.25, 0.75])
+    spread = 1.5 * (q3 - q1)
+    return (values < q1 - spread) | (values > q3 + spread)
+
+
+def _sample_rows(rng, rows, k):
+    """k of `rows` chosen uniformly without replacement (all of them if k >= len(rows))"""
+    if k >= len(rows):
+        return rows
+    return rng.choice(rows, size=k, replace=False)
+
+
+def sample_points(points, x, y, max_points=SCATTER_MAX_POINTS):
+    """
+    At most `max_points` rows of `points` for plotting `y` against `x`.
+
+    `points` must be laid out by segment (joyful_bites_partition); rows are
+    returned in their original order. Frames already under the budget are
+    returned as they are.
+    """
+    if len(points) <= max_points:
+        return points
+
+    rng = np.random.default_rng(SAMPLE_SEED)
+    codes = np.asarray(points['segment'].cat.codes)
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(points)]])
+
+    chosen = []
+    for start, end in zip(starts, ends):
+        quota = max(1, int(max_points * (end - start) / len(points)))
+        xs = points[x].to_numpy(dtype=np.float64)[start:end]
+        ys = points[y].to_numpy(dtype=np.float64)[start:end]
+        outlier = _outliers(xs) | _outliers(ys)
+
+        outlier_rows = np.flatnonzero(outlier) + start
+        kept = _sample_rows(rng, outlier_rows, quota)
+        rest = _sample_rows(rng, np.flatnonzero(~outlier) + start, quota - len(kept))
+        chosen.append(kept)
+        chosen.append(rest)
+
+    return points.iloc[np.sort(np.concatenate(chosen))]
@@ -0,0 +1,120 @@
+"""
+JOYFUL BITES QUANTILE SKETCHES
+Mergeable t-digest quantile sketches for the distribution metrics.
+
+A t-digest summarizes a column as a few hundred weighted centroids, small near
+the tails and larger around the median, so percentiles are accurate where
+they matter and the sketch size doesn't depend on the row count. Digests of
+separate chunks, partitions or processes merge into the digest of their
+union, so they are built during load alongside the other aggregates and
+percentile queries never touch customer rows.
+
+This is the batch ("merging") form of the t-digest: values or centroids are
+sorted once and cut into centroids with the k2 scale function, fully
+vectorized.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+SKETCH_MEASURES = ['avg_order_value', 'lifetime_value', 'total_spent', 'promo_engagement_rate']
+
+# Roughly twice the number of centroids kept per digest. On 1M lognormal
+# values the 1st-99th percentiles land within 0.1% of their true rank; as
+# values that is within ~0.3% of the exact percentile, up to ~0.6% after a
+# few hundred sequential merges
+COMPRESSION = 800
+
+Digest = namedtuple('Digest', ['means', 'weights', 'min', 'max'])
+
+
+def k_scale(total, compression=COMPRESSION):
+    """
+    Multiplier of the k2 (logit) scale for a digest of `total` weight.
+
+    Centroid size shrinks in proportion to q(1 - q), so the tails stay
+    accurate; the normalizer keeps the centroid count near `compression` / 2
+    whatever the row count.
+    """
+    return compression / (4 * np.log(max(total, compression) / compression) + 24)
+
+
+def _compress(means, weights, compression):
+    """Cut sorted (mean, weight) pairs into centroids no wider than 1 in k2 space"""
+    total = weights.sum()
+    q_end = np.cumsum(weights) / total
+    q_mid = np.clip(q_end - weights / (2 * total), 1e-12, 1 - 1e-12)
+    k = k_scale(total, compression) * np.log(q_mid / (1 - q_mid))
+    _, bucket = np.unique(np.floor(k), return_inverse=True)
+    bucket_weights = np.bincount(bucket, weights=weights)
+    bucket_means = np.bincount(bucket, weights=means * weights) / bucket_weights
+    return bucket_means, bucket_weights
+
+
+def digest(values, compression=COMPRESSION):
+    """Digest of a sample (missing values skipped)"""
+    values = np.asarray(values, dtype=np.float64)
+    values = np.sort(values[~np.isnan(values)])
+    if not len(values):
+        return Digest(np.array([]), np.array([]), np.nan, np.nan)
+    means, weights = _compress(values, np.ones(len(values)), compression)
+    return Digest(means, weights, values[0], values[-1])
+
+
+def merge_digests(*digests, compression=COMPRESSION):
+    """Digest of the union of the samples behind `digests`"""
+    digests = [d for d in digests if len(d.weights)]
+    if not digests:
+        return Digest(np.array([]), np.array([]), np.nan, np.nan)
+    means = np.concatenate([d.means for d in digests])
+    weights = np.concatenate([d.weights for d in digests])
+    order = np.argsort(means, kind='stable')
+    means, weights = _compress(means[order], weights[order], compression)
+    return Digest(means, weights, min(d.min for d in digests), max(d.max for d in digests))
+
+
+def count(d):
+    """Number of values summarized by a digest"""
+    return int(round(d.weights.sum()))
+
+
+def quantile(d, q):
+    """Approximate quantile(s) `q` (scalar or array in [0, 1]) of a digest"""
+    if not len(d.weights):
+        return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+    total = d.weights.sum()
+    centers = np.cumsum(d.weights) - d.weights / 2
+    # Centroids are pinned at their centers of mass; the extremes are exact
+    positions = np.concatenate([[0.0], centers, [total]])
+    values = np.concatenate([[d.min], d.means, [d.max]])
+    return np.interp(np.asarray(q, dtype=np.float64) * total, positions, values)
+
+
+def mean(d):
+    """Exact mean of a digest's values (centroid means are exact means of their members)"""
+    return float((d.means * d.weights).sum() / d.weights.sum()) if len(d.weights) else np.nan
+
+
+def segment_digests(df, measures=SKETCH_MEASURES, compression=COMPRESSION):
+    """{measure: {segment: Digest}} for a customer frame"""
+    codes = np.asarray(df['segment'].cat.codes)
+    sketches = {m: {} for m in measures}
+    for code, segment in enumerate(df['segment'].cat.categories):
+        rows = codes == code
+        if not rows.any():
+            continue
+        for m in measures:
+            sketches[m][segment] = digest(df[m].to_numpy(dtype=np.float64)[rows], compression)
+    return sketches
+
+
+def merge_segment_digests(*sketch_sets, compression=COMPRESSION):
+    """Merge several {measure: {segment: Digest}} sets"""
+    merged = {}
+    for sketches in sketch_sets:
+        for m, by_segment in sketches.items():
+            for segment, d in by_segment.items():
+                previous = merged.setdefault(m, {}).get(segment)
+                merged[m][segment] = d if previous is None else merge_digests(previous, d, compression=compression)
+    return merged
@@ -0,0 +1,167 @@
+"""
+JOYFUL BITES DATA SNAPSHOTS
+Columnar snapshot cache for the customer export.
+
+The first load of a CSV export converts it to a Parquet snapshot stored in
+`.joyful_bites_cache/`. Later cold starts read the snapshot instead of
+re-parsing the CSV. Snapshots are keyed on the source file's size, mtime and
+content hash, so a replaced export is never served stale.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from joyful_bites_timing import timed
+
+try:
+    import pyarrow  # noqa: F401  (required by DataFrame.to_parquet)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+CACHE_DIR_NAME = ".joyful_bites_cache"
+
+# Bump whenever the loader changes what ends up in the snapshot
+SNAPSHOT_FORMAT = 5
+
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+# (path, size, mtime_ns) -> content hash, so reruns only stat the file
+_version_memo = {}
+
+
+def _cache_paths(source_path):
+    """Return (snapshot, manifest) paths for a source file"""
+    source_path = os.path.abspath(source_path)
+    cache_dir = os.path.join(os.path.dirname(source_path), CACHE_DIR_NAME)
+    stem = os.path.basename(source_path)
+    return (
+        os.path.join(cache_dir, f"{stem}.parquet"),
+        os.path.join(cache_dir, f"{stem}.manifest.json"),
+    )
+
+
+def _read_manifest(manifest_path):
+    """Read a snapshot manifest, or None if missing/corrupt"""
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def file_digest(path):
+    """SHA-256 of a file's content, read in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _content_hash(path):
+    """Full content hash of a source file, reusing the memo or manifest when the file is unchanged"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    if key not in _version_memo:
+        _, manifest_path = _cache_paths(path)
+        manifest = _read_manifest(manifest_path)
+        if (manifest
+                and manifest.get('size') == stat.st_size
+                and manifest.get('mtime_ns') == stat.st_mtime_ns):
+            _version_memo[key] = manifest['sha256']
+        else:
+            _version_memo[key] = file_digest(path)
+
+    return _version_memo[key], stat
+
+
+def source_version(path):
+    """
+    Return a content-based version string for a source file.
+
+    While the file's size and mtime are unchanged this is a single stat call;
+    the content is only re-hashed after the file changes on disk.
+    Raises FileNotFoundError if the file does not exist.
+    """
+    return _content_hash(path)[0][:16]
+
+
+def _tmp_path(path):
+    """Temp file next to `path`, unique to this process and thread"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _write_atomic(df, snapshot_path):
+    """Write a Parquet snapshot via a temp file so readers never see a partial file"""
+    tmp_path = _tmp_path(snapshot_path)
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, snapshot_path)
+
+
+def _write_manifest(manifest_path, source_path, stat, content_hash, rows):
+    """Record which source file content a snapshot was built from (atomically, like the snapshot)"""
+    tmp_path = _tmp_path(manifest_path)
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'source': os.path.basename(source_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': content_hash,
+            'format': SNAPSHOT_FORMAT,
+            'rows': rows,
+        }, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+@timed('load.snapshot')
+def load_snapshot(source_path, build_fn):
+    """
+    Load a frame for `source_path`, served from its columnar snapshot when fresh.
+
+    `build_fn(source_path)` parses the source into a DataFrame; it only runs when
+    no snapshot matches the current file content. Falls back to calling
+    `build_fn` directly when pyarrow is not installed or the cache directory is
+    not writable.
+    """
+    content_hash, stat = _content_hash(source_path)
+
+    if not HAS_PYARROW:
+        return build_fn(source_path)
+
+    snapshot_path, manifest_path = _cache_paths(source_path)
+    manifest = _read_manifest(manifest_path)
+
+    if (manifest
+            and manifest.get('sha256') == content_hash
+            and manifest.get('format') == SNAPSHOT_FORMAT
+            and os.path.exists(snapshot_path)):
+        try:
+            df = pd.read_parquet(snapshot_path)
+        except (OSError, ValueError):
+            df = None  # Corrupt snapshot - rebuild below
+        if df is not None:
+            if manifest.get('mtime_ns') != stat.st_mtime_ns:
+                # File was touched but not changed; record the new mtime so
+                # other processes skip re-hashing it
+                try:
+                    _write_manifest(manifest_path, source_path, stat, content_hash, len(df))
+                except OSError:
+                    pass
+            return df
+
+    df = build_fn(source_path)
+
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        _write_atomic(df, snapshot_path)
+        _write_manifest(manifest_path, source_path, stat, content_hash, len(df))
+    except OSError:
+        pass  # Read-only deployments still work, just without the snapshot
+
+    return df
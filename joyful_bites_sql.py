@@ -0,0 +1,363 @@
+"""
+JOYFUL BITES SQL BACKEND
+Optional DuckDB query engine for customer exports too large for pandas.
+
+Instead of loading the customer table into every Streamlit process, the export
+is converted once (per data version) to a Parquet file and each dashboard
+aggregate is pushed down as a query over it. Only aggregated results - the
+segment cube, top menu items, box plot and trendline statistics, cohort
+counts, quantile sketch centroids and a bounded scatter sample - cross into
+Python; no query returns a full column. Results have the same layout as the
+pandas path, so the pages render identically whichever backend produced
+them.
+"""
+
+import glob
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from joyful_bites_boxplot import BOX_STAT_COLUMNS, MAX_OUTLIERS
+from joyful_bites_cohort import cohorts_from_groups
+from joyful_bites_cube import (
+    AGE_BINS, AGE_LABELS, CUBE_DIMENSIONS, CUBE_FLAGS, CUBE_MEASURES, combine_cubes,
+)
+from joyful_bites_partition import sort_by_segment
+from joyful_bites_scatter import SAMPLE_SEED, SCATTER_MAX_POINTS
+from joyful_bites_schema import ANALYTICS_COLUMNS, CUSTOMER_SCHEMA, SEGMENTS
+from joyful_bites_sketch import COMPRESSION, SKETCH_MEASURES, Digest, k_scale
+from joyful_bites_snapshot import CACHE_DIR_NAME, SNAPSHOT_FORMAT
+
+try:
+    import duckdb
+    HAS_DUCKDB = True
+except ImportError:
+    HAS_DUCKDB = False
+
+# What the dashboard passes to its pages in place of a DataFrame
+SqlDataset = namedtuple('SqlDataset', ['path', 'data_version'])
+
+DUCKDB_TYPES = {
+    'int8': 'TINYINT',
+    'int16': 'SMALLINT',
+    'float32': 'FLOAT',
+    'float64': 'DOUBLE',
+    'bool': 'BOOLEAN',
+    'datetime64[ns]': 'DATE',
+}
+
+
+def _duckdb_type(dtype):
+    """DuckDB column type for a schema dtype (text and categoricals are VARCHAR)"""
+    if isinstance(dtype, CategoricalDtype):
+        return 'VARCHAR'
+    return DUCKDB_TYPES.get(str(dtype), 'VARCHAR')
+
+
+def _connect():
+    """Fresh in-memory connection; cheap, and safe to use from any Streamlit thread"""
+    if not HAS_DUCKDB:
+        raise ImportError("The SQL backend requires duckdb: pip install duckdb")
+    return duckdb.connect()
+
+
+def _quote(value):
+    """SQL string literal"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def columnar_source(path, data_version):
+    """
+    Parquet file the SQL backend queries for `path`.
+
+    CSV exports (optionally .gz/.zst compressed) are converted once per data
+    version into the snapshot cache directory, with the declared schema's column
+    types and without the PII columns; older conversions of the same export are
+    removed. Parquet inputs are queried in place.
+    """
+    if path.endswith('.parquet'):
+        return path
+
+    source = os.path.abspath(path)
+    cache_dir = os.path.join(os.path.dirname(source), CACHE_DIR_NAME)
+    stem = os.path.basename(source)
+    target = os.path.join(cache_dir, f"{stem}.{data_version}.v{SNAPSHOT_FORMAT}.sql.parquet")
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(cache_dir, exist_ok=True)
+    columns = ', '.join(f"{_quote(col)}: {_quote(_duckdb_type(dtype))}" for col, dtype in CUSTOMER_SCHEMA.items())
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with _connect() as con:
+        con.execute(
+            f"COPY (SELECT {', '.join(ANALYTICS_COLUMNS)} FROM read_csv({_quote(source)}, header = true, columns = {{{columns}}})) "
+            f"TO {_quote(tmp_path)} (FORMAT parquet)"
+        )
+    os.replace(tmp_path, target)
+
+    for stale in glob.glob(os.path.join(cache_dir, f"{glob.escape(stem)}.*.sql.parquet")):
+        if stale != target:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return target
+
+
+def _age_band_sql():
+    """CASE expression matching the pandas age bands (right-inclusive bins)"""
+    cases = ' '.join(
+        f"WHEN age > {lo} AND age <= {hi} THEN {_quote(label)}"
+        for lo, hi, label in zip(AGE_BINS[:-1], AGE_BINS[1:], AGE_LABELS)
+    )
+    return f"CASE {cases} END"
+
+
+def query_cube(parquet_path):
+    """Build the segment cube with a GROUP BY pushed down to the Parquet file"""
+    dims = [f"{_age_band_sql()} AS age_band" if dim == 'age_band' else dim for dim in CUBE_DIMENSIONS]
+    values = ['COUNT(*) AS count']
+    for m in CUBE_MEASURES:
+        values.append(f"SUM({m}::DOUBLE) AS {m}_sum")
+        values.append(f"SUM({m}::DOUBLE * {m}::DOUBLE) AS {m}_sumsq")
+    for f in CUBE_FLAGS:
+        values.append(f"SUM({f}::BIGINT) AS {f}_count")
+
+    sql = (
+        f"SELECT {', '.join(dims + values)} FROM read_parquet({_quote(parquet_path)}) "
+        f"GROUP BY ALL"
+    )
+    with _connect() as con:
+        cells = con.execute(sql).fetchdf()
+
+    # Same dimension dtypes as the pandas cube, so roll-ups order identically
+    for dim in CUBE_DIMENSIONS:
+        dtype = CUSTOMER_SCHEMA.get(dim)
+        if dim == 'age_band':
+            dtype = CategoricalDtype(AGE_LABELS, ordered=True)
+        elif not isinstance(dtype, CategoricalDtype):
+            dtype = 'category'
+        cells[dim] = cells[dim].astype(dtype)
+    return combine_cubes(cells)
+
+
+def query_top_items(parquet_path, segment, n=10):
+    """Most-listed menu items for one segment, unnested from the JSON lists in SQL"""
+    sql = (
+        "SELECT item, COUNT(*) AS customers FROM ("
+        "  SELECT unnest(from_json(top_menu_items, '[\"VARCHAR\"]')) AS item"
+        f"  FROM read_parquet({_quote(parquet_path)}) WHERE segment = ?"
+        ") GROUP BY item ORDER BY customers DESC, item LIMIT ?"
+    )
+    with _connect() as con:
+        result = con.execute(sql, [segment, int(n)]).fetchdf()
+    return pd.Series(result['customers'].to_numpy(), index=result['item'].tolist())
+
+
+def _source(parquet_path):
+    return f"read_parquet({_quote(parquet_path)})"
+
+
+def _fraction(p, n):
+    """quantile_cont() fraction hitting plotly's 'linear' quantile p (numpy's 'hazen') of n values"""
+    return min(max((p * n - 0.5) / (n - 1), 0.0), 1.0) if n > 1 else 0.0
+
+
+def query_box_stats(parquet_path, column, max_outliers=MAX_OUTLIERS):
+    """
+    Per-segment box plot statistics of a column, computed in SQL.
+
+    Same statistics as joyful_bites_boxplot.segment_box_stats: quartiles from
+    quantile_cont() at fractions matching plotly's quartile method, whiskers
+    and the outlier count from one more scan, and the capped outlier sample
+    picked by rank, so only the statistics cross into Python.
+    """
+    source = _source(parquet_path)
+    value = f"{column}::DOUBLE"
+    stats = {}
+    with _connect() as con:
+        groups = con.execute(
+            f"SELECT segment, COUNT({value}), AVG({value}), STDDEV_POP({value}) FROM {source} "
+            f"WHERE segment IS NOT NULL GROUP BY segment"
+        ).fetchall()
+        moments = {segment: rest for segment, *rest in groups}
+
+        for segment in SEGMENTS:
+            if segment not in moments:
+                continue
+            n, mean, sd = moments[segment]
+            if not n:
+                stats[segment] = dict.fromkeys(BOX_STAT_COLUMNS, np.nan) | {'n': 0, 'outliers': np.array([])}
+                continue
+
+            fractions = [_fraction(p, n) for p in (0.25, 0.5, 0.75)]
+            q1, median, q3 = con.execute(
+                f"SELECT quantile_cont({value}, {fractions!r}) FROM {source} WHERE segment = ?", [segment]
+            ).fetchone()[0]
+            spread = 1.5 * (q3 - q1)
+            low, high = q1 - spread, q3 + spread
+
+            lowerfence, upperfence, n_outliers = con.execute(
+                "SELECT MIN(v) FILTER (WHERE v >= $low), MAX(v) FILTER (WHERE v <= $high), "
+                "COUNT(*) FILTER (WHERE v < $low OR v > $high) "
+                f"FROM (SELECT {value} AS v FROM {source} WHERE segment = $segment)",
+                {'low': low, 'high': high, 'segment': segment}
+            ).fetchone()
+
+            # Evenly spaced ranks (extremes included) when there are more outliers than we draw
+            picked = np.linspace(0, n_outliers - 1, min(n_outliers, max_outliers)).round().astype(int)
+            outliers = con.execute(
+                f"SELECT v FROM (SELECT {value} AS v FROM {source} WHERE segment = $segment) "
+                "WHERE v < $low OR v > $high QUALIFY list_contains($picked, row_number() OVER (ORDER BY v) - 1) "
+                "ORDER BY v",
+                {'low': low, 'high': high, 'segment': segment, 'picked': picked.tolist()}
+            ).fetchnumpy()['v'] if n_outliers else np.array([])
+
+            stats[segment] = {
+                'n': n,
+                'q1': q1,
+                'median': median,
+                'q3': q3,
+                'lowerfence': lowerfence,
+                'upperfence': upperfence,
+                'mean': mean,
+                'sd': sd,
+                'outliers': np.asarray(outliers, dtype=np.float64),
+            }
+    return pd.DataFrame.from_dict(stats, orient='index')
+
+
+def _by_segment(result):
+    """Index a per-segment query result by segment, in segment order (as groupby would)"""
+    result['segment'] = result['segment'].astype(CUSTOMER_SCHEMA['segment'])
+    return result.dropna(subset=['segment']).sort_values('segment').set_index('segment')
+
+
+def query_regression_stats(parquet_path, x, y):
+    """Sufficient statistics of y ~ x per segment with a GROUP BY (see joyful_bites_regression)"""
+    sql = (
+        "SELECT segment, COUNT(*)::DOUBLE AS n, SUM(x) AS sx, SUM(y) AS sy, SUM(x * x) AS sxx, "
+        "SUM(x * y) AS sxy, SUM(y * y) AS syy, MIN(x) AS x_min, MAX(x) AS x_max "
+        f"FROM (SELECT segment, {x}::DOUBLE AS x, {y}::DOUBLE AS y FROM {_source(parquet_path)}) "
+        "WHERE segment IS NOT NULL AND x IS NOT NULL AND y IS NOT NULL GROUP BY segment"
+    )
+    with _connect() as con:
+        return _by_segment(con.execute(sql).fetchdf())
+
+
+def query_scatter_points(parquet_path, x, y, max_points=SCATTER_MAX_POINTS):
+    """
+    Points to draw for a scatter of y on x, and the number of customers they stand for.
+
+    Below `max_points` every customer is returned, laid out by segment. Above
+    it, each segment gets a share of the budget proportional to its size,
+    filled first with customers outside the segment's Tukey fences on either
+    axis and then with the rest, each drawn with a seeded reservoir sample in
+    SQL (the same scheme as joyful_bites_scatter.sample_points).
+    """
+    source = _source(parquet_path)
+    with _connect() as con:
+        sizes = dict(con.execute(f"SELECT segment, COUNT(*) FROM {source} GROUP BY segment").fetchall())
+        customers = sum(sizes.values())
+        if customers <= max_points:
+            points = con.execute(f"SELECT segment, {x}, {y} FROM {source}").fetchdf()
+            points['segment'] = points['segment'].astype(CUSTOMER_SCHEMA['segment'])
+            return sort_by_segment(points), customers
+
+        samples = []
+        for segment in SEGMENTS:
+            if not sizes.get(segment):
+                continue
+            quota = max(1, int(max_points * sizes[segment] / customers))
+            (x_q1, x_q3), (y_q1, y_q3) = con.execute(
+                f"SELECT quantile_cont({x}, [0.25, 0.75]), quantile_cont({y}, [0.25, 0.75]) FROM {source} WHERE segment = ?",
+                [segment]
+            ).fetchone()
+            x_spread, y_spread = 1.5 * (x_q3 - x_q1), 1.5 * (y_q3 - y_q1)
+            outlier = (
+                f"COALESCE({x} < {x_q1 - x_spread!r} OR {x} > {x_q3 + x_spread!r} "
+                f"OR {y} < {y_q1 - y_spread!r} OR {y} > {y_q3 + y_spread!r}, FALSE)"
+            )
+            for condition in (outlier, f"NOT {outlier}"):
+                if quota <= 0:
+                    break
+                sample = con.execute(
+                    f"SELECT segment, {x}, {y} FROM (SELECT segment, {x}, {y} FROM {source} WHERE segment = ? AND {condition}) "
+                    f"USING SAMPLE reservoir({int(quota)} ROWS) REPEATABLE ({SAMPLE_SEED})",
+                    [segment]
+                ).fetchdf()
+                samples.append(sample)
+                quota -= len(sample)
+
+    points = pd.concat(samples, ignore_index=True)
+    points['segment'] = points['segment'].astype(CUSTOMER_SCHEMA['segment'])
+    return sort_by_segment(points), customers
+
+
+def query_cohort_groups(parquet_path):
+    """
+    Cohort matrices with the per-customer grouping done by a GROUP BY (see joyful_bites_cohort).
+
+    Customers are grouped by segment, registration month and last active
+    offset; only the group counts and monthly spend cross into Python.
+    """
+    month = "(year({0}) - 1970) * 12 + month({0}) - 1"
+    sql = (
+        "SELECT segment, registered_month, last_offset, COUNT(*) AS customers, "
+        "SUM(total_spent / (last_offset + 1)) AS spend, MAX(last_month) AS last_month FROM ("
+        "  SELECT *, LEAST(GREATEST(last_month - registered_month, 0), GREATEST(tenure_months, 0)) AS last_offset FROM ("
+        f"    SELECT segment, tenure_months, total_spent::DOUBLE AS total_spent, {month.format('registration_date')} AS registered_month,"
+        f"      COALESCE({month.format('last_order_date')}, {month.format('registration_date')}) AS last_month"
+        f"    FROM {_source(parquet_path)} WHERE registration_date IS NOT NULL AND segment IN ({', '.join(map(_quote, SEGMENTS))})"
+        ")) GROUP BY ALL"
+    )
+    with _connect() as con:
+        groups = con.execute(sql).fetchnumpy()
+    codes = pd.Categorical(groups['segment'], categories=SEGMENTS).codes
+    return cohorts_from_groups(
+        SEGMENTS, np.asarray(codes, dtype=np.int64),
+        np.asarray(groups['registered_month'], dtype=np.int64),
+        np.asarray(groups['last_offset'], dtype=np.int64),
+        np.asarray(groups['customers'], dtype=np.float64),
+        np.asarray(groups['spend'], dtype=np.float64),
+        int(groups['last_month'].max()) if len(codes) else None,
+    )
+
+
+def query_digests(parquet_path, measures=SKETCH_MEASURES, compression=COMPRESSION):
+    """
+    {measure: {segment: Digest}} built in SQL.
+
+    Each segment's values are ranked with a window function and cut into
+    centroids with the same k2 scale as joyful_bites_sketch.digest, so only
+    the centroids cross into Python.
+    """
+    source = _source(parquet_path)
+    sketches = {m: {} for m in measures}
+    with _connect() as con:
+        for m in measures:
+            counts = dict(con.execute(
+                f"SELECT segment, COUNT({m}) FROM {source} WHERE segment IS NOT NULL GROUP BY segment"
+            ).fetchall())
+            segments = [segment for segment in SEGMENTS if counts.get(segment)]
+            if not segments:
+                continue
+            scale = ' '.join(f"WHEN {_quote(s)} THEN {float(k_scale(counts[s], compression))!r}" for s in segments)
+            n = "COUNT(*) OVER (PARTITION BY segment)::DOUBLE"
+            # Centroid midpoint quantile, in the same order of operations as the NumPy path so buckets match
+            q = f"LEAST(GREATEST(row_number() OVER (PARTITION BY segment ORDER BY {m}) / {n} - 1 / (2 * {n}), 1e-12), 1 - 1e-12)"
+            centroids = con.execute(
+                "SELECT segment, bucket, AVG(v) AS mean, COUNT(*) AS weight, MIN(v) AS lo, MAX(v) AS hi FROM ("
+                f"  SELECT segment, {m}::DOUBLE AS v, FLOOR((CASE segment {scale} END) * LN(q / (1 - q))) AS bucket FROM ("
+                f"    SELECT segment, {m}, {q} AS q FROM {source} WHERE {m} IS NOT NULL AND segment IN ({', '.join(map(_quote, segments))})"
+                ")) GROUP BY segment, bucket ORDER BY segment, bucket"
+            ).fetchdf()
+            for segment, cells in centroids.groupby('segment', sort=False):
+                sketches[m][segment] = Digest(
+                    cells['mean'].to_numpy(), cells['weight'].to_numpy(dtype=np.float64),
+                    cells['lo'].iloc[0], cells['hi'].iloc[-1],
+                )
+    return sketches
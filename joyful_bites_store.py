@@ -0,0 +1,144 @@
+"""
+JOYFUL BITES SHARED STORE
+Process-wide, read-only store for the loaded dataset and its derived indexes.
+
+`@st.cache_data` hands every caller its own unpickled copy of a cached value,
+so each session viewing the dashboard holds a private copy of the customer
+table. Values kept here are built once per data version and the same object
+is handed to every session, so concurrent viewers share one copy.
+
+Shared values must not be modified. DataFrames are protected by pandas'
+copy-on-write (a caller's changes land in its own copy). It is the default
+from pandas 3; importing this module does not change pandas options, so on
+older releases the app using the store switches it on at startup, as the
+dashboard does. NumPy arrays, including the ones inside sparse matrices,
+are made read-only when stored.
+The store is bounded by STORE_MAX_BYTES: least recently used values are
+dropped when it is over budget (sessions still holding them keep them alive
+until they finish), except pinned ones such as the dataset itself, and the
+sizes are reported for the sidebar.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+STORE_MAX_BYTES = int(os.environ.get('JOYFUL_BITES_STORE_MB', 2048)) * 1024 * 1024
+
+StoreEntry = namedtuple('StoreEntry', ['version', 'value', 'nbytes', 'pinned'])
+
+# name -> StoreEntry, least recently used first
+_entries = OrderedDict()
+_lock = threading.Lock()
+_build_locks = {}
+_stats = {'hits': 0, 'builds': 0, 'evictions': 0, 'bytes': 0}
+
+
+def nbytes(value):
+    """Approximate memory held by a stored value"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if sparse.issparse(value):
+        return sum(a.nbytes for a in (value.data, value.indices, value.indptr))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(nbytes(k) + nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Make the NumPy arrays in a value read-only (DataFrames rely on copy-on-write)"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif sparse.issparse(value):
+        for array in (value.data, value.indices, value.indptr):
+            array.flags.writeable = False
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+
+
+def _evict(keep):
+    """Drop least recently used values until the store is within budget, never dropping `keep` or pinned values (lock held)"""
+    for name in list(_entries):
+        if _stats['bytes'] <= STORE_MAX_BYTES:
+            break
+        if name != keep and not _entries[name].pinned:
+            _stats['bytes'] -= _entries.pop(name).nbytes
+            _stats['evictions'] += 1
+
+
+def shared(name, version, build, pinned=False):
+    """
+    The shared value called `name` for this data version, calling `build()`
+    only if it isn't stored yet.
+
+    `name` is any hashable identifying the value (e.g. ('dataset', path)).
+    Storing a new version replaces the old one. Sessions asking for a value
+    that is being built wait for that build instead of starting their own.
+    `pinned` values are never evicted: every session keeps using them, so
+    dropping one would only load a second copy next to the first.
+    """
+    with _lock:
+        entry = _entries.get(name)
+        if entry is not None and entry.version == version:
+            _entries.move_to_end(name)
+            _stats['hits'] += 1
+            return entry.value
+        build_lock = _build_locks.setdefault(name, threading.Lock())
+
+    with build_lock:
+        with _lock:
+            entry = _entries.get(name)
+            if entry is not None and entry.version == version:
+                _entries.move_to_end(name)
+                _stats['hits'] += 1
+                return entry.value
+
+        value = build()
+        _freeze(value)
+        size = nbytes(value)
+
+        with _lock:
+            previous = _entries.pop(name, None)
+            if previous is not None:
+                _stats['bytes'] -= previous.nbytes
+            _entries[name] = StoreEntry(version, value, size, pinned)
+            _stats['bytes'] += size
+            _stats['builds'] += 1
+            _evict(keep=name)
+    return value
+
+
+def peek(name):
+    """The StoreEntry stored as `name` (any version), or None; not counted as a use"""
+    with _lock:
+        return _entries.get(name)
+
+
+def store_stats():
+    """Snapshot of the counters, with the budget and each stored value's size"""
+    with _lock:
+        stats = dict(_stats, entries=len(_entries), max_bytes=STORE_MAX_BYTES)
+        stats['sizes'] = {name: entry.nbytes for name, entry in _entries.items()}
+    return stats
+
+
+def clear_store():
+    """Drop every stored value (counters are kept)"""
+    with _lock:
+        _entries.clear()
+        _stats['bytes'] = 0
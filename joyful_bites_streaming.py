@@ -0,0 +1,120 @@
+"""
+JOYFUL BITES STREAMING INGEST
+Chunked ingestion of customer exports into running aggregates.
+
+The export is read in bounded-size batches and each batch is folded into a set
+of mergeable aggregates, so the full table is never held in memory and peak
+memory stays flat as the export grows:
+
+- the segment cube (counts, sums, sums of squares - see joyful_bites_cube)
+- per-segment Welford moments (count, mean, M2) for every cube measure,
+  merged between batches with Chan's parallel update
+- per-segment menu item counts
+- per-segment t-digest quantile sketches (see joyful_bites_sketch)
+- per-segment least-squares sums for the requested (x, y) pairs (see
+  joyful_bites_regression)
+
+The overview and segment comparison pages render from the cube alone; the
+persona pages also use the item counts, the distribution widgets the
+sketches, and the scatter plots the trendline sums.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from joyful_bites_cube import CUBE_MEASURES, build_cube, combine_cubes
+from joyful_bites_menu_index import build_menu_index, item_counts
+from joyful_bites_regression import combine_stats, regression_stats
+from joyful_bites_schema import ANALYTICS_COLUMNS, SEGMENTS, iter_customers
+from joyful_bites_sketch import merge_segment_digests, segment_digests
+
+STREAM_CHUNK_ROWS = 250_000
+
+# What the dashboard passes to its pages when it loaded the data by streaming
+StreamingDataset = namedtuple('StreamingDataset', ['aggregates', 'data_version'])
+
+
+def new_aggregates(pairs=()):
+    """Empty running aggregates, with trendline sums for each (x, y) in `pairs`"""
+    return {
+        'rows': 0,
+        'cube': None,
+        'moments': {
+            m: pd.DataFrame(0.0, index=SEGMENTS, columns=['n', 'mean', 'm2'])
+            for m in CUBE_MEASURES
+        },
+        'items': {segment: pd.Series(dtype='int64') for segment in SEGMENTS},
+        'sketches': {},
+        'regressions': {pair: None for pair in pairs},
+    }
+
+
+def merge_moments(a, b):
+    """Chan's parallel update of two (n, mean, m2) frames"""
+    n = a['n'] + b['n']
+    delta = b['mean'] - a['mean']
+    safe_n = n.where(n > 0, 1)
+    return pd.DataFrame({
+        'n': n,
+        'mean': a['mean'] + delta * b['n'] / safe_n,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['n'] * b['n'] / safe_n,
+    })
+
+
+def _chunk_moments(chunk, measure):
+    """(n, mean, m2) per segment for one batch"""
+    grouped = chunk[measure].astype(np.float64).groupby(chunk['segment'], observed=False)
+    n = grouped.count().astype(np.float64)
+    return pd.DataFrame({
+        'n': n,
+        'mean': grouped.mean().fillna(0.0),
+        'm2': (grouped.var(ddof=0) * n).fillna(0.0),
+    }).reindex(SEGMENTS, fill_value=0.0)
+
+
+def update_aggregates(aggregates, chunk):
+    """Fold one typed batch of customers into the running aggregates (in place)"""
+    aggregates['rows'] += len(chunk)
+
+    chunk_cube = build_cube(chunk)
+    cube = aggregates['cube']
+    aggregates['cube'] = chunk_cube if cube is None else combine_cubes(cube, chunk_cube)
+
+    for m in CUBE_MEASURES:
+        aggregates['moments'][m] = merge_moments(aggregates['moments'][m], _chunk_moments(chunk, m))
+
+    aggregates['sketches'] = merge_segment_digests(aggregates['sketches'], segment_digests(chunk))
+
+    for (x, y), stats in aggregates['regressions'].items():
+        chunk_stats = regression_stats(chunk, x, y)
+        aggregates['regressions'][(x, y)] = chunk_stats if stats is None else combine_stats(stats, chunk_stats)
+
+    menu_index = build_menu_index(chunk['top_menu_items'])
+    codes = np.asarray(chunk['segment'].cat.codes)
+    for code, segment in enumerate(chunk['segment'].cat.categories):
+        counts = item_counts(menu_index, rows=codes == code)
+        aggregates['items'][segment] = aggregates['items'][segment].add(counts[counts > 0], fill_value=0).astype('int64')
+
+    return aggregates
+
+
+def stream_aggregates(path, chunk_rows=STREAM_CHUNK_ROWS, pairs=()):
+    """Build aggregates for a CSV export without ever holding more than one batch"""
+    aggregates = new_aggregates(pairs)
+    for chunk in iter_customers(path, chunk_rows, ANALYTICS_COLUMNS):
+        update_aggregates(aggregates, chunk)
+    return aggregates
+
+
+def streaming_population_sd(aggregates, measure):
+    """Per-segment population standard deviation from the Welford moments"""
+    moments = aggregates['moments'][measure]
+    return np.sqrt(moments['m2'] / moments['n'].where(moments['n'] > 0))
+
+
+def streaming_top_items(aggregates, segment, n=10):
+    """Most-listed menu items for a segment"""
+    counts = aggregates['items'].get(segment, pd.Series(dtype='int64'))
+    return counts.sort_values(ascending=False, kind='stable').head(n)
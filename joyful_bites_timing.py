@@ -0,0 +1,165 @@
+"""
+JOYFUL BITES TIMING
+Lightweight hot-path timing for the dashboard, off unless JOYFUL_BITES_TIMING=1.
+
+Page functions, chart builds and the load/aggregation steps are wrapped in
+named spans. Every span finished during one script run (a full rerun or a
+fragment rerun) is collected per thread, since Streamlit runs each session's
+script on its own thread. At the end of the run, a record is added to a
+JSONL log, one line per run:
+
+    {"ts": ..., "session": ..., "page": ..., "total_ms": ..., "spans": [[name, ms], ...]}
+
+p50/p95 latency per page (and per span) can then be computed over real
+sessions with `latency_summary()`, or by running this module:
+
+    python joyful_bites_timing.py [.joyful_bites_cache/timings.jsonl]
+
+When timing is disabled, `timed` returns the function unchanged and `span`
+returns a shared no-op context manager, so instrumented code pays next to
+nothing.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+import numpy as np
+
+TIMING_ENABLED = os.environ.get('JOYFUL_BITES_TIMING', '') not in ('', '0', 'false')
+TIMING_LOG = os.environ.get('JOYFUL_BITES_TIMING_LOG', os.path.join('.joyful_bites_cache', 'timings.jsonl'))
+
+# Records kept in memory for the sidebar panel
+RECENT_RUNS = 500
+
+_run = threading.local()
+_recent = deque(maxlen=RECENT_RUNS)
+_log_lock = threading.Lock()
+_disabled = nullcontext()
+
+
+@contextmanager
+def _span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans = getattr(_run, 'spans', None)
+        if spans is not None:
+            spans.append((name, (time.perf_counter() - started) * 1000))
+
+
+def span(name):
+    """Context manager timing a block as `name` within the current run"""
+    return _span(name) if TIMING_ENABLED else _disabled
+
+
+def timed(name=None):
+    """Decorator timing every call of a function as `name` (default: the function's name)"""
+    def decorate(func):
+        if not TIMING_ENABLED:
+            return func
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_run():
+    """Begin collecting spans for the script run on this thread"""
+    if TIMING_ENABLED:
+        _run.spans = []
+        _run.started = time.perf_counter()
+
+
+def run_active():
+    """Whether spans are being collected on this thread"""
+    return getattr(_run, 'spans', None) is not None
+
+
+def cancel_run():
+    """Drop the run on this thread without logging it (e.g. interrupted by a rerun)"""
+    _run.spans = None
+
+
+def finish_run(page, session=None):
+    """End the run on this thread, log it and return its record (None when timing is off or no run was started)"""
+    if not TIMING_ENABLED or not run_active():
+        return None
+    record = {
+        'ts': time.time(),
+        'session': session,
+        'page': page,
+        'total_ms': round((time.perf_counter() - _run.started) * 1000, 3),
+        'spans': [[name, round(ms, 3)] for name, ms in _run.spans],
+    }
+    _run.spans = None
+    _recent.append(record)
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(TIMING_LOG) or '.', exist_ok=True)
+            with open(TIMING_LOG, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+    except OSError:
+        pass  # Read-only deployments keep the in-memory panel
+    return record
+
+
+def recent_runs():
+    """Records of the latest runs in this process, oldest first"""
+    return list(_recent)
+
+
+def read_log(path=TIMING_LOG):
+    """Every record in a JSONL timing log (unparseable lines are skipped)"""
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def latency_summary(records, by='page'):
+    """
+    {key: {'runs', 'p50_ms', 'p95_ms', 'max_ms'}} over run records, keyed by
+    page (`by='page'`, run totals) or by span name (`by='span'`).
+    """
+    samples = {}
+    for record in records:
+        if by == 'page':
+            samples.setdefault(record['page'], []).append(record['total_ms'])
+        else:
+            for name, ms in record['spans']:
+                samples.setdefault(name, []).append(ms)
+    summary = {}
+    for key, values in samples.items():
+        p50, p95 = np.percentile(values, [50, 95])
+        summary[key] = {'runs': len(values), 'p50_ms': p50, 'p95_ms': p95, 'max_ms': max(values)}
+    return summary
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else TIMING_LOG
+    records = read_log(path)
+    print(f"{len(records):,} runs in {path}")
+    for title, by in (('Page', 'page'), ('Span', 'span')):
+        print(f"\n{title:<48} {'runs':>7} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+        summary = latency_summary(records, by)
+        for key, row in sorted(summary.items(), key=lambda item: -item[1]['p95_ms']):
+            print(f"{str(key):<48} {row['runs']:>7,} {row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f} {row['max_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""Shared fixtures for the dashboard's helper modules (run with `python -m pytest` from the repo root)"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SAMPLE_CSV = os.path.join(ROOT, 'joyful_bites_customers_5000.csv')
+
+
+@pytest.fixture(scope='session')
+def customers():
+    """The sample export, typed and segment-sorted like the dashboard loads it"""
+    from joyful_bites_mapped import parse_customer_csv
+    return parse_customer_csv(SAMPLE_CSV)
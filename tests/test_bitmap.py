@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from joyful_bites_bitmap import CHUNK_SIZE, _popcount, bitmap_and, bitmap_or, cardinality, from_rows, to_rows, value_counts
+from joyful_bites_cube import age_bands
+from joyful_bites_filters import build_filter_index, canonical_filters, select_rows
+
+
+@pytest.fixture(scope='module')
+def index(customers):
+    return build_filter_index(customers)
+
+
+@pytest.mark.parametrize('where', [
+    None,
+    {'uses_promos': True},
+    {'preferred_channel': ['Delivery', 'Mobile App'], 'loyalty_active': False},
+    {'city': 'Pasig', 'age_band': ['21-25', '26-30']},
+])
+def test_value_counts_match_pandas(customers, index, where):
+    mask = pd.Series(True, index=customers.index)
+    for column, values in (where or {}).items():
+        values = [values] if isinstance(values, (str, bool)) else values
+        column = pd.Series(age_bands(customers['age']), index=customers.index) if column == 'age_band' else customers[column]
+        mask &= column.isin(values)
+    expected = customers['segment'][mask].value_counts().reindex(list(index.bitmaps['segment']), fill_value=0)
+    pd.testing.assert_series_equal(value_counts(index, 'segment', where), expected, check_names=False)
+
+
+def test_filter_rows_match_pandas(customers, index):
+    filters = canonical_filters(index, {'preferred_channel': ['Delivery'], 'city': ['Pasig', 'Makati']})
+    mask = customers['preferred_channel'].eq('Delivery') & customers['city'].isin(['Pasig', 'Makati'])
+    np.testing.assert_array_equal(select_rows(index, filters), np.flatnonzero(mask.to_numpy()))
+
+
+def test_containers_round_trip_across_chunks():
+    rng = np.random.default_rng(0)
+    size = 3 * CHUNK_SIZE
+    rows = np.unique(np.concatenate([
+        rng.choice(CHUNK_SIZE, 100, replace=False),                    # array container
+        CHUNK_SIZE + rng.choice(CHUNK_SIZE, 40_000, replace=False),    # bitmap container
+        np.arange(2 * CHUNK_SIZE + 10, 2 * CHUNK_SIZE + 30_000),       # run container
+    ]))
+    bitmap = from_rows(rows, size)
+    assert [kind for kind, _ in bitmap.containers] == ['array', 'bitmap', 'run']
+    np.testing.assert_array_equal(to_rows(bitmap), rows)
+    assert cardinality(bitmap) == len(rows)
+
+
+def test_and_or_match_numpy():
+    rng = np.random.default_rng(1)
+    size = 2 * CHUNK_SIZE
+    a = np.unique(rng.integers(0, size, 60_000))
+    b = np.unique(np.concatenate([rng.integers(0, size, 3_000), np.arange(50_000, 90_000)]))
+    left, right = from_rows(a, size), from_rows(b, size)
+    np.testing.assert_array_equal(to_rows(bitmap_and(left, right)), np.intersect1d(a, b))
+    np.testing.assert_array_equal(to_rows(bitmap_or(left, right)), np.union1d(a, b))
+    assert cardinality(bitmap_and(left, right)) == len(np.intersect1d(a, b))
+
+
+def test_popcount_matches_numpy():
+    words = np.random.default_rng(2).integers(0, 2**63, 4 * CHUNK_SIZE // 64, dtype=np.uint64)
+    assert _popcount(words) == int(np.unpackbits(words.view(np.uint8)).sum())
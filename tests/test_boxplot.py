@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from joyful_bites_boxplot import MAX_OUTLIERS, box_stats, segment_box_stats
+from joyful_bites_partition import segment_views
+
+COLUMNS = ['avg_order_value', 'lifetime_value', 'visit_frequency_month', 'promo_engagement_rate']
+
+
+@pytest.mark.parametrize('column', COLUMNS)
+def test_stats_match_numpy(customers, column):
+    stats = segment_box_stats(segment_views(customers), column)
+    for segment, rows in customers.groupby('segment', observed=True):
+        values = rows[column].dropna().to_numpy(dtype=np.float64)
+        q1, median, q3 = np.percentile(values, [25, 50, 75], method='hazen')
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        outside = np.sort(values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)])
+
+        row = stats.loc[segment]
+        assert row['n'] == len(values)
+        assert (row['q1'], row['median'], row['q3']) == pytest.approx((q1, median, q3), rel=1e-12)
+        # Whiskers end at the most extreme values inside the fences
+        assert (row['lowerfence'], row['upperfence']) == (inside.min(), inside.max())
+        assert row['mean'] == pytest.approx(values.mean(), rel=1e-12)
+        assert row['sd'] == pytest.approx(values.std(ddof=0), rel=1e-9)
+        if len(outside) <= MAX_OUTLIERS:
+            np.testing.assert_array_equal(row['outliers'], outside)
+        else:
+            assert len(row['outliers']) == MAX_OUTLIERS
+            assert np.isin(row['outliers'], outside).all()
+            assert (row['outliers'][0], row['outliers'][-1]) == (outside[0], outside[-1])
+
+
+def test_outliers_capped_with_extremes_kept():
+    values = np.concatenate([np.full(2000, 10.0), np.arange(1, 501, dtype=np.float64) * 100])
+    stats = box_stats(values, max_outliers=50)
+    assert stats['q1'] == stats['q3'] == 10.0
+    assert len(stats['outliers']) == 50
+    assert (stats['outliers'][0], stats['outliers'][-1]) == (100.0, 50_000.0)
+
+
+def test_missing_values_skipped():
+    stats = box_stats([np.nan, 1.0, 2.0, 3.0, np.nan])
+    assert stats['n'] == 3
+    assert stats['median'] == 2.0
+    assert box_stats([np.nan])['n'] == 0
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from joyful_bites_cohort import COHORT_COLUMNS, build_cohorts, cohort_sizes, retention_matrix, revenue_matrix
+from joyful_bites_schema import SEGMENTS
+
+
+def months_between(start, end):
+    """Whole calendar months from one monthly Period series to another"""
+    return (end.dt.year - start.dt.year) * 12 + end.dt.month - start.dt.month
+
+
+@pytest.fixture(scope='module')
+def customers_by_cohort(customers):
+    """Each customer's cohort, last active offset and monthly spend, worked out with plain pandas"""
+    df = customers[COHORT_COLUMNS].dropna(subset=['segment', 'registration_date']).copy()
+    registered = df['registration_date'].dt.to_period('M')
+    last_order = df['last_order_date'].dt.to_period('M').fillna(registered)
+    df['cohort'] = registered.astype(str)
+    df['last_offset'] = months_between(registered, last_order).clip(lower=0).clip(upper=df['tenure_months'].clip(lower=0))
+    df['monthly_spend'] = df['total_spent'].astype(np.float64) / (df['last_offset'] + 1)
+    as_of = max(last_order.max(), registered.max())
+    df['horizon'] = months_between(registered, pd.Series(as_of, index=df.index))
+    return df
+
+
+def expected_tables(everyone, df):
+    """Active customers of `df` and their spend per cohort and month offset, one groupby per offset"""
+    cohorts = sorted(everyone['cohort'].unique())
+    offsets = range(int(everyone['horizon'].max()) + 1)
+    active = pd.DataFrame({k: df['last_offset'].ge(k).groupby(df['cohort']).sum() for k in offsets})
+    revenue = pd.DataFrame({k: df['monthly_spend'].where(df['last_offset'].ge(k), 0).groupby(df['cohort']).sum() for k in offsets})
+    horizon = everyone.groupby('cohort')['horizon'].first().reindex(cohorts)
+    unobservable = np.arange(len(offsets))[None, :] > horizon.to_numpy()[:, None]
+    return active.reindex(cohorts, fill_value=0).mask(unobservable), revenue.reindex(cohorts, fill_value=0).mask(unobservable)
+
+
+@pytest.mark.parametrize('segment', [None, 'Busy Brenda', 'Urban Uro'])
+def test_tables_match_groupby(customers, customers_by_cohort, segment):
+    cohorts = build_cohorts(customers[COHORT_COLUMNS])
+    df = customers_by_cohort
+    if segment is not None:
+        df = df[df['segment'] == segment]
+    active, revenue = expected_tables(customers_by_cohort, df)
+
+    sizes = df.groupby('cohort').size().reindex(active.index, fill_value=0)
+    assert cohorts.months == list(active.index)
+    np.testing.assert_array_equal(cohort_sizes(cohorts, segment), sizes)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.testing.assert_allclose(retention_matrix(cohorts, segment).to_numpy(), active.to_numpy() / active[[0]].to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(revenue_matrix(cohorts, segment).to_numpy(), revenue.to_numpy(), rtol=1e-9, atol=1e-6)
+
+
+def test_first_month_keeps_everyone(customers):
+    retention = retention_matrix(build_cohorts(customers[COHORT_COLUMNS]))
+    np.testing.assert_array_equal(retention[0], 1.0)
+    # Retention never rises from one month to the next
+    steps = np.diff(retention.to_numpy(), axis=1)
+    assert (steps[~np.isnan(steps)] <= 0).all()
+
+
+def test_offsets_capped_at_tenure():
+    df = pd.DataFrame({
+        'segment': pd.Categorical(['Busy Brenda', 'Busy Brenda', 'Urban Uro', 'Urban Uro'], categories=SEGMENTS),
+        'registration_date': pd.to_datetime(['2024-01-15', '2024-01-20', '2024-02-10', '2024-03-05']),
+        'last_order_date': pd.to_datetime(['2024-03-02', '2024-06-01', None, '2024-02-01']),
+        'tenure_months': [5, 1, 3, 4],
+        'total_spent': [300.0, 50.0, 40.0, 10.0],
+    })
+    cohorts = build_cohorts(df)
+    # Active through offset 2; capped at tenure 1; no order yet; ordered before registering
+    nan = np.nan
+    assert cohorts.months == ['2024-01', '2024-02', '2024-03']
+    np.testing.assert_array_equal(cohorts.horizon, [5, 4, 3])
+    np.testing.assert_array_equal(retention_matrix(cohorts).to_numpy(), [
+        [1, 1, 0.5, 0, 0, 0],
+        [1, 0, 0, 0, 0, nan],
+        [1, 0, 0, 0, nan, nan],
+    ])
+    np.testing.assert_array_equal(revenue_matrix(cohorts).to_numpy(), [
+        [125, 125, 100, 0, 0, 0],
+        [40, 0, 0, 0, 0, nan],
+        [10, 0, 0, 0, nan, nan],
+    ])
+    np.testing.assert_array_equal(cohort_sizes(cohorts, 'Urban Uro'), [0, 1, 1])
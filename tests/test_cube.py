@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from joyful_bites_cube import (
+    CUBE_DIMENSIONS, CUBE_FLAGS, CUBE_MEASURES, age_bands, build_cube, combine_cubes, mean, rollup, std,
+)
+
+
+@pytest.fixture(scope='module')
+def frame(customers):
+    """The sample with its age band, restricted to customers the cube can place in a cell"""
+    df = customers.assign(age_band=age_bands(customers['age']))
+    df[CUBE_MEASURES] = df[CUBE_MEASURES].astype(np.float64)  # The cube sums in float64
+    return df.dropna(subset=CUBE_DIMENSIONS)
+
+
+def test_segment_rollup_matches_pandas(customers, frame):
+    by_segment = rollup(build_cube(customers), by='segment')
+    grouped = frame.groupby('segment', observed=True)
+    pd.testing.assert_series_equal(by_segment['count'], grouped.size(), check_names=False)
+    for m in CUBE_MEASURES:
+        np.testing.assert_allclose(by_segment[f'{m}_sum'], grouped[m].sum(), rtol=1e-9)
+        np.testing.assert_allclose(mean(by_segment, m), grouped[m].mean(), rtol=1e-9)
+        np.testing.assert_allclose(std(by_segment, m), grouped[m].std(), rtol=1e-6)
+    for f in CUBE_FLAGS:
+        np.testing.assert_array_equal(by_segment[f'{f}_count'], grouped[f].sum())
+
+
+def test_filtered_rollup_matches_pandas(customers, frame):
+    where = {'segment': 'Urban Uro', 'preferred_channel': ['Delivery', 'Mobile App']}
+    counts = rollup(build_cube(customers), by='age_band', where=where)['count']
+    selected = frame[(frame['segment'] == 'Urban Uro') & frame['preferred_channel'].isin(where['preferred_channel'])]
+    expected = selected.groupby('age_band', observed=True).size()
+    pd.testing.assert_series_equal(counts, expected, check_names=False)
+
+
+def test_grand_totals_match_pandas(customers, frame):
+    totals = rollup(build_cube(customers))
+    assert totals['count'] == len(frame)
+    assert totals['total_spent_sum'] == pytest.approx(frame['total_spent'].sum(), rel=1e-12)
+
+
+def test_combined_chunks_match_whole(customers):
+    whole = rollup(build_cube(customers), by='segment')
+    shuffled = customers.sample(frac=1, random_state=0)
+    chunks = [build_cube(shuffled.iloc[rows]) for rows in np.array_split(np.arange(len(shuffled)), 7)]
+    combined = rollup(combine_cubes(*chunks), by='segment')
+    pd.testing.assert_frame_equal(combined, whole, check_exact=False, rtol=1e-9)
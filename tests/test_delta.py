@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import joyful_bites_delta
+from joyful_bites_cube import CUBE_DIMENSIONS, age_bands, rollup
+from joyful_bites_delta import diff_customers, refresh_aggregates, refresh_state, row_hashes
+from joyful_bites_regression import fit_lines
+from joyful_bites_store import clear_store, shared
+
+PAIRS = [('visit_frequency_month', 'lifetime_value'), ('tenure_months', 'total_spent')]
+
+
+def next_export(df):
+    """A later export: a few customers changed, two removed, one added"""
+    df = df.copy()
+    df.loc[df.index[5], 'total_spent'] += 100
+    df.loc[df.index[7], 'lifetime_value'] = 123.0
+    df.loc[df.index[9], 'preferred_channel'] = 'Delivery'
+    df = df.drop(index=df.index[[10, 11]])
+    added = df.iloc[[20]].assign(customer_id='JB-HH-999999')
+    return pd.concat([df, added], ignore_index=True)
+
+
+def assert_same_aggregates(patched, full):
+    by = ['segment', 'preferred_channel']
+    pd.testing.assert_frame_equal(
+        rollup(patched.cube, by=by), rollup(full.cube, by=by), check_exact=False, rtol=1e-9
+    )
+    for pair in PAIRS:
+        pd.testing.assert_frame_equal(
+            fit_lines(patched.regressions[pair]), fit_lines(full.regressions[pair]), check_exact=False, rtol=1e-9
+        )
+
+
+def test_diff_counts(customers):
+    new = next_export(customers)
+    delta = diff_customers(customers['customer_id'], row_hashes(customers), new['customer_id'], row_hashes(new))
+    assert (delta.removed, delta.added, delta.changed) == (2, 1, 3)
+    assert len(delta.old_rows) == 5 and len(delta.new_rows) == 4
+
+
+def test_diff_rejects_duplicate_ids(customers):
+    new = customers.copy()
+    new.loc[new.index[1], 'customer_id'] = new['customer_id'].iloc[2]
+    old = customers.iloc[::-1]  # Different order, so ids are matched rather than compared in place
+    assert diff_customers(old['customer_id'], row_hashes(old), new['customer_id'], row_hashes(new)) is None
+
+
+def test_patch_matches_full_build(customers, monkeypatch):
+    old_state = refresh_aggregates(customers, PAIRS)
+    new = next_export(customers)
+
+    built = []
+    build_cube = joyful_bites_delta.build_cube
+    monkeypatch.setattr(joyful_bites_delta, 'build_cube', lambda df: built.append(len(df)) or build_cube(df))
+    patched = refresh_aggregates(new, PAIRS, customers, old_state)
+    assert max(built) < 10  # Only the changed customers were re-aggregated
+    monkeypatch.undo()
+
+    assert_same_aggregates(patched, refresh_aggregates(new, PAIRS))
+
+
+def test_patch_refits_when_range_edge_retracted(customers):
+    old_state = refresh_aggregates(customers, PAIRS)
+    x, _ = PAIRS[1]
+    edge = customers[x].astype(np.float64).idxmin()
+    new = customers.drop(index=edge).reset_index(drop=True)
+    patched = refresh_aggregates(new, PAIRS, customers, old_state)
+    assert_same_aggregates(patched, refresh_aggregates(new, PAIRS))
+
+
+def test_refresh_state_patches_from_stored_frame(customers):
+    clear_store()
+    path = 'customers.csv'
+
+    def load(version, df):
+        def build():
+            refresh_state(path, version, df, PAIRS, previous=('dataset', path))
+            return df
+        return shared(('dataset', path), version, build)
+
+    load('v1', customers)
+    new = next_export(customers)
+    load('v2', new)
+    assert_same_aggregates(refresh_state(path, 'v2', new, PAIRS), refresh_aggregates(new, PAIRS))
+    clear_store()
+
+
+def test_patched_cube_matches_pandas(customers):
+    new = next_export(customers)
+    patched = refresh_aggregates(new, (), customers, refresh_aggregates(customers))
+    complete = new.assign(age_band=age_bands(new['age'])).dropna(subset=CUBE_DIMENSIONS)
+    by = ['segment', 'preferred_channel']
+    counts = rollup(patched.cube, by=by)['count']
+    pd.testing.assert_series_equal(counts, complete.groupby(by, observed=True).size(), check_names=False)
+    spent = rollup(patched.cube, by=by)['total_spent_sum']
+    np.testing.assert_allclose(spent, complete['total_spent'].astype(np.float64).groupby(
+        [complete[c] for c in by], observed=True).sum(), rtol=1e-9)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from conftest import SAMPLE_CSV
+from joyful_bites_explorer import LOOKUP_COLUMNS, build_lookup_index, lookup
+from joyful_bites_schema import read_customers
+
+
+@pytest.fixture(scope='module')
+def pii():
+    """The sample's lookup columns, in file order"""
+    return read_customers(SAMPLE_CSV, LOOKUP_COLUMNS)
+
+
+@pytest.fixture(scope='module')
+def indexes(pii):
+    return {column: build_lookup_index(column, pii[column]) for column in LOOKUP_COLUMNS}
+
+
+def matches(pii, column, prefix):
+    """Rows whose value starts with `prefix`, by a plain pandas scan"""
+    return np.flatnonzero(pii[column].astype(str).str.startswith(prefix).to_numpy())
+
+
+def test_empty_prefix_returns_every_row(pii, indexes):
+    for column in LOOKUP_COLUMNS:
+        rows = lookup(indexes[column], column, '  ')
+        np.testing.assert_array_equal(np.sort(rows), np.arange(len(pii)))
+
+
+def test_prefix_as_wide_as_the_keys(pii, indexes):
+    index = indexes['customer_id']
+    width = index.keys.dtype.itemsize
+    customer_id = pii['customer_id'].iloc[0]
+    assert len(customer_id) == width
+    np.testing.assert_array_equal(lookup(index, 'customer_id', customer_id.lower()), matches(pii, 'customer_id', customer_id))
+    assert len(lookup(index, 'customer_id', customer_id + '0')) == 0
+
+
+def test_id_prefix_matches_scan(pii, indexes):
+    rows = lookup(indexes['customer_id'], 'customer_id', 'jb-bb-00')
+    np.testing.assert_array_equal(np.sort(rows), matches(pii, 'customer_id', 'JB-BB-00'))
+    assert len(rows) > 1
+
+
+def test_email_is_case_insensitive(pii, indexes):
+    expected = np.flatnonzero(pii['email'].str.lower().str.startswith('angela').to_numpy())
+    assert len(expected) > 1
+    for query in ['angela', 'ANGELA', ' Angela']:
+        np.testing.assert_array_equal(np.sort(lookup(indexes['email'], 'email', query)), expected)
+
+
+def test_phone_prefixes(pii, indexes):
+    index = indexes['phone']
+    expected = matches(pii, 'phone', '0928')
+    assert 0 < len(expected) < len(pii)
+    for query in ['0928', '0928-', '(0928)']:
+        np.testing.assert_array_equal(np.sort(lookup(index, 'phone', query)), expected)
+    np.testing.assert_array_equal(np.sort(lookup(index, 'phone', '09')), matches(pii, 'phone', '09'))
+    # Keys are matched from their first digit, so dropping the leading 09 finds a different (here empty) set
+    np.testing.assert_array_equal(lookup(index, 'phone', '928'), matches(pii, 'phone', '928'))
+    full = pii['phone'].iloc[0]
+    np.testing.assert_array_equal(lookup(index, 'phone', f"{full[:4]} {full[4:7]} {full[7:]}"), matches(pii, 'phone', full))
+
+
+def test_prefix_matching_nothing(indexes):
+    assert len(lookup(indexes['customer_id'], 'customer_id', 'ZZ')) == 0
+    assert len(lookup(indexes['email'], 'email', '~')) == 0
+    assert len(lookup(indexes['phone'], 'phone', '1')) == 0
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from joyful_bites_regression import combine_stats, fit_lines, regression_stats
+
+PAIRS = [('visit_frequency_month', 'lifetime_value'), ('tenure_months', 'total_spent')]
+
+
+@pytest.mark.parametrize('x, y', PAIRS)
+def test_fits_match_numpy(customers, x, y):
+    lines = fit_lines(regression_stats(customers, x, y))
+    for segment, rows in customers.groupby('segment', observed=True):
+        xs = rows[x].to_numpy(dtype=np.float64)
+        ys = rows[y].to_numpy(dtype=np.float64)
+        slope, intercept = np.polyfit(xs, ys, 1)
+        line = lines.loc[segment]
+        assert line['n'] == len(rows)
+        assert line['slope'] == pytest.approx(slope, rel=1e-6)
+        assert line['intercept'] == pytest.approx(intercept, rel=1e-6, abs=1e-6)
+        assert line['r2'] == pytest.approx(np.corrcoef(xs, ys)[0, 1] ** 2, rel=1e-6)
+        assert (line['x_min'], line['x_max']) == (xs.min(), xs.max())
+
+
+def test_combined_batches_match_whole(customers):
+    x, y = PAIRS[0]
+    batches = [regression_stats(customers.iloc[rows], x, y) for rows in np.array_split(np.arange(len(customers)), 5)]
+    combined = combine_stats(*batches)
+    whole = regression_stats(customers, x, y)
+    np.testing.assert_allclose(combined.to_numpy(), whole.to_numpy(), rtol=1e-9)
+
+
+def test_retracted_batch_matches_rest(customers):
+    x, y = PAIRS[1]
+    whole = regression_stats(customers, x, y)
+    removed = regression_stats(customers.iloc[:100], x, y)
+    rest = regression_stats(customers.iloc[100:], x, y)
+    patched = combine_stats(whole, removed, sign=[1, -1])
+    np.testing.assert_allclose(fit_lines(patched)[['n', 'slope', 'intercept', 'r2']].to_numpy(),
+                               fit_lines(rest)[['n', 'slope', 'intercept', 'r2']].to_numpy(), rtol=1e-9)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from joyful_bites_sketch import SKETCH_MEASURES, digest, merge_digests, quantile, segment_digests
+
+QUANTILES = np.array([0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99])
+
+
+def rank_error(values, estimates):
+    """Largest gap between the requested quantiles and the true ranks of the estimates (ties span a range of ranks)"""
+    values = np.sort(values)
+    low = np.searchsorted(values, estimates, side='left') / len(values)
+    high = np.searchsorted(values, estimates, side='right') / len(values)
+    return np.maximum(low - QUANTILES, QUANTILES - high).clip(0).max()
+
+
+def value_error(values, estimates):
+    """Largest relative gap between the estimates and the exact quantiles"""
+    return np.abs(estimates / np.quantile(values, QUANTILES) - 1).max()
+
+
+@pytest.fixture(scope='module')
+def lognormal():
+    return np.random.default_rng(0).lognormal(0.0, 1.0, 1_000_000)
+
+
+def test_digest_accuracy(lognormal):
+    estimates = quantile(digest(lognormal), QUANTILES)
+    assert rank_error(lognormal, estimates) < 0.001
+    assert value_error(lognormal, estimates) < 0.003
+
+
+def test_sequential_merge_accuracy(lognormal):
+    chunks = np.array_split(lognormal, 200)
+    merged = digest(chunks[0])
+    for chunk in chunks[1:]:
+        merged = merge_digests(merged, digest(chunk))
+    estimates = quantile(merged, QUANTILES)
+    assert rank_error(lognormal, estimates) < 0.001
+    assert value_error(lognormal, estimates) < 0.006
+    assert merged.weights.sum() == len(lognormal)
+
+
+def test_extremes_are_exact(lognormal):
+    d = digest(lognormal)
+    assert quantile(d, 0.0) == lognormal.min()
+    assert quantile(d, 1.0) == lognormal.max()
+
+
+def test_segment_digests_match_sample(customers):
+    sketches = segment_digests(customers)
+    for measure in SKETCH_MEASURES:
+        for segment, values in customers.groupby('segment', observed=True)[measure]:
+            values = values.dropna().to_numpy(dtype=np.float64)
+            estimates = quantile(sketches[measure][segment], QUANTILES)
+            assert rank_error(values, estimates) < 0.01, (measure, segment)
@@ -0,0 +1,89 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_CSV
+from joyful_bites_boxplot import BOX_STAT_COLUMNS, segment_box_stats
+from joyful_bites_cohort import COHORT_COLUMNS, build_cohorts
+from joyful_bites_partition import segment_views
+from joyful_bites_regression import regression_stats
+from joyful_bites_scatter import sample_points
+from joyful_bites_sketch import segment_digests
+
+pytest.importorskip('duckdb')
+
+from joyful_bites_sql import (  # noqa: E402
+    columnar_source, query_box_stats, query_cohort_groups, query_digests, query_regression_stats,
+    query_scatter_points,
+)
+
+
+@pytest.fixture(scope='module')
+def parquet(tmp_path_factory):
+    """The sample converted for the SQL backend, in a scratch directory"""
+    path = tmp_path_factory.mktemp('sql') / 'customers.csv'
+    shutil.copy(SAMPLE_CSV, path)
+    return columnar_source(str(path), 'test')
+
+
+@pytest.mark.parametrize('column', ['avg_order_value', 'lifetime_value'])
+def test_box_stats_match_pandas(customers, parquet, column):
+    expected = segment_box_stats(segment_views(customers), column)
+    result = query_box_stats(parquet, column).reindex(expected.index)
+    np.testing.assert_allclose(result[BOX_STAT_COLUMNS].to_numpy(dtype=np.float64),
+                               expected[BOX_STAT_COLUMNS].to_numpy(dtype=np.float64), rtol=1e-9)
+    for segment in expected.index:
+        np.testing.assert_allclose(result.loc[segment, 'outliers'], expected.loc[segment, 'outliers'], rtol=1e-6)
+
+
+@pytest.mark.parametrize('x, y', [('visit_frequency_month', 'lifetime_value'), ('tenure_months', 'total_spent')])
+def test_regression_sums_match_pandas(customers, parquet, x, y):
+    expected = regression_stats(customers, x, y)
+    result = query_regression_stats(parquet, x, y)
+    assert list(result.index) == list(expected.index)
+    np.testing.assert_allclose(result[expected.columns].to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+
+def test_scatter_points_match_pandas(customers, parquet):
+    x, y = 'visit_frequency_month', 'lifetime_value'
+    points, n = query_scatter_points(parquet, x, y)
+    assert n == len(customers)
+    for segment, rows in customers.groupby('segment', observed=True):
+        drawn = points[points['segment'] == segment]
+        np.testing.assert_array_equal(np.sort(drawn[y].to_numpy(dtype=np.float64)), np.sort(rows[y].to_numpy(dtype=np.float64)))
+
+
+def test_sampled_scatter_matches_pandas_quotas(customers, parquet):
+    x, y = 'visit_frequency_month', 'lifetime_value'
+    points, n = query_scatter_points(parquet, x, y, max_points=500)
+    expected = sample_points(customers[['segment', x, y]], x, y, max_points=500)
+    assert n == len(customers)
+    pd.testing.assert_series_equal(points['segment'].value_counts(sort=False), expected['segment'].value_counts(sort=False))
+    # Every drawn point is a customer of its segment
+    keys = customers[['segment', x, y]].astype({x: np.float64, y: np.float64}).drop_duplicates()
+    drawn = points.astype({x: np.float64, y: np.float64}).merge(keys, how='left', indicator=True)
+    assert (drawn['_merge'] == 'both').all()
+
+
+def test_cohorts_match_pandas(customers, parquet):
+    expected = build_cohorts(customers[COHORT_COLUMNS])
+    result = query_cohort_groups(parquet)
+    assert result.months == expected.months
+    assert result.segments == expected.segments
+    np.testing.assert_array_equal(result.active, expected.active)
+    np.testing.assert_allclose(result.revenue, expected.revenue, rtol=1e-9)
+    np.testing.assert_array_equal(result.horizon, expected.horizon)
+
+
+def test_digests_match_pandas(customers, parquet):
+    expected = segment_digests(customers)
+    result = query_digests(parquet)
+    for measure, digests in expected.items():
+        assert list(result[measure]) == list(digests)
+        for segment, d in digests.items():
+            got = result[measure][segment]
+            np.testing.assert_allclose(got.means, d.means, rtol=1e-9)
+            np.testing.assert_array_equal(got.weights, d.weights)
+            assert (got.min, got.max) == (d.min, d.max)